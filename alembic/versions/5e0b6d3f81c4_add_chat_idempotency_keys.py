@@ -0,0 +1,40 @@
+"""add_chat_idempotency_keys
+
+Revision ID: 5e0b6d3f81c4
+Revises: a41f7c2d9e18
+Create Date: 2026-10-18 11:40:02.518730
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e0b6d3f81c4'
+down_revision: Union[str, Sequence[str], None] = 'a41f7c2d9e18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('chat_idempotency_keys',
+    sa.Column('session_id', sa.Uuid(), nullable=False),
+    sa.Column('key', sqlmodel.sql.sqltypes.AutoString(length=64), nullable=False),
+    sa.Column('turn_id', sqlmodel.sql.sqltypes.AutoString(length=32), nullable=False),
+    sa.Column('status', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('response', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('session_id', 'key')
+    )
+    op.create_index(op.f('ix_chat_idempotency_keys_expires_at'), 'chat_idempotency_keys', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_chat_idempotency_keys_expires_at'), table_name='chat_idempotency_keys')
+    op.drop_table('chat_idempotency_keys')
@@ -0,0 +1,33 @@
+"""add_truncated_to_messages
+
+Revision ID: a41f7c2d9e18
+Revises: 52d63082a9f6
+Create Date: 2026-10-18 10:12:44.120375
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a41f7c2d9e18'
+down_revision: Union[str, Sequence[str], None] = '52d63082a9f6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # server_default fills existing rows; SQLite can add NOT NULL columns that have one
+    op.add_column(
+        'messages',
+        sa.Column('truncated', sa.Boolean(), nullable=False, server_default=sa.false()),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('messages') as batch_op:
+        batch_op.drop_column('truncated')
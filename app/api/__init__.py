@@ -1,5 +1,6 @@
 """API package"""
 
 from app.api.v1 import router as v1_router
+from app.api.metrics import router as metrics_router
 
-__all__ = ["v1_router"]
+__all__ = ["v1_router", "metrics_router"]
@@ -1,15 +1,21 @@
 """API v1 router"""
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 
+from app.core.security import require_scope
 from app.api.v1.health import router as health_router
 from app.api.v1.users import router as users_router
 from app.api.v1.sessions import router as sessions_router
 from app.api.v1.chat import router as chat_router
+from app.api.v1.ws import router as ws_router
+from app.api.v1.admin import router as admin_router
 
 router = APIRouter(prefix="/api/v1")
 
 router.include_router(health_router, tags=["Health"])
-router.include_router(users_router, tags=["Users"])
-router.include_router(sessions_router, tags=["Sessions"])
-router.include_router(chat_router, tags=["Chat"])
+router.include_router(users_router, tags=["Users"], dependencies=[Depends(require_scope("users"))])
+router.include_router(sessions_router, tags=["Sessions"], dependencies=[Depends(require_scope("sessions"))])
+router.include_router(chat_router, tags=["Chat"], dependencies=[Depends(require_scope("chat"))])
+# Checks its key itself (browsers can't set WebSocket headers)
+router.include_router(ws_router, tags=["Chat"])
+router.include_router(admin_router, tags=["Admin"])
@@ -0,0 +1,79 @@
+"""Admin diagnostics endpoints"""
+
+import asyncio
+import threading
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.profiler import dump_tasks, render_collapsed, sample_stacks
+from app.core.security import verify_admin_key
+from app.db.query_stats import query_stats
+from app.schemas.admin import QueryStatsEntry, QueryStatsResponse, TaskDumpResponse
+
+router = APIRouter(prefix="/admin", dependencies=[Depends(verify_admin_key)])
+logger = get_logger(__name__)
+
+
+@router.get("/db/queries", response_model=QueryStatsResponse)
+async def top_queries(
+    limit: int = Query(20, ge=1, le=500),
+) -> QueryStatsResponse:
+    """Get the statements with the highest total DB time in this worker."""
+    return QueryStatsResponse(
+        slow_query_threshold_ms=settings.db_slow_query_ms,
+        statements=[
+            QueryStatsEntry(
+                statement=statement,
+                count=stats.count,
+                total_ms=round(stats.total_ms, 3),
+                avg_ms=round(stats.total_ms / stats.count, 3),
+                max_ms=round(stats.max_ms, 3),
+                slow_count=stats.slow_count,
+            )
+            for statement, stats in query_stats.top(limit)
+        ],
+    )
+
+
+@router.delete("/db/queries", status_code=status.HTTP_204_NO_CONTENT)
+async def reset_query_stats() -> None:
+    """Reset the per-statement aggregates."""
+    query_stats.reset()
+
+
+@router.get("/debug/profile", response_class=PlainTextResponse)
+async def profile(
+    seconds: float = Query(10.0, gt=0, le=60),
+    interval_ms: float = Query(5.0, ge=1, le=1000),
+    threads: Literal["loop", "all"] = "loop",
+) -> PlainTextResponse:
+    """
+    Sample stacks for a while and return them in collapsed-stack format.
+
+    Feed the output to flamegraph.pl or speedscope. Sampling runs on a
+    separate thread, so the event loop keeps serving while it is profiled.
+    """
+    thread_ids = {threading.get_ident()} if threads == "loop" else None
+    logger.info(f"Profiling {threads} threads for {seconds}s every {interval_ms}ms")
+    try:
+        stacks, rounds = await asyncio.to_thread(
+            sample_stacks, seconds, interval_ms / 1000, thread_ids
+        )
+    except RuntimeError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    return PlainTextResponse(
+        render_collapsed(stacks), headers={"X-Profile-Samples": str(rounds)}
+    )
+
+
+@router.get("/debug/tasks", response_model=TaskDumpResponse)
+async def tasks(
+    stack_limit: int = Query(20, ge=1, le=200),
+) -> TaskDumpResponse:
+    """Dump all asyncio tasks of this worker with their current stacks."""
+    task_list = dump_tasks(stack_limit)
+    return TaskDumpResponse(count=len(task_list), tasks=task_list)
@@ -1,67 +1,126 @@
 """Chat endpoint with SSE streaming"""
 
-from fastapi import APIRouter, Depends, Request
+from fastapi import APIRouter, Request
 from fastapi.responses import StreamingResponse
-from sqlalchemy.ext.asyncio import AsyncSession
 from sse_starlette.sse import EventSourceResponse
-import json
 
-from app.db.session import get_session
-from app.services.chat_service import ChatService
+from app.services.stream_service import ChatTurn, turn_registry
 from app.schemas.chat import ChatRequest
-from app.core.rate_limiter import limiter, get_rate_limit_string
-from app.core.logging import get_logger, LogContext
+from app.core.exceptions import ChatBotException
+from app.core.rate_limiter import enforce_rate_limit, rate_limit_key
+from app.core.serialization import dumps
+from app.core.logging import get_logger, LogContext, request_id_var
 from app.utils.ids import generate_request_id
 
 router = APIRouter()
 logger = get_logger(__name__)
 
 
+def parse_last_event_id(value: str | None) -> tuple[str, int] | None:
+    """Parse a ``<turn_id>:<seq>`` event id sent back as ``Last-Event-ID``."""
+    if not value:
+        return None
+    turn_id, sep, seq = value.strip().rpartition(":")
+    if not sep or not turn_id or not seq.isdigit():
+        return None
+    return turn_id, int(seq)
+
+
+def token_event(turn_id: str, seq: int, chunk: str) -> dict:
+    """Build the SSE event for one token chunk of a turn."""
+    return {
+        "id": f"{turn_id}:{seq}",
+        "event": "token",
+        "data": dumps({"token": chunk}),
+    }
+
+
 @router.post("/chat")
-@limiter.limit(get_rate_limit_string())
 async def chat(
     request: Request,
     chat_request: ChatRequest,
-    session: AsyncSession = Depends(get_session),
 ) -> EventSourceResponse:
     """
     Send a message and receive a streaming response.
 
-    Returns Server-Sent Events (SSE) stream with tokens.
+    Returns Server-Sent Events (SSE) stream with tokens. Every token event
+    carries an ``id``; a client that drops mid-stream can re-send the same
+    request with a ``Last-Event-ID`` header to resume from the next token
+    without triggering another LLM call.
+
+    Retries sent with the same ``idempotency_key`` (body field or
+    ``Idempotency-Key`` header) attach to the original turn or replay its
+    stored answer instead of creating duplicate messages.
     """
-    request_id = generate_request_id()
+    await enforce_rate_limit("chat", rate_limit_key(request))
+    request_id = request_id_var.get() or generate_request_id()
 
     with LogContext(
         request_id=request_id,
         session_id=str(chat_request.session_id),
     ):
-        logger.info(f"Chat request received: {len(chat_request.message)} chars")
+        turn: ChatTurn | None
+        start = 0
+        resume = parse_last_event_id(request.headers.get("last-event-id"))
 
-        service = ChatService(session)
+        if resume:
+            turn_id, last_seq = resume
+            turn = turn_registry.get(turn_id)
+            if turn is not None and turn.session_id != chat_request.session_id:
+                turn = None
+            start = last_seq + 1
+            logger.info(
+                f"Resume requested for turn {turn_id} from chunk {start}"
+                + ("" if turn else " (no longer available)")
+            )
+        else:
+            logger.info(f"Chat request received: {len(chat_request.message)} chars")
+            turn = await turn_registry.start_idempotent(
+                chat_request.session_id,
+                chat_request.message,
+                chat_request.user_id,
+                turn_id=request_id,
+                idempotency_key=(
+                    chat_request.idempotency_key
+                    or request.headers.get("idempotency-key")
+                ),
+            )
 
         async def event_generator():
-            """Generate SSE events from chat response."""
+            """Generate SSE events from the turn's replay buffer."""
+            if turn is None:
+                yield {
+                    "event": "error",
+                    "data": dumps({"error": "Stream is no longer available"}),
+                }
+                return
+
             try:
-                async for token in service.handle_chat(
-                    chat_request.session_id,
-                    chat_request.message,
-                    chat_request.user_id,
-                ):
+                async for seq, chunk in turn.read(start):
+                    yield token_event(turn.turn_id, seq, chunk)
+
+                if turn.cancelled:
                     yield {
-                        "event": "token",
-                        "data": json.dumps({"token": token}),
+                        "event": "cancelled",
+                        "data": dumps({"status": "cancelled"}),
                     }
+                    return
 
                 yield {
                     "event": "done",
-                    "data": json.dumps({"status": "complete"}),
+                    "data": dumps({"status": "complete"}),
                 }
 
             except Exception as e:
-                logger.error(f"Chat error: {e}", exc_info=True)
+                logger.error(f"Chat error: {e}")
+                error = {"error": str(e)}
+                if isinstance(e, ChatBotException):
+                    error["code"] = e.code
+                    if "retry_after" in e.details:
+                        error["retry_after"] = e.details["retry_after"]
                 yield {
                     "event": "error",
-                    "data": json.dumps({"error": str(e)}),
+                    "data": dumps(error),
                 }
 
         return EventSourceResponse(
@@ -1,13 +1,12 @@
 """Health check endpoints"""
 
-from fastapi import APIRouter, Depends
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import text
+from fastapi import APIRouter, Response, status
 
-from app.db.session import get_session
+from app.core.health import health_monitor
 from app.schemas.common import HealthResponse, ReadyResponse
 from app.utils.time import utc_now
 from app.core.config import settings
+from app.services.stream_service import turn_registry
 
 router = APIRouter()
 
@@ -23,34 +22,33 @@ async def health_check() -> HealthResponse:
 
 
 @router.get("/health/ready", response_model=ReadyResponse)
-async def readiness_check(
-    session: AsyncSession = Depends(get_session),
-) -> ReadyResponse:
+async def readiness_check(response: Response) -> ReadyResponse:
     """
-    Readiness check including database and Groq connectivity.
-    """
-    db_status = "ok"
-    groq_status = "ok"
-
-    # Check database
-    try:
-        await session.execute(text("SELECT 1"))
-    except Exception:
-        db_status = "error"
+    Readiness from the latest background checks of the database and Groq.
 
-    # Check Groq API (lightweight check - just verify client is configured)
-    try:
-        from app.llm.groq_client import get_groq_client
-        if not get_groq_client().client:
-            groq_status = "error"
-    except Exception:
-        groq_status = "error"
-
-    overall_status = "ready" if db_status == "ok" and groq_status == "ok" else "not_ready"
+    Answered from memory. Responds 503 while the database check is failing
+    or stale, or the worker is draining; a failing Groq check only reports
+    "degraded", since an LLM outage shouldn't take every pod out of rotation.
+    """
+    db_status = health_monitor.status("database")
+    groq_status = health_monitor.status("groq")
+
+    if turn_registry.draining:
+        # Shutting down: take this worker out of rotation
+        overall_status = "draining"
+    elif db_status not in ("ok", "disabled"):
+        overall_status = "not_ready"
+    elif groq_status in ("ok", "disabled"):
+        overall_status = "ready"
+    else:
+        overall_status = "degraded"
+    if overall_status in ("draining", "not_ready"):
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
 
     return ReadyResponse(
         status=overall_status,
         timestamp=utc_now(),
         database=db_status,
         groq=groq_status,
+        checks={name: state.summary() for name, state in health_monitor.checks.items()},
     )
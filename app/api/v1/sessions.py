@@ -54,6 +54,7 @@ async def get_session_messages(
                 role=m.role,
                 content=m.content,
                 created_at=m.created_at,
+                truncated=m.truncated,
             )
             for m in messages
         ],
@@ -0,0 +1,185 @@
+"""WebSocket chat transport with multiplexed sessions
+
+One connection carries any number of chat turns, each tagged with a
+client-chosen turn ``id``. Auth runs once per connection instead of once
+per turn.
+
+Client frames (JSON text):
+    {"type": "chat", "id": "t1", "session_id": "...", "message": "...", "user_id": "..."}
+    {"type": "cancel", "id": "t1"}
+
+Server frames (compact JSON text):
+    {"t": "token", "id": "t1", "d": "chunk"}
+    {"t": "done", "id": "t1"}
+    {"t": "cancelled", "id": "t1"}
+    {"t": "error", "id": "t1", "code": "...", "message": "..."}
+"""
+
+import asyncio
+import json
+
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect, status
+from pydantic import ValidationError
+
+from app.services.stream_service import turn_registry
+from app.schemas.chat import ChatSocketRequest
+from app.core.config import settings
+from app.core.exceptions import ChatBotException
+from app.core.rate_limiter import hit_rate_limit, rate_limit_key
+from app.core.security import check_api_key
+from app.core.serialization import dumps
+from app.core.logging import get_logger, LogContext
+from app.utils.ids import generate_request_id
+
+router = APIRouter()
+logger = get_logger(__name__)
+
+
+def _encode(frame: dict) -> str:
+    """Encode a server frame as compact JSON."""
+    return dumps(frame)
+
+
+class ChatConnection:
+    """State for a single multiplexed chat WebSocket."""
+
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        self.client_key = websocket.client.host if websocket.client else "unknown"
+        self.turns: dict[str, asyncio.Task] = {}
+        self._send_lock = asyncio.Lock()
+        self._closed = False
+
+    async def send(self, frame: dict) -> None:
+        """Send a frame, serialising writes from concurrent turns."""
+        if self._closed:
+            return
+        async with self._send_lock:
+            try:
+                await self.websocket.send_text(_encode(frame))
+            except (WebSocketDisconnect, RuntimeError):
+                # The receive loop will notice the disconnect and clean up
+                self._closed = True
+
+    async def error(self, turn_id: str | None, code: str, message: str) -> None:
+        """Send an error frame for a turn (or the connection if no turn)."""
+        await self.send({"t": "error", "id": turn_id, "code": code, "message": message})
+
+    async def handle_frame(self, raw: str) -> None:
+        """Dispatch a single client frame."""
+        try:
+            payload = json.loads(raw)
+        except json.JSONDecodeError:
+            await self.error(None, "VALIDATION_ERROR", "Frame is not valid JSON")
+            return
+        if not isinstance(payload, dict):
+            await self.error(None, "VALIDATION_ERROR", "Frame must be a JSON object")
+            return
+
+        frame_type = payload.get("type")
+        if frame_type == "cancel":
+            task = self.turns.get(str(payload.get("id")))
+            if task is not None:
+                task.cancel()
+            return
+        if frame_type != "chat":
+            await self.error(payload.get("id"), "VALIDATION_ERROR", f"Unknown frame type: {frame_type}")
+            return
+
+        try:
+            turn = ChatSocketRequest.model_validate(payload)
+        except ValidationError as e:
+            await self.error(payload.get("id"), "VALIDATION_ERROR", str(e.errors()[0]["msg"]))
+            return
+
+        if turn.id in self.turns:
+            await self.error(turn.id, "VALIDATION_ERROR", "A turn with this id is already in progress")
+            return
+        if len(self.turns) >= settings.ws_max_concurrent_turns:
+            await self.error(turn.id, "RATE_LIMIT_EXCEEDED", "Too many concurrent turns on this connection")
+            return
+        # Same quota as POST /chat, so switching transports doesn't double it
+        if not await hit_rate_limit("chat", rate_limit_key(self.websocket)):
+            await self.error(turn.id, "RATE_LIMIT_EXCEEDED", "Rate limit exceeded. Please try again later.")
+            return
+
+        self.turns[turn.id] = asyncio.create_task(self.run_turn(turn), name=f"ws-turn:{turn.id}")
+
+    async def run_turn(self, request: ChatSocketRequest) -> None:
+        """Relay one chat turn's chunks back to the client."""
+        with LogContext(
+            request_id=generate_request_id(),
+            session_id=str(request.session_id),
+        ):
+            turn = None
+            try:
+                turn = await turn_registry.start_idempotent(
+                    request.session_id,
+                    request.message,
+                    request.user_id,
+                    idempotency_key=request.idempotency_key,
+                )
+                async for _, chunk in turn.read():
+                    await self.send({"t": "token", "id": request.id, "d": chunk})
+
+                if turn.cancelled:
+                    await self.send({"t": "cancelled", "id": request.id})
+                else:
+                    await self.send({"t": "done", "id": request.id})
+
+            except asyncio.CancelledError:
+                # Client cancelled the turn or the socket went away
+                if turn is not None:
+                    turn.cancel()
+                await self.send({"t": "cancelled", "id": request.id})
+            except ChatBotException as e:
+                await self.error(request.id, e.code, e.message)
+            except Exception as e:
+                logger.error(f"Chat error: {e}")
+                await self.error(request.id, "INTERNAL_ERROR", "An unexpected error occurred")
+            finally:
+                self.turns.pop(request.id, None)
+
+    async def close(self) -> None:
+        """Cancel all in-flight turns once the socket has gone away."""
+        self._closed = True
+        tasks = list(self.turns.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+@router.websocket("/ws/chat")
+async def chat_websocket(websocket: WebSocket) -> None:
+    """
+    Multiplexed chat over a single WebSocket.
+
+    Accepts the API key via the ``X-API-Key`` header or an ``api_key``
+    query parameter (browsers cannot set WebSocket headers).
+    """
+    try:
+        check_api_key(
+            websocket.headers.get("x-api-key") or websocket.query_params.get("api_key"),
+            "chat",
+        )
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    connection = ChatConnection(websocket)
+    logger.info(f"Chat WebSocket connected from {connection.client_key}")
+
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                logger.info(f"Chat WebSocket disconnected ({len(connection.turns)} turns in flight)")
+                break
+            if message.get("text") is not None:
+                await connection.handle_frame(message["text"])
+            else:
+                # receive_text() would raise on these and tear down every turn
+                await connection.error(None, "VALIDATION_ERROR", "Binary frames are not supported")
+    finally:
+        await connection.close()
@@ -0,0 +1,203 @@
+"""Response compression (gzip, or Brotli if installed)
+
+Plain ASGI middleware, like the rest of the stack. The encoding is picked
+from the request's ``Accept-Encoding``:
+
+- complete responses (JSON transcripts, user listings, metrics) are
+  compressed in one go if they're at least ``minimum_size`` bytes
+- streamed responses are compressed incrementally; SSE streams are flushed
+  after every body message so each batch of frames (see ``coalesce_tokens``)
+  reaches the client immediately, at the cost of a few bytes per flush.
+  They prefer gzip: Brotli compresses small flushed blocks poorly
+
+Brotli needs the optional ``brotli`` package; without it only gzip is
+offered. ``benchmarks/compression.py`` measures the CPU/bandwidth trade-off
+of each encoding and level.
+"""
+
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+# Content types worth compressing (prefix match)
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/x-ndjson")
+
+
+class GzipEncoder:
+    """Incremental gzip stream."""
+
+    def __init__(self, level: int = 6):
+        # wbits 16 + 15: gzip header and trailer, 32 KiB window
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        """Emit everything written so far without ending the stream."""
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class BrotliEncoder:
+    """Incremental Brotli stream."""
+
+    def __init__(self, quality: int = 4):
+        self._compressor = brotli.Compressor(mode=brotli.MODE_TEXT, quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        """Emit everything written so far without ending the stream."""
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+def available_encodings(streaming: bool = False) -> tuple[str, ...]:
+    """Supported content codings, most preferred first."""
+    if brotli is None:
+        return ("gzip",)
+    return ("gzip", "br") if streaming else ("br", "gzip")
+
+
+def negotiate_encoding(accept_encoding: str, supported: tuple[str, ...]) -> str | None:
+    """
+    Pick a content coding for an ``Accept-Encoding`` header.
+
+    Highest q-value wins; ties go to the order of ``supported``.
+
+    Returns:
+        The coding, or None to send the response uncompressed
+    """
+    accepted: dict[str, float] = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding.strip()] = q
+
+    best, best_q = None, 0.0
+    for coding in supported:
+        q = accepted.get(coding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+class CompressionMiddleware:
+    """Compresses large and streamed text responses for clients that accept it."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        compress_sse: bool = True,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.compress_sse = compress_sse
+        self.encodings = available_encodings()
+        self.sse_encodings = available_encodings(streaming=True)
+
+    def encoder(self, encoding: str) -> GzipEncoder | BrotliEncoder:
+        if encoding == "br":
+            return BrotliEncoder(self.brotli_quality)
+        return GzipEncoder(self.gzip_level)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        accept_encoding = Headers(scope=scope).get("accept-encoding", "")
+        encoding = negotiate_encoding(accept_encoding, self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Message | None = None
+        encoder: GzipEncoder | BrotliEncoder | None = None
+        passthrough = False
+        flush_each = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start_message, encoder, passthrough, flush_each
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                # Held until the first body message shows how big it is
+                start_message = message
+                return
+            if message["type"] != "http.response.body":
+                if start_message is not None:
+                    await send(start_message)
+                    start_message = None
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if start_message is not None:
+                start, start_message = start_message, None
+                headers = MutableHeaders(raw=start.setdefault("headers", []))
+                content_type = headers.get("content-type", "")
+                is_sse = content_type.startswith("text/event-stream")
+                if (
+                    start["status"] in (204, 304)
+                    or "content-encoding" in headers
+                    or not content_type.startswith(COMPRESSIBLE_TYPES)
+                    or (not more_body and len(body) < self.minimum_size)
+                    or (is_sse and not self.compress_sse)
+                ):
+                    passthrough = True
+                    await send(start)
+                    await send(message)
+                    return
+
+                coding = encoding
+                if is_sse:
+                    coding = negotiate_encoding(accept_encoding, self.sse_encodings)
+                encoder = self.encoder(coding)
+                headers["content-encoding"] = coding
+                headers.add_vary_header("Accept-Encoding")
+                if not more_body:
+                    body = encoder.compress(body) + encoder.finish()
+                    headers["content-length"] = str(len(body))
+                    await send(start)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                if "content-length" in headers:
+                    del headers["content-length"]
+                flush_each = is_sse
+                await send(start)
+
+            body = encoder.compress(body)
+            if not more_body:
+                body += encoder.finish()
+            elif flush_each:
+                body += encoder.flush()
+            if body or not more_body:
+                await send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
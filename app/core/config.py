@@ -1,6 +1,9 @@
 """Application configuration using Pydantic Settings"""
 
+import logging
 from functools import lru_cache
+from typing import Any, Literal
+
 from pydantic import field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -24,6 +27,11 @@ class Settings(BaseSettings):
     groq_model: str = "llama-3.1-8b-instant"
     groq_max_tokens: int = 2048
     groq_temperature: float = 0.6
+    # Override the API endpoint, e.g. a local fake server for load tests
+    groq_base_url: str | None = None
+    # Import the Groq SDK and build the client in the background at startup,
+    # instead of on the first chat request
+    groq_warmup_on_startup: bool = True
 
     @field_validator("groq_api_key")
     @classmethod
@@ -37,16 +45,136 @@ class Settings(BaseSettings):
 
     # Database
     database_url: str = "sqlite+aiosqlite:///./cheziousbot.db"
+    # Statements slower than this are logged with their normalized SQL (0 = off)
+    db_slow_query_ms: int = 200
+    # Schema handling at startup: "check" verifies the revision (apply
+    # migrations with `python -m app.db.migrate`), "migrate" upgrades in
+    # every worker (dev/single worker only), "skip" only tests the connection
+    db_startup_mode: Literal["check", "migrate", "skip"] = "check"
 
     # Context Management
     context_window_size: int = 10
     max_message_length: int = 500
 
-    # Rate Limiting
+    # SSE Streaming (token coalescing; max_tokens <= 1 disables it)
+    sse_flush_max_tokens: int = 8
+    sse_flush_max_bytes: int = 512
+    sse_flush_max_delay_ms: int = 40
+    # How long a finished turn stays replayable for Last-Event-ID resumes
+    stream_replay_ttl_seconds: int = 120
+    # How long an in-flight turn with no connected reader waits for a
+    # reconnect before the upstream LLM stream is cancelled (0 = immediately)
+    stream_resume_grace_seconds: float = 2.0
+
+    # Idempotency keys for POST /chat retries
+    idempotency_ttl_seconds: int = 86400
+    # How often each worker deletes expired keys (0 = never)
+    idempotency_purge_interval_seconds: int = 300
+    # In-flight keys older than this are treated as abandoned (e.g. worker crash)
+    idempotency_in_flight_timeout_seconds: int = 300
+
+    # WebSocket transport
+    ws_max_concurrent_turns: int = 4
+
+    # Rate Limiting (per API key, else client IP)
     rate_limit_per_minute: int = 20
+    # Chat turns per minute per session owner, on top of the above (0 = off)
+    rate_limit_per_user_per_minute: int = 20
+    # Empty = per worker, in memory; redis://host:6379/0 = shared by all workers
+    rate_limit_storage_uri: str = ""
+    # LLM tokens per user per window (estimated prompt + streamed output;
+    # 0 = off). Past the soft ratio replies use the soft model and max
+    # tokens; once it's spent, chats are rejected until it refills
+    token_budget_per_window: int = 100_000
+    token_budget_window_seconds: int = 3600
+    token_budget_soft_ratio: float = 0.8
+    # Empty = keep GROQ_MODEL
+    token_budget_soft_model: str = ""
+    token_budget_soft_max_tokens: int = 512
 
     # Logging
     log_level: str = "INFO"
+    # Records are written from a background thread via a bounded queue (0 = write inline)
+    log_queue_size: int = 10000
+    # Above this fill ratio only 1 in N records below WARNING are queued
+    log_queue_high_watermark: float = 0.8
+    log_queue_sample_every: int = 10
+    # Per-request sampling: {"<logger or /route prefix>[:LEVEL]": keep rate}; ERROR+ is always kept
+    log_sample_rules: dict[str, float] = {}
+    # Minimum level per route prefix, e.g. {"/health": "WARNING"}; level
+    # names are parsed to numbers here, once
+    log_route_levels: dict[str, int] = {}
+    # Keep every log of requests slower than this (or failing) despite sampling (0 = off)
+    log_tail_slow_request_ms: int = 0
+    log_tail_buffer_size: int = 200
+
+    @field_validator("log_route_levels", mode="before")
+    @classmethod
+    def parse_log_route_levels(cls, v: Any) -> Any:
+        """Map LOG_ROUTE_LEVELS level names to level numbers, rejecting unknown names."""
+        if not isinstance(v, dict):
+            return v
+        known = logging.getLevelNamesMapping()
+        unknown = {
+            prefix: level
+            for prefix, level in v.items()
+            if isinstance(level, str) and level.upper() not in known
+        }
+        if unknown:
+            raise ValueError(f"LOG_ROUTE_LEVELS has unknown log levels: {unknown}")
+        return {
+            prefix: known[level.upper()] if isinstance(level, str) else level
+            for prefix, level in v.items()
+        }
+
+    # Response compression for clients that accept it: gzip, or Brotli if the
+    # optional brotli package is installed. Smaller complete responses are
+    # sent as is; SSE streams are flushed after each batch of frames
+    compression_enabled: bool = True
+    compression_min_bytes: int = 1024
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 4
+    compression_sse_enabled: bool = True
+
+    # Readiness: dependencies are checked in the background and /health/ready
+    # serves the latest results (interval 0 = don't check)
+    health_db_interval_seconds: float = 5.0
+    # Fetches the model's metadata from the LLM API (no tokens used)
+    health_llm_interval_seconds: float = 30.0
+    health_check_timeout_seconds: float = 3.0
+    # Older results count as stale, i.e. not ready
+    health_max_staleness_seconds: float = 90.0
+
+    # Metrics
+    metrics_enabled: bool = True
+    # Shared directory for per-worker snapshots; set when running several workers
+    metrics_multiproc_dir: str = ""
+    metrics_snapshot_interval_seconds: float = 5.0
+
+    # Pre-fork server (python -m app.serve); 0 workers = one per CPU, and
+    # workers are recycled after max requests (+ random jitter) if set
+    serve_host: str = "0.0.0.0"
+    serve_port: int = 8000
+    serve_workers: int = 0
+    serve_max_requests: int = 0
+    serve_max_requests_jitter: int = 0
+    # How long stopping workers get to finish in-flight requests and streams
+    serve_graceful_timeout_seconds: float = 60.0
+
+    # On SIGTERM, new chats get 503 while in-flight streams get this long to
+    # finish before they're cancelled (their partial answers are kept). Keep
+    # it below the orchestrator's kill timeout (30s on Kubernetes by default)
+    # and the serve graceful timeout
+    shutdown_drain_timeout_seconds: float = 20.0
+
+    # Tracing (spans per request and chat turn, exported as OTLP/JSON)
+    trace_enabled: bool = False
+    trace_sample_rate: float = 1.0
+    # Append one OTLP/JSON export request per line to this file
+    trace_export_path: str = ""
+    # Or POST to a collector, e.g. http://localhost:4318/v1/traces
+    trace_export_url: str = ""
+    server_timing_enabled: bool = True
 
     # CORS
     allowed_origins: list[str] = [
@@ -56,9 +184,15 @@ class Settings(BaseSettings):
         "https://chezious-bot.onrender.com/",
     ]
 
-    # API Security
+    # API Security (every /api/v1 route except health needs a key when enabled)
     api_key_enabled: bool = True
+    # Single key with the chat, users and sessions scopes
     api_key: str = ""
+    # JSON file of per-tenant keys (SHA-256 digests with scopes), reloaded on change
+    api_keys_file: str = ""
+    api_keys_reload_interval_seconds: float = 5.0
+    # Key for /api/v1/admin diagnostics (endpoints are disabled when empty)
+    admin_api_key: str = ""
 
 
 @lru_cache
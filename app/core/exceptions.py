@@ -46,6 +46,17 @@ class SessionNotFoundException(ChatBotException):
         )
 
 
+class SessionAccessDeniedException(ChatBotException):
+    """Raised when a request names a user other than the session's owner."""
+
+    def __init__(self, session_id: str):
+        super().__init__(
+            message=f"Session with ID '{session_id}' belongs to another user",
+            code="SESSION_ACCESS_DENIED",
+            details={"session_id": session_id},
+        )
+
+
 class UserNotFoundException(ChatBotException):
     """Raised when a user is not found."""
 
@@ -85,11 +96,35 @@ class DatabaseException(ChatBotException):
 class RateLimitException(ChatBotException):
     """Raised when rate limit is exceeded."""
 
-    def __init__(self, user_id: str | None = None):
+    def __init__(
+        self,
+        user_id: str | None = None,
+        retry_after: int | None = None,
+        limit: str | None = None,
+    ):
+        details: dict[str, Any] = {}
+        if user_id:
+            details["user_id"] = user_id
+        if retry_after is not None:
+            details["retry_after"] = retry_after
+        if limit:
+            # Which limit was hit, e.g. "tokens" for the LLM token budget
+            details["limit"] = limit
         super().__init__(
             message="Rate limit exceeded. Please try again later.",
             code="RATE_LIMIT_EXCEEDED",
-            details={"user_id": user_id} if user_id else {},
+            details=details,
+        )
+
+
+class IdempotencyConflictException(ChatBotException):
+    """Raised when a keyed request is still being served elsewhere."""
+
+    def __init__(self, key: str):
+        super().__init__(
+            message="A request with this idempotency key is already in progress",
+            code="IDEMPOTENCY_CONFLICT",
+            details={"idempotency_key": key},
         )
 
 
@@ -0,0 +1,150 @@
+"""Background dependency checks for the readiness endpoint
+
+Probes can arrive several times a second per pod; instead of querying the
+database and the LLM API on each one, a task checks them on its own
+schedule and ``/api/v1/health/ready`` reports the latest results, with
+their age and recent latencies.
+"""
+
+import asyncio
+import statistics
+import sys
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.utils.time import utc_now
+
+logger = get_logger(__name__)
+
+# Latencies kept per check for the recent stats
+LATENCY_WINDOW = 20
+
+
+@dataclass
+class CheckState:
+    """Latest result of one dependency check."""
+
+    status: str = "unknown"
+    checked_at: datetime | None = None
+    checked_monotonic: float | None = None
+    error: str | None = None
+    consecutive_failures: int = 0
+    latencies_ms: deque[float] = field(default_factory=lambda: deque(maxlen=LATENCY_WINDOW))
+
+    def record(self, ok: bool, latency_ms: float, error: str | None = None) -> None:
+        self.status = "ok" if ok else "error"
+        self.checked_at = utc_now()
+        self.checked_monotonic = time.monotonic()
+        self.error = error
+        self.consecutive_failures = 0 if ok else self.consecutive_failures + 1
+        self.latencies_ms.append(latency_ms)
+
+    def age_seconds(self) -> float | None:
+        if self.checked_monotonic is None:
+            return None
+        return time.monotonic() - self.checked_monotonic
+
+    def summary(self) -> dict:
+        """Status, freshness and recent latency (ms) of this check."""
+        latencies = list(self.latencies_ms)
+        age = self.age_seconds()
+        return {
+            "status": self.status,
+            "checked_at": self.checked_at,
+            "age_seconds": round(age, 3) if age is not None else None,
+            "error": self.error,
+            "consecutive_failures": self.consecutive_failures,
+            "latency_ms": round(latencies[-1], 2) if latencies else None,
+            "latency_p50_ms": round(statistics.median(latencies), 2) if latencies else None,
+            "latency_max_ms": round(max(latencies), 2) if latencies else None,
+        }
+
+
+async def _check_database() -> None:
+    from app.db.engine import engine
+
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+
+
+async def _check_groq() -> None:
+    if "app.llm.groq_client" not in sys.modules:
+        # Not warmed up yet (or warmup is off): don't import it on the loop
+        from app.llm import warm_up_groq_client
+
+        await asyncio.to_thread(warm_up_groq_client)
+    from app.llm.groq_client import get_groq_client
+
+    await get_groq_client().ping()
+
+
+class HealthMonitor:
+    """Runs the dependency checks periodically and keeps their results."""
+
+    def __init__(self):
+        self.checks: dict[str, CheckState] = {"database": CheckState(), "groq": CheckState()}
+        self._probes = {"database": _check_database, "groq": _check_groq}
+
+    def intervals(self) -> dict[str, float]:
+        """Seconds between runs of each check (0 = disabled)."""
+        return {
+            "database": settings.health_db_interval_seconds,
+            "groq": settings.health_llm_interval_seconds,
+        }
+
+    async def check(self, name: str) -> None:
+        """Run one check now and record the result."""
+        state = self.checks[name]
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._probes[name](), settings.health_check_timeout_seconds)
+        except Exception as e:
+            latency_ms = (time.perf_counter() - start) * 1000
+            error = f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+            if state.status != "error":
+                logger.warning(f"Health check {name} failed: {error}")
+            state.record(False, latency_ms, error)
+            return
+        if state.status == "error":
+            logger.info(f"Health check {name} recovered")
+        state.record(True, (time.perf_counter() - start) * 1000)
+
+    async def run(self) -> None:
+        """Run the checks on their intervals until cancelled."""
+        next_run = {name: 0.0 for name in self.checks}
+        while True:
+            now = time.monotonic()
+            due = [
+                name for name, interval in self.intervals().items()
+                if interval > 0 and now >= next_run[name]
+            ]
+            for name in due:
+                next_run[name] = now + self.intervals()[name]
+            if due:
+                await asyncio.gather(*(self.check(name) for name in due))
+            await asyncio.sleep(max(min(next_run.values()) - time.monotonic(), 0.1))
+
+    def status(self, name: str) -> str:
+        """
+        A check's status as readiness sees it.
+
+        Returns:
+            "ok", "error", "stale" (no result for too long), "unknown" (not
+            run yet) or "disabled"
+        """
+        if self.intervals()[name] <= 0:
+            return "disabled"
+        state = self.checks[name]
+        age = state.age_seconds()
+        if age is not None and age > settings.health_max_staleness_seconds:
+            return "stale"
+        return state.status
+
+
+health_monitor = HealthMonitor()
@@ -1,11 +1,24 @@
 """Structured JSON logging for CheziousBot"""
 
+import atexit
 import logging
 import json
+import queue
 import sys
+import random
+import threading
+import time
+import zlib
+from collections import Counter, deque
 from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
 from typing import Any
-from contextvars import ContextVar
+from contextvars import ContextVar, Token
+
+try:
+    import orjson
+except ImportError:  # Optional speedup; falls back to stdlib json
+    orjson = None
 
 from app.core.config import settings
 
@@ -13,6 +26,22 @@ from app.core.config import settings
 request_id_var: ContextVar[str | None] = ContextVar("request_id", default=None)
 session_id_var: ContextVar[str | None] = ContextVar("session_id", default=None)
 user_id_var: ContextVar[str | None] = ContextVar("user_id", default=None)
+route_var: ContextVar[str | None] = ContextVar("route", default=None)
+
+
+# Attributes used to carry context variables across the logging queue
+_CONTEXT_ATTRS = (
+    ("request_id", request_id_var),
+    ("session_id", session_id_var),
+    ("user_id", user_id_var),
+    ("route", route_var),
+)
+
+
+def _context(record: logging.LogRecord, name: str, var: ContextVar) -> str | None:
+    """Read a context value captured on the record, else from the current context."""
+    value = getattr(record, name, None)
+    return value if value is not None else var.get()
 
 
 class ColoredFormatter(logging.Formatter):
@@ -46,11 +75,11 @@ class ColoredFormatter(logging.Formatter):
 
         # Add context if present
         context_parts = []
-        if request_id := request_id_var.get():
+        if request_id := _context(record, "request_id", request_id_var):
             context_parts.append(f"req={request_id[:8]}")
-        if session_id := session_id_var.get():
+        if session_id := _context(record, "session_id", session_id_var):
             context_parts.append(f"session={session_id[:8]}")
-        if user_id := user_id_var.get():
+        if user_id := _context(record, "user_id", user_id_var):
             context_parts.append(f"user={user_id}")
 
         if context_parts:
@@ -69,23 +98,36 @@ class ColoredFormatter(logging.Formatter):
 class JSONFormatter(logging.Formatter):
     """Custom JSON formatter for structured logging."""
 
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        # The second-resolution part of the timestamp, cached per second
+        self._cached_second: int | None = None
+        self._cached_prefix = ""
+
+    def _timestamp(self, created: float) -> str:
+        """Render the record's creation time as an ISO 8601 UTC timestamp."""
+        second = int(created)
+        if second != self._cached_second:
+            self._cached_second = second
+            self._cached_prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+        return f"{self._cached_prefix}.{int((created - second) * 1_000_000):06d}+00:00"
+
     def format(self, record: logging.LogRecord) -> str:
         log_data: dict[str, Any] = {
-            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "timestamp": self._timestamp(record.created),
             "level": record.levelname,
             "logger": record.name,
             "message": record.getMessage(),
         }
 
         # Add context variables if present
-        if request_id := request_id_var.get():
-            log_data["request_id"] = request_id
-
-        if session_id := session_id_var.get():
-            log_data["session_id"] = session_id
+        for name, var in _CONTEXT_ATTRS:
+            if value := _context(record, name, var):
+                log_data[name] = value
 
-        if user_id := user_id_var.get():
-            log_data["user_id"] = user_id
+        # Sampled records carry their keep rate so aggregates can be re-weighted
+        if (sample_rate := getattr(record, "sample_rate", None)) is not None:
+            log_data["sample_rate"] = sample_rate
 
         # Add extra fields from record
         if hasattr(record, "extra"):
@@ -95,15 +137,231 @@ class JSONFormatter(logging.Formatter):
         if record.exc_info:
             log_data["exception"] = self.formatException(record.exc_info)
 
-        return json.dumps(log_data)
+        if orjson is not None:
+            return orjson.dumps(log_data, default=str).decode()
+        return json.dumps(log_data, default=str)
+
+
+class TailBuffer:
+    """Records sampled out during one request, held until its outcome is known."""
+
+    def __init__(self, capacity: int):
+        self.records: deque[logging.LogRecord] = deque(maxlen=capacity)
+        self.closed = False
+
+
+_tail_buffer_var: ContextVar[TailBuffer | None] = ContextVar("tail_buffer", default=None)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Per-route minimum levels and per-request log sampling.
+
+    Rules map ``"<target>[:LEVEL]"`` to a keep rate, where a target starting
+    with ``/`` is a route prefix and anything else a logger name. A rule
+    without a level covers every level below ERROR; ERROR and above are
+    always kept. The most specific matching rule wins.
+
+    The keep decision is derived from the request ID, so a request is either
+    logged in full or not at all at a given rate. Records that are dropped
+    while a tail buffer is active are held back and flushed if the request
+    turns out slow or failing.
+    """
+
+    def __init__(self, rules: dict[str, float], route_levels: dict[str, int]):
+        super().__init__()
+        self._rules = sorted(
+            (self._parse_rule(key, rate) for key, rate in rules.items()),
+            key=lambda rule: (rule[1] is None, -len(rule[0])),
+        )
+        # Level numbers, as parsed by ``Settings.log_route_levels``
+        self._route_levels = sorted(route_levels.items(), key=lambda item: -len(item[0]))
+        self.seen: Counter[str] = Counter()
+        self.sampled_out: Counter[str] = Counter()
+        self.suppressed: Counter[str] = Counter()
+        self.tail_flushed = 0
+
+    @staticmethod
+    def _parse_rule(key: str, rate: float) -> tuple[str, int | None, float]:
+        target, _, level = key.rpartition(":")
+        if target and isinstance(logging.getLevelName(level.upper()), int):
+            return target, logging.getLevelName(level.upper()), rate
+        return key, None, rate
+
+    @staticmethod
+    def _matches(target: str, logger_name: str, route: str | None) -> bool:
+        if target.startswith("/"):
+            return route is not None and route.startswith(target)
+        return logger_name == target or logger_name.startswith(target + ".")
+
+    def _rate(self, record: logging.LogRecord, route: str | None) -> float:
+        for target, levelno, rate in self._rules:
+            if levelno is not None and levelno != record.levelno:
+                continue
+            if self._matches(target, record.name, route):
+                return rate
+        return 1.0
+
+    @staticmethod
+    def _sampled_in(rate: float) -> bool:
+        request_id = request_id_var.get()
+        if request_id:
+            return zlib.crc32(request_id.encode()) / 2**32 < rate
+        return random.random() < rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "tail_flush", False):
+            return True
+        self.seen[record.levelname] += 1
+        if record.levelno >= logging.ERROR:
+            return True
+
+        route = route_var.get()
+        for prefix, min_level in self._route_levels:
+            if route is not None and route.startswith(prefix):
+                if record.levelno < min_level:
+                    self.suppressed[record.levelname] += 1
+                    self._hold(record)
+                    return False
+                break
+
+        rate = self._rate(record, route)
+        if rate >= 1.0:
+            return True
+        if self._sampled_in(rate):
+            record.sample_rate = rate
+            return True
+        self.sampled_out[record.levelname] += 1
+        self._hold(record)
+        return False
+
+    @staticmethod
+    def _hold(record: logging.LogRecord) -> None:
+        """Keep a dropped record in the request's tail buffer, if any."""
+        buffer = _tail_buffer_var.get()
+        if buffer is None or buffer.closed:
+            return
+        for name, var in _CONTEXT_ATTRS:
+            if getattr(record, name, None) is None:
+                setattr(record, name, var.get())
+        record.msg = record.getMessage()
+        record.args = None
+        buffer.records.append(record)
+
+
+def begin_tail_capture() -> Token | None:
+    """Start holding back sampled-out records for the current request."""
+    if settings.log_tail_slow_request_ms <= 0 or _sampler is None:
+        return None
+    return _tail_buffer_var.set(TailBuffer(settings.log_tail_buffer_size))
+
+
+def end_tail_capture(token: Token | None, flush: bool) -> None:
+    """
+    Close the current request's tail buffer.
+
+    Args:
+        token: Token returned by begin_tail_capture
+        flush: Emit the held-back records (e.g. the request was slow or failed)
+    """
+    if token is None:
+        return
+    buffer = _tail_buffer_var.get()
+    _tail_buffer_var.reset(token)
+    if buffer is None:
+        return
+    buffer.closed = True
+    if not flush:
+        return
+    for record in buffer.records:
+        record.tail_flush = True
+        logging.getLogger(record.name).handle(record)
+    if _sampler is not None:
+        _sampler.tail_flushed += len(buffer.records)
+
+
+class ContextQueueHandler(QueueHandler):
+    """
+    Hands records to a background thread through a bounded queue.
+
+    Formatting and the stdout write happen on the listener thread, so a slow
+    stdout never blocks the event loop: enqueueing never waits. When the
+    queue backs up, records below WARNING are sampled and then dropped;
+    WARNING and above take the place of the oldest queued lower-level
+    record, and are dropped only if there is none. Drops are counted per
+    level.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.enqueued = 0
+        self.sampled_out: Counter[str] = Counter()
+        self.dropped: Counter[str] = Counter()
+        self._sample_counter = 0
+        self._high_watermark = int(log_queue.maxsize * settings.log_queue_high_watermark)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Capture the context the formatter needs, without formatting."""
+        for name, var in _CONTEXT_ATTRS:
+            if getattr(record, name, None) is None:
+                setattr(record, name, var.get())
+        # Merge args now so mutable arguments can't change before formatting
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if record.levelno < logging.WARNING and self.queue.qsize() >= self._high_watermark:
+            # Under pressure: keep 1 in N low-severity records
+            self._sample_counter += 1
+            if self._sample_counter % settings.log_queue_sample_every:
+                self.sampled_out[record.levelname] += 1
+                return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            if record.levelno < logging.WARNING or not self._replace_low_severity(record):
+                self.dropped[record.levelname] += 1
+                return
+        self.enqueued += 1
+
+    def _replace_low_severity(self, record: logging.LogRecord) -> bool:
+        """Swap the oldest queued record below WARNING for ``record``, if any."""
+        log_queue = self.queue
+        with log_queue.mutex:
+            for i, queued in enumerate(log_queue.queue):
+                # None is the listener's stop sentinel
+                if queued is not None and queued.levelno < logging.WARNING:
+                    del log_queue.queue[i]
+                    log_queue.queue.append(record)
+                    self.dropped[queued.levelname] += 1
+                    return True
+        return False
+
+
+# Active queue handler/listener pair (None when logging synchronously)
+_queue_handler: ContextQueueHandler | None = None
+_queue_listener: QueueListener | None = None
+_sampler: SamplingFilter | None = None
+_listener_lock = threading.Lock()
+
+
+def setup_logging(use_queue: bool = True) -> None:
+    """
+    Configure structured logging.
+
+    Args:
+        use_queue: Write through the background listener thread when
+            ``log_queue_size`` allows; False writes synchronously (e.g. in a
+            process that is about to fork)
+    """
+    global _queue_handler, _queue_listener, _sampler
 
-
-def setup_logging() -> None:
-    """Configure structured logging."""
     root_logger = logging.getLogger()
     root_logger.setLevel(settings.log_level)
 
     # Remove existing handlers
+    shutdown_logging()
     for handler in root_logger.handlers[:]:
         root_logger.removeHandler(handler)
 
@@ -115,8 +373,20 @@ def setup_logging() -> None:
         handler.setFormatter(ColoredFormatter())
     else:
         handler.setFormatter(JSONFormatter())
-        
-    root_logger.addHandler(handler)
+
+    _sampler = SamplingFilter(settings.log_sample_rules, settings.log_route_levels)
+
+    if use_queue and settings.log_queue_size > 0:
+        # Write from a background thread so stdout back-pressure can't stall the loop
+        log_queue: queue.Queue = queue.Queue(maxsize=settings.log_queue_size)
+        _queue_handler = ContextQueueHandler(log_queue)
+        _queue_handler.addFilter(_sampler)
+        _queue_listener = QueueListener(log_queue, handler, respect_handler_level=True)
+        _queue_listener.start()
+        root_logger.addHandler(_queue_handler)
+    else:
+        handler.addFilter(_sampler)
+        root_logger.addHandler(handler)
 
     # Reduce noise from third-party libraries
     logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
@@ -126,6 +396,42 @@ def setup_logging() -> None:
     logging.getLogger("httpcore").setLevel(logging.WARNING)
 
 
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread, if running."""
+    global _queue_handler, _queue_listener
+    with _listener_lock:
+        if _queue_listener is not None:
+            _queue_listener.stop()
+            _queue_listener = None
+        if _queue_handler is not None:
+            logging.getLogger().removeHandler(_queue_handler)
+            _queue_handler = None
+
+
+atexit.register(shutdown_logging)
+
+
+def get_logging_stats() -> dict[str, Any]:
+    """Counters for log sampling and the logging queue."""
+    stats: dict[str, Any] = {}
+    if _sampler is not None:
+        stats["sampling"] = {
+            "seen": dict(_sampler.seen),
+            "sampled_out": dict(_sampler.sampled_out),
+            "suppressed": dict(_sampler.suppressed),
+            "tail_flushed": _sampler.tail_flushed,
+        }
+    if _queue_handler is not None:
+        stats["queue"] = {
+            "size": _queue_handler.queue.qsize(),
+            "capacity": _queue_handler.queue.maxsize,
+            "enqueued": _queue_handler.enqueued,
+            "sampled_out": dict(_queue_handler.sampled_out),
+            "dropped": dict(_queue_handler.dropped),
+        }
+    return stats
+
+
 def get_logger(name: str) -> logging.Logger:
     """Get a logger instance."""
     return logging.getLogger(name)
@@ -139,10 +445,12 @@ class LogContext:
         request_id: str | None = None,
         session_id: str | None = None,
         user_id: str | None = None,
+        route: str | None = None,
     ):
         self.request_id = request_id
         self.session_id = session_id
         self.user_id = user_id
+        self.route = route
         self._tokens: list = []
 
     def __enter__(self):
@@ -152,6 +460,8 @@ class LogContext:
             self._tokens.append(session_id_var.set(self.session_id))
         if self.user_id:
             self._tokens.append(user_id_var.set(self.user_id))
+        if self.route:
+            self._tokens.append(route_var.set(self.route))
         return self
 
     def __exit__(self, *args):
@@ -0,0 +1,370 @@
+"""In-process Prometheus metrics for CheziousBot
+
+A small dependency-free registry of counters, gauges and histograms rendered
+in the Prometheus text exposition format. When ``METRICS_MULTIPROC_DIR`` is
+set, each worker periodically writes a JSON snapshot of its metrics to that
+directory and ``/metrics`` merges the snapshots of all workers. When a
+worker exits, the ``app.serve`` supervisor folds its counters and
+histograms into an archive file, so totals don't drop and dead workers'
+files don't pile up.
+"""
+
+import asyncio
+import contextlib
+import json
+import math
+import os
+import time
+from typing import Any, Callable
+
+from app.core.config import settings
+from app.core.logging import get_logger, get_logging_stats
+
+logger = get_logger(__name__)
+
+LabelValues = tuple[str, ...]
+
+# Latency buckets in seconds, from sub-millisecond DB queries to long streams
+DEFAULT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+
+class _Metric:
+    """Base class for a named metric family with fixed label names."""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: dict[LabelValues, Any] = {}
+        self._function: Callable[[], float | dict[LabelValues, float]] | None = None
+
+    def _key(self, labels: dict[str, str]) -> LabelValues:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def set_function(self, function: Callable[[], float | dict[LabelValues, float]]) -> None:
+        """Compute the value(s) at collection time instead of tracking them."""
+        self._function = function
+
+    def collect(self) -> dict[LabelValues, Any]:
+        """Current values keyed by label values."""
+        if self._function is None:
+            return dict(self._values)
+        try:
+            value = self._function()
+        except Exception as e:
+            logger.warning(f"Metric {self.name} callback failed: {e}")
+            return {}
+        return value if isinstance(value, dict) else {(): value}
+
+
+class Counter(_Metric):
+    """Monotonically increasing value."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    """Value that can go up and down."""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    """Distribution of observations over fixed buckets."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        series = self._values.get(key)
+        if series is None:
+            # Per-bucket (non-cumulative) counts, then sum and count
+            series = self._values[key] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series["buckets"][i] += 1
+                break
+        series["sum"] += value
+        series["count"] += 1
+
+
+class MetricsRegistry:
+    """Collection of metric families."""
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def snapshot(
+        self,
+        include_gauges: bool = True,
+        values: dict[str, dict[LabelValues, Any]] | None = None,
+    ) -> dict[str, Any]:
+        """JSON-serializable dump of all current values, or of merged ``values``."""
+        return {
+            name: {
+                "values": [
+                    [list(key), value]
+                    for key, value in (metric.collect() if values is None else values.get(name, {})).items()
+                ],
+            }
+            for name, metric in self._metrics.items()
+            if include_gauges or metric.kind != "gauge"
+        }
+
+    def merge(self, snapshots: list[dict[str, Any]]) -> dict[str, dict[LabelValues, Any]]:
+        """Sum values across snapshots (counters, gauges and histograms alike)."""
+        merged: dict[str, dict[LabelValues, Any]] = {name: {} for name in self._metrics}
+        for snapshot in snapshots:
+            for name, data in snapshot.items():
+                if name not in merged:
+                    continue
+                target = merged[name]
+                for key, value in data["values"]:
+                    key = tuple(key)
+                    if isinstance(value, dict):
+                        current = target.setdefault(
+                            key, {"buckets": [0] * len(value["buckets"]), "sum": 0.0, "count": 0}
+                        )
+                        current["buckets"] = [a + b for a, b in zip(current["buckets"], value["buckets"])]
+                        current["sum"] += value["sum"]
+                        current["count"] += value["count"]
+                    else:
+                        target[key] = target.get(key, 0.0) + value
+        return merged
+
+    def render(self, values: dict[str, dict[LabelValues, Any]] | None = None) -> str:
+        """Render metrics in the Prometheus text exposition format."""
+        if values is None:
+            values = {name: metric.collect() for name, metric in self._metrics.items()}
+        lines: list[str] = []
+        for name, metric in self._metrics.items():
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            for key, value in sorted(values.get(name, {}).items()):
+                labels = dict(zip(metric.labelnames, key))
+                if isinstance(metric, Histogram):
+                    cumulative = 0
+                    for bound, count in zip(metric.buckets, value["buckets"]):
+                        cumulative += count
+                        lines.append(
+                            f"{name}_bucket{_labels(labels, le=_number(bound))} {cumulative}"
+                        )
+                    lines.append(f"{name}_bucket{_labels(labels, le='+Inf')} {value['count']}")
+                    lines.append(f"{name}_sum{_labels(labels)} {_number(value['sum'])}")
+                    lines.append(f"{name}_count{_labels(labels)} {value['count']}")
+                else:
+                    lines.append(f"{name}{_labels(labels)} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: dict[str, str], **extra: str) -> str:
+    items = {**labels, **extra}
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in items.items()) + "}"
+
+
+def _number(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+# Process-wide registry and the metrics instrumented across the app
+registry = MetricsRegistry()
+
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route, including streamed bodies",
+    ("method", "route", "status"),
+)
+llm_time_to_first_token = registry.histogram(
+    "llm_time_to_first_token_seconds", "Time from upstream request to first token"
+)
+llm_stream_duration = registry.histogram(
+    "llm_stream_duration_seconds", "Total upstream stream time", ("outcome",)
+)
+llm_tokens_per_second = registry.histogram(
+    "llm_tokens_per_second",
+    "Upstream generation rate after the first token",
+    buckets=(5, 10, 25, 50, 100, 200, 400, 800, 1600),
+)
+llm_streams = registry.counter(
+    "llm_streams_total", "Upstream streams by outcome", ("outcome",)
+)
+llm_tokens = registry.counter("llm_tokens_total", "Tokens streamed from upstream")
+llm_tokens_saved = registry.counter(
+    "llm_tokens_saved_total",
+    "Estimated upstream tokens not generated because cancelled streams were aborted",
+)
+db_query_duration = registry.histogram(
+    "db_query_duration_seconds", "Database statement execution time", ("statement",)
+)
+chat_streams_in_flight = registry.gauge(
+    "chat_streams_in_flight", "Chat turns currently streaming"
+)
+db_pool_checked_out = registry.gauge(
+    "db_pool_connections_checked_out", "Database connections currently in use"
+)
+log_records_dropped = registry.counter(
+    "log_records_dropped_total", "Log records dropped by the logging queue", ("level",)
+)
+log_records_dropped.set_function(
+    lambda: {
+        (level,): count
+        for level, count in get_logging_stats().get("queue", {}).get("dropped", {}).items()
+    }
+)
+
+
+# Counters and histograms of workers that have exited
+ARCHIVE_FILENAME = "metrics_archive.json"
+
+# (pid, file name) of this process's snapshot. The name includes the start
+# time, so a worker that reuses a dead worker's PID never overwrites its file
+_snapshot_file: tuple[int, str] | None = None
+
+
+def _snapshot_path() -> str:
+    global _snapshot_file
+    pid = os.getpid()
+    if _snapshot_file is None or _snapshot_file[0] != pid:
+        _snapshot_file = (pid, f"metrics_{pid}_{time.time_ns()}.json")
+    return os.path.join(settings.metrics_multiproc_dir, _snapshot_file[1])
+
+
+def write_snapshot(final: bool = False) -> None:
+    """
+    Write this worker's snapshot for multi-worker aggregation.
+
+    Args:
+        final: Leave out gauges, which stop being meaningful once the worker exits
+    """
+    if settings.metrics_multiproc_dir:
+        _write_snapshot_file(registry.snapshot(include_gauges=not final))
+
+
+def _write_snapshot_file(snapshot: dict[str, Any], path: str | None = None) -> None:
+    path = path or _snapshot_path()
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(snapshot, f)
+    os.replace(tmp_path, path)
+
+
+def _read_snapshot_files(filenames: list[str]) -> list[dict[str, Any]]:
+    snapshots = []
+    for filename in filenames:
+        try:
+            with open(os.path.join(settings.metrics_multiproc_dir, filename)) as f:
+                snapshots.append(json.load(f))
+        except FileNotFoundError:
+            # Archived by the supervisor since the directory was listed
+            continue
+        except (OSError, ValueError) as e:
+            logger.warning(f"Skipping unreadable metrics snapshot {filename}: {e}")
+    return snapshots
+
+
+def _render_all(own_snapshot: dict[str, Any]) -> str:
+    _write_snapshot_file(own_snapshot)
+    filenames = [
+        filename
+        for filename in os.listdir(settings.metrics_multiproc_dir)
+        if filename.startswith("metrics_") and filename.endswith(".json")
+    ]
+    return registry.render(registry.merge(_read_snapshot_files(filenames)))
+
+
+async def render_metrics() -> str:
+    """Render this worker's metrics, or all workers' in multi-process mode."""
+    if not settings.metrics_multiproc_dir:
+        return registry.render()
+    # Collect on the loop (callbacks read loop state); the file I/O and
+    # merging happen off it
+    return await asyncio.to_thread(_render_all, registry.snapshot())
+
+
+def archive_worker_snapshot(pid: int) -> None:
+    """
+    Fold an exited worker's snapshot into the archive and delete it.
+
+    Called by the supervisor after reaping the worker (so before the PID
+    can be reused). Counters and histograms keep counting towards
+    ``/metrics``; gauges are dropped.
+    """
+    directory = settings.metrics_multiproc_dir
+    prefix = f"metrics_{pid}_"
+    own_files = [filename for filename in os.listdir(directory) if filename.startswith(prefix)]
+    snapshot_files = [filename for filename in own_files if filename.endswith(".json")]
+    if snapshot_files:
+        snapshots = _read_snapshot_files([ARCHIVE_FILENAME, *snapshot_files])
+        archive = registry.snapshot(include_gauges=False, values=registry.merge(snapshots))
+        _write_snapshot_file(archive, os.path.join(directory, ARCHIVE_FILENAME))
+    for filename in own_files:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(os.path.join(directory, filename))
+
+
+async def run_snapshot_writer() -> None:
+    """Periodically write this worker's snapshot until cancelled."""
+    os.makedirs(settings.metrics_multiproc_dir, exist_ok=True)
+    try:
+        while True:
+            # Collect on the loop (callbacks read loop state), write off it
+            await asyncio.to_thread(_write_snapshot_file, registry.snapshot())
+            await asyncio.sleep(settings.metrics_snapshot_interval_seconds)
+    finally:
+        with contextlib.suppress(OSError):
+            write_snapshot(final=True)
@@ -1,65 +1,180 @@
-"""Resilience and logging middleware."""
+"""Resilience and logging middleware.
+
+Both are plain ASGI middleware rather than ``BaseHTTPMiddleware`` subclasses,
+which avoids an extra task and memory stream per request and lets streaming
+(SSE) responses pass straight through.
+"""
 import time
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import Response, JSONResponse
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-from app.core.logging import get_logger
+from app.core.config import settings
+from app.core.logging import get_logger, LogContext, begin_tail_capture, end_tail_capture
+from app.core.metrics import http_request_duration
+from app.core.tracing import SPAN_KIND_SERVER, start_trace, server_timing
+from app.db.query_stats import RequestQueryStats, request_query_stats_var
+from app.utils.ids import generate_request_id
 
 logger = get_logger(__name__)
 
 
-class RequestLoggingMiddleware(BaseHTTPMiddleware):
-    """Middleware to log request duration and status."""
+def route_template(scope: Scope) -> str:
+    """
+    Route template of a matched request, e.g. ``/api/v1/users/{user_id}``.
+
+    Keeps IDs in paths from blowing up metric cardinality.
+    """
+    route = scope.get("route")
+    template = getattr(route, "path", None)
+    if template is None:
+        return "unmatched"
+    # Routes of included routers may carry only their own part of the path;
+    # the (static) prefix is whatever precedes the part the route matched
+    path = scope["path"]
+    path_regex = getattr(route, "path_regex", None)
+    if path_regex is not None and not path_regex.match(path):
+        start = path.find("/", 1)
+        while start != -1:
+            if path_regex.match(path[start:]):
+                return path[:start] + template
+            start = path.find("/", start + 1)
+    return template
+
+
+class RequestLoggingMiddleware:
+    """
+    Middleware to log request duration and status.
+
+    Also sets the request ID and route used by log sampling, and flushes the
+    request's held-back logs if it was slow or failed.
+    """
 
-    async def dispatch(self, request: Request, call_next) -> Response:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         """Process the request and log its details."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
         start_time = time.perf_counter()
-        
-        try:
-            response = await call_next(request)
-            
-            # Calculate duration in milliseconds
-            duration = (time.perf_counter() - start_time) * 1000
-            
-            logger.info(
-                f"{request.method} {request.url.path} -> {response.status_code} ({duration:.0f}ms)"
-            )
-            return response
-            
-        except Exception as e:
-            # Calculate duration even for failed requests
-            duration = (time.perf_counter() - start_time) * 1000
-            logger.error(
-                f"{request.method} {request.url.path} -> CRASHED ({duration:.0f}ms): {e}",
-                exc_info=True
-            )
-            # Re-raise to let the general exception handler handle it, 
-            # or it will be caught by ResilienceMiddleware if that's next in the stack.
-            raise
+        response_started = False
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal response_started, status_code
+            if message["type"] == "http.response.start":
+                response_started = True
+                status_code = message["status"]
+                if settings.server_timing_enabled:
+                    # Only work finished before the headers go out is included
+                    timing = []
+                    if db_stats.count:
+                        timing.append(
+                            f'db;desc="{db_stats.count} queries";dur={db_stats.total_ms:.1f}'
+                        )
+                    if trace is not None:
+                        timing.append(server_timing(trace))
+                    if timing:
+                        message["headers"] = [
+                            *message.get("headers", []),
+                            (b"server-timing", ", ".join(timing).encode()),
+                        ]
+                # Calculate duration in milliseconds (time to response headers)
+                duration = (time.perf_counter() - start_time) * 1000
+                logger.info(
+                    f"{scope['method']} {scope['path']} -> {message['status']} "
+                    f"({duration:.0f}ms, {db_stats.count} queries, {db_stats.total_ms:.1f}ms db)"
+                )
+            await send(message)
 
+        request_id = generate_request_id()
+        db_stats = RequestQueryStats()
+        db_stats_token = request_query_stats_var.set(db_stats)
+        with LogContext(request_id=request_id, route=scope["path"]), start_trace(
+            f"{scope['method']} {scope['path']}",
+            kind=SPAN_KIND_SERVER,
+            **{"http.method": scope["method"], "request.id": request_id},
+        ) as trace:
+            tail_token = begin_tail_capture()
+            try:
+                await self.app(scope, receive, send_wrapper)
+            except Exception as e:
+                if not response_started:
+                    # Calculate duration even for failed requests
+                    duration = (time.perf_counter() - start_time) * 1000
+                    logger.error(
+                        f"{scope['method']} {scope['path']} -> CRASHED ({duration:.0f}ms): {e}",
+                        exc_info=True
+                    )
+                # Re-raise to let the general exception handler handle it, 
+                # or it will be caught by ResilienceMiddleware if that's next in the stack.
+                raise
+            finally:
+                # Full duration, including any streamed body
+                total_ms = (time.perf_counter() - start_time) * 1000
+                route = route_template(scope)
+                http_request_duration.observe(
+                    total_ms / 1000,
+                    method=scope["method"],
+                    route=route,
+                    status=str(status_code),
+                )
+                if trace is not None:
+                    trace.root.name = f"{scope['method']} {route}"
+                    trace.root.set_attribute("http.route", route)
+                    trace.root.set_attribute("http.status_code", status_code)
+                    trace.root.set_attribute("db.statements", db_stats.count)
+                    trace.root.set_attribute("db.time_ms", round(db_stats.total_ms, 3))
+                end_tail_capture(
+                    tail_token,
+                    flush=status_code >= 500 or total_ms >= settings.log_tail_slow_request_ms,
+                )
+                request_query_stats_var.reset(db_stats_token)
 
-class ResilienceMiddleware(BaseHTTPMiddleware):
+
+class ResilienceMiddleware:
     """
     Ultimate safety net middleware. 
     Catches any exception that escaped earlier handlers and returns a clean 500 JSON.
     """
 
-    async def dispatch(self, request: Request, call_next) -> Response:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        response_started = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
         try:
-            return await call_next(request)
+            await self.app(scope, receive, send_wrapper)
         except Exception as e:
+            if response_started:
+                # Too late for a clean error response; let the server close it
+                raise
             logger.error(
                 f"Unhandled Exception caught by ResilienceMiddleware: {str(e)}", 
                 exc_info=True
             )
-            return JSONResponse(
+            app = scope.get("app")
+            response = JSONResponse(
                 status_code=500,
                 content={
                     "error": {
                         "code": "INTERNAL_SERVER_ERROR",
                         "message": "A critical system error occurred. Our team has been notified.",
-                        "details": {"type": type(e).__name__} if request.app.debug else {}
+                        "details": {"type": type(e).__name__} if app is not None and app.debug else {}
                     }
                 }
             )
+            await response(scope, receive, send)
@@ -0,0 +1,165 @@
+"""On-demand sampling profiler and asyncio task dump"""
+
+import asyncio
+import gc
+import os
+import sys
+import sysconfig
+import threading
+import time
+from collections import Counter
+from types import AsyncGeneratorType, FrameType
+from typing import Any
+
+# Path prefixes stripped from frame labels, longest first
+_PATH_PREFIXES = sorted(
+    {
+        os.getcwd() + os.sep,
+        sysconfig.get_paths()["purelib"] + os.sep,
+        sysconfig.get_paths()["stdlib"] + os.sep,
+    },
+    key=len,
+    reverse=True,
+)
+
+# Only one profile may run at a time per worker
+_profile_lock = threading.Lock()
+
+
+def _short_path(filename: str) -> str:
+    for prefix in _PATH_PREFIXES:
+        if filename.startswith(prefix):
+            return filename[len(prefix):]
+    return filename
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{_short_path(code.co_filename)}:{code.co_qualname}"
+
+
+def _collapse(frame: FrameType | None) -> list[str]:
+    """Frame labels from the outermost caller to ``frame``."""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.reverse()
+    return labels
+
+
+def sample_stacks(
+    duration: float,
+    interval: float,
+    thread_ids: set[int] | None = None,
+) -> tuple[Counter[str], int]:
+    """
+    Sample thread stacks at a fixed interval (blocking; run it in a thread).
+
+    Args:
+        duration: How long to sample, in seconds
+        interval: Time between samples, in seconds
+        thread_ids: Threads to sample; all other threads if None
+
+    Returns:
+        Collapsed stacks (``frame;frame;...``) with sample counts, and the
+        number of sampling rounds
+
+    Raises:
+        RuntimeError: If another profile is already running
+    """
+    if not _profile_lock.acquire(blocking=False):
+        raise RuntimeError("A profile is already running")
+    try:
+        own_id = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        stacks: Counter[str] = Counter()
+        rounds = 0
+        deadline = time.monotonic() + duration
+        while time.monotonic() < deadline:
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id or (thread_ids is not None and thread_id not in thread_ids):
+                    continue
+                thread_name = names.get(thread_id, str(thread_id))
+                stacks[";".join([f"thread:{thread_name}", *_collapse(frame)])] += 1
+            rounds += 1
+            time.sleep(interval)
+        return stacks, rounds
+    finally:
+        _profile_lock.release()
+
+
+def render_collapsed(stacks: Counter[str]) -> str:
+    """Render stacks in the collapsed format read by flamegraph.pl and speedscope."""
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+def _await_chain(awaitable: Any) -> tuple[list[FrameType], Any]:
+    """
+    Frames of a suspended coroutine and everything it awaits, outermost first.
+
+    ``Task.get_stack`` stops where a coroutine awaits an async generator
+    (``async for``), since the ``asend`` awaitable doesn't expose its
+    generator; it is found through the GC's references instead.
+
+    Returns:
+        The frames, and the innermost awaitable (e.g. a Future), if any
+    """
+    frames: list[FrameType] = []
+    seen: set[int] = set()
+    while awaitable is not None and id(awaitable) not in seen:
+        seen.add(id(awaitable))
+        frame = getattr(awaitable, "cr_frame", None) or getattr(awaitable, "ag_frame", None)
+        if frame is None:
+            frame = getattr(awaitable, "gi_frame", None)
+        if frame is not None:
+            frames.append(frame)
+        for attr in ("cr_await", "ag_await", "gi_yieldfrom"):
+            if hasattr(awaitable, attr):
+                awaitable = getattr(awaitable, attr)
+                break
+        else:
+            if type(awaitable).__name__ == "FutureIter":
+                # ``await future`` suspends on the C Future's iterator
+                future = next((ref for ref in gc.get_referents(awaitable) if asyncio.isfuture(ref)), None)
+                return frames, future or awaitable
+            if type(awaitable).__name__ not in ("async_generator_asend", "async_generator_athrow"):
+                return frames, awaitable
+            awaitable = next(
+                (ref for ref in gc.get_referents(awaitable) if isinstance(ref, AsyncGeneratorType)),
+                None,
+            )
+    return frames, None
+
+
+def dump_tasks(stack_limit: int = 20) -> list[dict[str, Any]]:
+    """
+    Describe every task on the running event loop, with its current stack.
+
+    Stacks follow awaited coroutines and async generators down to the
+    innermost frame (the last ``stack_limit`` are kept) and end with what
+    that frame waits on, e.g. ``awaiting Future``. Chat turns are named
+    ``chat-turn:<turn id>``.
+    """
+    current = asyncio.current_task()
+    tasks = []
+    for task in asyncio.all_tasks():
+        coro = task.get_coro()
+        frames, waiting_on = _await_chain(coro)
+        stack = [
+            f"{_short_path(frame.f_code.co_filename)}:{frame.f_lineno} in {frame.f_code.co_qualname}"
+            for frame in frames[-stack_limit:]
+        ]
+        if waiting_on is not None:
+            stack.append(f"awaiting {type(waiting_on).__name__}")
+        tasks.append(
+            {
+                "name": task.get_name(),
+                "coro": getattr(coro, "__qualname__", repr(coro)),
+                "state": "done" if task.done() else ("cancelling" if task.cancelling() else "pending"),
+                "current": task is current,
+                "stack": stack,
+            }
+        )
+    tasks.sort(key=lambda t: t["name"])
+    return tasks
@@ -1,14 +1,295 @@
-"""Rate limiting middleware using SlowAPI"""
+"""Per-client rate limiting (GCRA)
 
-from slowapi import Limiter
-from slowapi.util import get_remote_address
+Limits are keyed on the caller's ``user_id``, then their API key, then the
+client IP (run uvicorn with ``--proxy-headers`` behind a load balancer so
+that's the real client address). Each key costs one timestamp, the
+"theoretical arrival time" of the generic cell rate algorithm, which allows
+``limit`` requests per ``period`` with bursts up to ``limit``:
+
+- in memory (default): per worker process, so N workers allow N times the
+  limit; keys are evicted as soon as they are idle long enough to have
+  their full budget back
+- Redis (``RATE_LIMIT_STORAGE_URI=redis://...``): shared by all workers and
+  hosts; needs the optional ``redis`` package
+
+Besides request counts, the same counters hold per-user LLM token budgets
+(``check_token_budget`` / ``charge_tokens``): a request costs its tokens
+instead of 1, and output tokens are charged after the fact, which may take
+a budget past its limit until it refills.
+"""
+
+import hashlib
+import math
+import time
+from collections import OrderedDict
+
+from starlette.requests import HTTPConnection
 
 from app.core.config import settings
+from app.core.exceptions import ConfigurationException, RateLimitException
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Atomically applies GCRA to one key; clocked by the Redis server so that
+# hosts with skewed clocks agree
+_GCRA_SCRIPT = """
+local interval = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local tat = tonumber(redis.call('GET', KEYS[1])) or now
+if tat < now then
+    tat = now
+end
+local new_tat = tat + interval * cost
+local excess = new_tat - now - period
+if excess > 0 then
+    return tostring(excess)
+end
+redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil((new_tat - now) * 1000))
+return '0'
+"""
+
+# Spends unconditionally and returns the share of the budget in use
+_CHARGE_SCRIPT = """
+local interval = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local tat = tonumber(redis.call('GET', KEYS[1])) or now
+if tat < now then
+    tat = now
+end
+tat = tat + interval * cost
+if tat > now then
+    redis.call('SET', KEYS[1], tostring(tat), 'PX', math.ceil((tat - now) * 1000))
+end
+return tostring((tat - now) / period)
+"""
+
+
+class MemoryBackend:
+    """In-process GCRA state: one float per active key."""
+
+    def __init__(self):
+        # period -> key -> theoretical arrival time, least recently updated
+        # first. Request limits and token budgets have very different
+        # periods; keeping them apart keeps eviction order meaningful
+        self._tats: dict[float, OrderedDict[str, float]] = {}
+
+    def __len__(self) -> int:
+        return sum(len(tats) for tats in self._tats.values())
+
+    async def hit(self, key: str, limit: int, period: float, cost: int = 1) -> float:
+        """
+        Spend ``cost`` from ``key``'s budget of ``limit`` per ``period`` seconds.
+
+        Returns:
+            0 if allowed, otherwise seconds until it would be
+        """
+        now = time.monotonic()
+        self._evict(now)
+        tats = self._tats.setdefault(period, OrderedDict())
+        tat = max(tats.get(key, now), now)
+        new_tat = tat + period / limit * cost
+        excess = new_tat - now - period
+        if excess > 0:
+            return excess
+        tats[key] = new_tat
+        tats.move_to_end(key)
+        return 0.0
+
+    async def charge(self, key: str, limit: int, period: float, cost: int) -> float:
+        """
+        Spend ``cost`` from ``key``'s budget even if that exceeds it.
+
+        Returns:
+            Share of the budget in use afterwards (above 1 when overdrawn)
+        """
+        now = time.monotonic()
+        self._evict(now)
+        tats = self._tats.setdefault(period, OrderedDict())
+        tat = max(tats.get(key, now), now) + period / limit * cost
+        if tat > now:
+            tats[key] = tat
+            tats.move_to_end(key)
+        return (tat - now) / period
+
+    def _evict(self, now: float) -> None:
+        # A key whose arrival time has passed has its whole budget back, same
+        # as one we've never seen. Within one period, arrival times are at
+        # most a period past the last update (plus a bounded overdraw from
+        # ``charge``), so popping from the oldest end until the first live
+        # entry keeps only keys seen within about a period; amortized O(1).
+        for tats in self._tats.values():
+            while tats:
+                key, tat = next(iter(tats.items()))
+                if tat > now:
+                    break
+                del tats[key]
+
+    async def close(self) -> None:
+        self._tats.clear()
+
+
+class RedisBackend:
+    """GCRA state in Redis, shared across workers and hosts."""
+
+    def __init__(self, uri: str, prefix: str = "ratelimit:"):
+        try:
+            from redis.asyncio import from_url
+        except ImportError as e:
+            raise ConfigurationException(
+                "RATE_LIMIT_STORAGE_URI needs the redis package (pip install redis)"
+            ) from e
+        self.prefix = prefix
+        self.client = from_url(uri)
+        self._script = self.client.register_script(_GCRA_SCRIPT)
+        self._charge_script = self.client.register_script(_CHARGE_SCRIPT)
+
+    async def hit(self, key: str, limit: int, period: float, cost: int = 1) -> float:
+        """Same contract as ``MemoryBackend.hit``; fails open if Redis is down."""
+        try:
+            excess = await self._script(keys=[self.prefix + key], args=[period / limit, period, cost])
+        except Exception as e:
+            logger.warning(f"Rate limit backend unavailable, allowing request: {e}")
+            return 0.0
+        return float(excess)
+
+    async def charge(self, key: str, limit: int, period: float, cost: int) -> float:
+        """Same contract as ``MemoryBackend.charge``; reports 0 if Redis is down."""
+        try:
+            usage = await self._charge_script(keys=[self.prefix + key], args=[period / limit, period, cost])
+        except Exception as e:
+            logger.warning(f"Rate limit backend unavailable, not charging: {e}")
+            return 0.0
+        return float(usage)
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+class RateLimiter:
+    """Named limits over a shared backend."""
+
+    def __init__(self, backend: MemoryBackend | RedisBackend):
+        self.backend = backend
+
+    @classmethod
+    def from_uri(cls, uri: str) -> "RateLimiter":
+        """Memory backend for an empty or ``memory://`` URI, Redis otherwise."""
+        if not uri or uri.startswith("memory://"):
+            return cls(MemoryBackend())
+        if uri.startswith(("redis://", "rediss://", "unix://")):
+            return cls(RedisBackend(uri))
+        raise ConfigurationException(f"Unsupported RATE_LIMIT_STORAGE_URI scheme: {uri.split(':', 1)[0]}")
+
+    async def hit(self, scope: str, key: str, limit: int, period: float = 60.0) -> float:
+        """
+        Count one request from ``key`` against ``scope``'s limit.
+
+        Returns:
+            0 if allowed, otherwise seconds to wait before retrying
+        """
+        return await self.backend.hit(f"{scope}:{key}", limit, period)
+
+    async def charge(self, scope: str, key: str, limit: int, period: float, cost: int) -> float:
+        """
+        Spend ``cost`` from ``key``'s budget in ``scope``, even past the limit.
+
+        Returns:
+            Share of the budget in use afterwards (0 cost only reads it)
+        """
+        return await self.backend.charge(f"{scope}:{key}", limit, period, cost)
+
+    async def close(self) -> None:
+        await self.backend.close()
+
+
+limiter = RateLimiter.from_uri(settings.rate_limit_storage_uri)
+
+
+def rate_limit_key(conn: HTTPConnection) -> str:
+    """
+    Identify the caller by what authenticated them: their API key, else their IP.
+
+    Never by a user id from the request: the client picks it and could get
+    a fresh bucket on every request. Per-user limits key on the session
+    owner instead (see ``TurnRegistry``). The API key is hashed so that it
+    never ends up in Redis or a heap dump.
+    """
+    api_key = conn.headers.get("x-api-key") or conn.query_params.get("api_key")
+    if api_key:
+        return f"key:{hashlib.sha256(api_key.encode()).hexdigest()[:32]}"
+    return f"ip:{conn.client.host if conn.client else 'unknown'}"
+
+
+async def hit_rate_limit(scope: str, key: str) -> bool:
+    """
+    Count one request from ``key`` against the per-minute limit.
+
+    Returns:
+        True if the request is allowed, False if the limit is exhausted.
+    """
+    return not await limiter.hit(scope, key, settings.rate_limit_per_minute)
+
+
+async def enforce_rate_limit(scope: str, key: str, limit: int | None = None) -> None:
+    """
+    Count one request from ``key`` against a per-minute limit.
+
+    Args:
+        scope: Bucket namespace, e.g. "chat"
+        key: Caller identity within the scope
+        limit: Requests per minute (default ``RATE_LIMIT_PER_MINUTE``)
+
+    Raises:
+        RateLimitException: If the limit is exhausted
+    """
+    if limit is None:
+        limit = settings.rate_limit_per_minute
+    retry_after = await limiter.hit(scope, key, limit)
+    if retry_after:
+        logger.warning(f"Rate limit exceeded for {key.partition(':')[0]} on {scope}")
+        raise RateLimitException(retry_after=math.ceil(retry_after))
+
+
+async def check_token_budget(user_id: str) -> bool:
+    """
+    Check a user's LLM token budget before a chat turn.
+
+    The turn's own tokens are charged afterwards with ``charge_tokens``, so
+    the last turn allowed in a window may overdraw it.
+
+    Returns:
+        True if the user is past the soft limit and the turn should be served
+        the cheaper way
 
-# Create limiter instance
-limiter = Limiter(key_func=get_remote_address)
+    Raises:
+        RateLimitException: If the budget is spent
+    """
+    budget = settings.token_budget_per_window
+    if budget <= 0:
+        return False
+    window = settings.token_budget_window_seconds
+    usage = await limiter.charge("tokens", f"user:{user_id}", budget, window, 0)
+    if usage >= 1:
+        logger.warning(f"Token budget exhausted for user {user_id}")
+        raise RateLimitException(
+            user_id=user_id,
+            retry_after=max(math.ceil((usage - 1) * window), 1),
+            limit="tokens",
+        )
+    return usage >= settings.token_budget_soft_ratio
 
 
-def get_rate_limit_string() -> str:
-    """Get rate limit string for decorators."""
-    return f"{settings.rate_limit_per_minute}/minute"
+async def charge_tokens(user_id: str, tokens: int) -> None:
+    """Charge LLM tokens (prompt or generated) to a user's budget."""
+    if settings.token_budget_per_window > 0 and tokens > 0:
+        await limiter.charge(
+            "tokens", f"user:{user_id}", settings.token_budget_per_window,
+            settings.token_budget_window_seconds, tokens,
+        )
@@ -1,4 +1,28 @@
-"""API Key authentication for CheziousBot."""
+"""API Key authentication for CheziousBot.
+
+Keys are looked up by their SHA-256 digest in an in-memory table built from
+``API_KEY`` (one key for the chat, users and sessions routes) and
+``API_KEYS_FILE``, a JSON file of per-tenant keys reloaded when it changes:
+
+    {"keys": [
+        {"id": "acme-web", "tenant": "acme", "sha256": "<hex digest>",
+         "scopes": ["chat", "users", "sessions"]}
+    ]}
+
+Only digests are stored. Generate a key and its entry with:
+
+    python -m app.core.security --tenant acme --id acme-web --scopes chat users sessions
+"""
+
+import argparse
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
 
 from fastapi import Security, HTTPException, status
 from fastapi.security import APIKeyHeader
@@ -10,36 +34,228 @@ logger = get_logger(__name__)
 
 api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
 
+# Scopes guarding each group of routes; "*" grants all of them
+SCOPES = ("chat", "users", "sessions", "admin")
+
+# Unknown keys are remembered so that repeated guesses are rejected without
+# a table lookup or another warning
+NEGATIVE_CACHE_SIZE = 10_000
+NEGATIVE_CACHE_TTL = 60.0
+
+
+@dataclass(frozen=True)
+class ApiKey:
+    """A known API key (by digest) and what it may access."""
+
+    key_id: str
+    tenant: str
+    digest: bytes
+    scopes: frozenset[str]
+
+    def allows(self, scope: str) -> bool:
+        return "*" in self.scopes or scope in self.scopes
+
+
+# Returned when authentication is disabled
+ANONYMOUS = ApiKey(key_id="anonymous", tenant="", digest=b"", scopes=frozenset({"*"}))
+
+
+def digest_key(api_key: str) -> bytes:
+    """SHA-256 digest a key is stored and looked up by."""
+    return hashlib.sha256(api_key.encode()).digest()
+
+
+class ApiKeyStore:
+    """In-memory key table with mtime-based hot reload and a negative cache."""
+
+    def __init__(self, path: str = "", static_key: str = "", reload_interval: float = 5.0):
+        self.path = path
+        self.static_key = static_key
+        self.reload_interval = reload_interval
+        self._keys: dict[bytes, ApiKey] = {}
+        self._misses: OrderedDict[bytes, float] = OrderedDict()
+        self._file_stamp: tuple[int, int] | None = None
+        self._next_check = 0.0
+        self.reload()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def reload(self) -> None:
+        """Rebuild the table; keeps the previous one if the file is invalid."""
+        keys: dict[bytes, ApiKey] = {}
+        if self.static_key:
+            digest = digest_key(self.static_key)
+            keys[digest] = ApiKey("default", "default", digest, frozenset({"chat", "users", "sessions"}))
+
+        stamp = None
+        if self.path:
+            try:
+                stat = os.stat(self.path)
+                stamp = (stat.st_mtime_ns, stat.st_size)
+                with open(self.path) as f:
+                    entries = json.load(f)["keys"]
+                for entry in entries:
+                    digest = bytes.fromhex(entry["sha256"])
+                    keys[digest] = ApiKey(
+                        key_id=entry.get("id") or entry["sha256"][:8],
+                        tenant=entry["tenant"],
+                        digest=digest,
+                        scopes=frozenset(entry.get("scopes", ())),
+                    )
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                logger.error(f"Failed to load API keys from {self.path}: {e}")
+                if self._file_stamp is not None:
+                    # Don't lock everyone out over a bad edit
+                    self._file_stamp = stamp
+                    return
+
+        self._keys = keys
+        self._file_stamp = stamp
+        # A key rejected before may have just been added
+        self._misses.clear()
+        logger.info(f"Loaded {len(keys)} API key(s)")
+
+    def _maybe_reload(self, now: float) -> None:
+        if not self.path or now < self._next_check:
+            return
+        self._next_check = now + self.reload_interval
+        try:
+            stat = os.stat(self.path)
+            stamp = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            stamp = None
+        if stamp != self._file_stamp:
+            self.reload()
+
+    def lookup(self, api_key: str) -> ApiKey | None:
+        """Find the entry for a presented key, or None if it's unknown."""
+        now = time.monotonic()
+        # Cheap except once per reload interval; a reload clears the misses
+        self._maybe_reload(now)
+        digest = digest_key(api_key)
+        expires = self._misses.get(digest)
+        if expires is not None and expires > now:
+            return None
+
+        entry = self._keys.get(digest)
+        # The table is keyed by digest; compare in constant time anyway
+        if entry is not None and hmac.compare_digest(entry.digest, digest):
+            self._misses.pop(digest, None)
+            return entry
+
+        if expires is None:
+            logger.warning("Unknown API key presented")
+        self._misses[digest] = now + NEGATIVE_CACHE_TTL
+        self._misses.move_to_end(digest)
+        while len(self._misses) > NEGATIVE_CACHE_SIZE:
+            self._misses.popitem(last=False)
+        return None
+
+    def has_scope(self, scope: str) -> bool:
+        """Whether any loaded key grants ``scope``."""
+        return any(entry.allows(scope) for entry in self._keys.values())
+
 
-async def verify_api_key(
+key_store = ApiKeyStore(
+    settings.api_keys_file, settings.api_key, settings.api_keys_reload_interval_seconds
+)
+
+
+def check_api_key(api_key: str | None, scope: str) -> ApiKey:
+    """
+    Validate an API key outside of FastAPI's security dependencies.
+
+    Shared by ``require_scope`` and transports that cannot use it (e.g.
+    WebSockets, where browsers pass the key as a query parameter).
+
+    Returns:
+        The matching key, or ``ANONYMOUS`` if auth is disabled.
+
+    Raises:
+        HTTPException: 401 if the key is missing or unknown, 403 if it
+            lacks ``scope``.
+    """
+    if not settings.api_key_enabled:
+        return ANONYMOUS
+    if not api_key:
+        logger.warning("Request without API key rejected")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="API key required",
+            headers={"WWW-Authenticate": "ApiKey"},
+        )
+    entry = key_store.lookup(api_key)
+    if entry is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid API key",
+            headers={"WWW-Authenticate": "ApiKey"},
+        )
+    if not entry.allows(scope):
+        logger.warning(f"API key {entry.key_id} lacks scope {scope}")
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=f"API key lacks scope '{scope}'")
+    return entry
+
+
+def require_scope(scope: str):
+    """
+    Build a dependency that requires an API key with ``scope``.
+
+    Usage:
+        router.include_router(chat_router, dependencies=[Depends(require_scope("chat"))])
+    """
+
+    async def verify_api_key(
+        api_key: str | None = Security(api_key_header),
+    ) -> ApiKey:
+        return check_api_key(api_key, scope)
+
+    return verify_api_key
+
+
+async def verify_admin_key(
     api_key: str | None = Security(api_key_header),
 ) -> str:
     """
-    Verify the API key from request header.
-    
-    When api_key_enabled is True, requests must include a valid X-API-Key header.
-    When disabled, all requests pass through.
-    
-    Returns:
-        The API key if valid, empty string if auth is disabled.
-        
+    Verify the admin API key for diagnostics endpoints.
+
+    Accepts ``ADMIN_API_KEY`` or any key with the ``admin`` scope; admin
+    endpoints are disabled when neither exists.
+
     Raises:
-        HTTPException: 401 if API key is invalid or missing when auth is enabled.
+        HTTPException: 404 if admin endpoints are disabled, 401 if the key is
+            missing or wrong.
     """
-    if settings.api_key_enabled:
-        if not api_key:
-            logger.warning("Request without API key rejected")
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="API key required",
-                headers={"WWW-Authenticate": "ApiKey"},
-            )
-        if api_key != settings.api_key:
-            logger.warning("Request with invalid API key rejected")
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid API key",
-                headers={"WWW-Authenticate": "ApiKey"},
-            )
-        logger.debug("API key verified")
-    return api_key or ""
+    if not settings.admin_api_key and not key_store.has_scope("admin"):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if api_key:
+        if settings.admin_api_key and hmac.compare_digest(api_key, settings.admin_api_key):
+            return api_key
+        entry = key_store.lookup(api_key)
+        if entry is not None and entry.allows("admin"):
+            return api_key
+    logger.warning("Admin request with missing or invalid API key rejected")
+    raise HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid admin API key",
+        headers={"WWW-Authenticate": "ApiKey"},
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate an API key and its API_KEYS_FILE entry")
+    parser.add_argument("--tenant", required=True)
+    parser.add_argument("--id", dest="key_id", help="Name shown in logs (default: digest prefix)")
+    parser.add_argument("--scopes", nargs="+", default=["chat", "users", "sessions"], choices=[*SCOPES, "*"])
+    args = parser.parse_args()
+
+    api_key = secrets.token_urlsafe(32)
+    digest = digest_key(api_key).hex()
+    entry = {"id": args.key_id or digest[:8], "tenant": args.tenant, "sha256": digest, "scopes": args.scopes}
+    print(f"API key (shown once): {api_key}")
+    print(f"Entry for API_KEYS_FILE:\n{json.dumps(entry)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""Fast JSON serialization for stream payloads and hand-built responses
+
+Plain dicts (SSE events, WebSocket frames, error bodies) are serialized with
+orjson when it's installed (optional dependency) and compact stdlib JSON
+otherwise. Endpoints returning Pydantic response models are left to FastAPI,
+which already dumps them with Pydantic's Rust serializer (see
+``benchmarks/serialization.py``).
+"""
+
+import json
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+def dumps(obj: Any) -> str:
+    """Serialize plain JSON data to compact text (UTF-8, not ASCII-escaped)."""
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+
+class FastJSONResponse(JSONResponse):
+    """``JSONResponse`` rendered with orjson when available."""
+
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content)
+        return super().render(content)
@@ -0,0 +1,50 @@
+"""Shutdown signal hook for draining work before the server stops"""
+
+import asyncio
+import signal
+from typing import Callable
+
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+SHUTDOWN_SIGNALS = (signal.SIGTERM, signal.SIGINT)
+
+
+def on_shutdown_signal(loop: asyncio.AbstractEventLoop, callback: Callable[[], None]) -> Callable[[], None]:
+    """
+    Run ``callback`` on the event loop when SIGTERM or SIGINT arrives.
+
+    The server's own handlers (installed before the app starts) still run,
+    so it goes on to stop accepting connections as usual; the callback only
+    gets to react first, while in-flight requests are still being served.
+
+    Returns:
+        A function that restores the previous handlers
+    """
+    previous: dict[int, object] = {}
+
+    def handler(signum, frame) -> None:
+        loop.call_soon_threadsafe(callback)
+        chained = previous.get(signum)
+        if callable(chained):
+            chained(signum, frame)
+        elif chained == signal.SIG_DFL:
+            # Nothing else would handle it: behave as if we weren't here
+            signal.signal(signum, signal.SIG_DFL)
+            signal.raise_signal(signum)
+
+    try:
+        for signum in SHUTDOWN_SIGNALS:
+            previous[signum] = signal.getsignal(signum)
+            signal.signal(signum, handler)
+    except ValueError:
+        # Not on the main thread (e.g. embedded in a test client)
+        logger.debug("Shutdown signal hook not installed: not on the main thread")
+
+    def restore() -> None:
+        for signum, chained in previous.items():
+            if signal.getsignal(signum) is handler:
+                signal.signal(signum, chained)
+
+    return restore
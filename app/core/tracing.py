@@ -0,0 +1,327 @@
+"""Lightweight request tracing for CheziousBot
+
+Spans are recorded per request (or per chat turn) and exported as OTLP/JSON,
+either appended to a file (one export request per line) or posted to a local
+collector's ``/v1/traces`` endpoint. Nothing is recorded unless
+``TRACE_ENABLED`` is set, and ``span()`` is a no-op outside a trace.
+"""
+
+import json
+import os
+import queue
+import random
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator
+
+from app.core.config import settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# OTLP span kinds and status codes
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+
+class Span:
+    """A timed operation within a trace."""
+
+    __slots__ = (
+        "name", "trace_id", "span_id", "parent_id", "kind",
+        "start_ns", "end_ns", "attributes", "events", "error",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent_id: str | None = None,
+        kind: int = SPAN_KIND_INTERNAL,
+        attributes: dict[str, Any] | None = None,
+    ):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns: int | None = None
+        self.attributes = attributes or {}
+        self.events: list[tuple[int, str, dict[str, Any]]] = []
+        self.error: str | None = None
+
+    @property
+    def duration_ms(self) -> float:
+        end_ns = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end_ns - self.start_ns) / 1_000_000
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def add_event(self, name: str, **attributes: Any) -> None:
+        self.events.append((time.time_ns(), name, attributes))
+
+    def record_exception(self, exc: BaseException) -> None:
+        if isinstance(exc, Exception):
+            self.error = f"{type(exc).__name__}: {exc}"
+        else:
+            # Cancellation or generator close: not a failure of the span itself
+            self.attributes["cancelled"] = True
+
+    def end(self) -> None:
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+
+    def to_otlp(self) -> dict[str, Any]:
+        data: dict[str, Any] = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or self.start_ns),
+            "attributes": _otlp_attributes(self.attributes),
+            "status": (
+                {"code": STATUS_ERROR, "message": self.error}
+                if self.error
+                else {"code": STATUS_OK}
+            ),
+        }
+        if self.parent_id:
+            data["parentSpanId"] = self.parent_id
+        if self.events:
+            data["events"] = [
+                {"timeUnixNano": str(ts), "name": name, "attributes": _otlp_attributes(attrs)}
+                for ts, name, attrs in self.events
+            ]
+        return data
+
+
+class Trace:
+    """Spans recorded under one root span, exported together when it ends."""
+
+    def __init__(self, root: Span):
+        self.root = root
+        self.spans: list[Span] = [root]
+
+
+_current_trace: ContextVar[Trace | None] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Span | None] = ContextVar("current_span", default=None)
+
+
+def _reset(var: ContextVar, token) -> None:
+    try:
+        var.reset(token)
+    except ValueError:
+        # Async generator finalised from another context; nothing to restore
+        pass
+
+
+@contextmanager
+def start_trace(
+    name: str, kind: int = SPAN_KIND_INTERNAL, **attributes: Any
+) -> Iterator[Trace | None]:
+    """
+    Record a trace rooted at a new span, exporting it on exit.
+
+    Continues the current trace (as a child span) if there is one, so a chat
+    turn started from an HTTP request shares its trace ID.
+    """
+    parent = _current_span.get()
+    if not settings.trace_enabled or (
+        parent is None and random.random() >= settings.trace_sample_rate
+    ):
+        yield None
+        return
+
+    root = Span(
+        name,
+        parent.trace_id if parent else os.urandom(16).hex(),
+        parent.span_id if parent else None,
+        kind,
+        attributes,
+    )
+    trace = Trace(root)
+    trace_token = _current_trace.set(trace)
+    span_token = _current_span.set(root)
+    try:
+        yield trace
+    except BaseException as e:
+        root.record_exception(e)
+        raise
+    finally:
+        root.end()
+        _reset(_current_span, span_token)
+        _reset(_current_trace, trace_token)
+        _exporter.submit(trace.spans)
+
+
+def start_span(name: str, **attributes: Any) -> Span | None:
+    """
+    Start a span under the current span without making it current.
+
+    For operations that don't nest as a block; call ``end()`` when done.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        return None
+    parent = _current_span.get() or trace.root
+    span = Span(name, parent.trace_id, parent.span_id, attributes=attributes)
+    trace.spans.append(span)
+    return span
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Span | None]:
+    """Record a child span of the current span around a block."""
+    child = start_span(name, **attributes)
+    if child is None:
+        yield None
+        return
+    token = _current_span.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.record_exception(e)
+        raise
+    finally:
+        child.end()
+        _reset(_current_span, token)
+
+
+def current_trace() -> Trace | None:
+    """The trace being recorded in the current context, if any."""
+    return _current_trace.get()
+
+
+def server_timing(trace: Trace) -> str:
+    """
+    Render a trace's finished spans as a ``Server-Timing`` header value.
+
+    Spans with the same name are summed; the root span is reported as ``total``.
+    """
+    totals: dict[str, float] = {}
+    for s in trace.spans[1:]:
+        if s.end_ns is not None:
+            metric = s.name.replace(" ", "_")
+            totals[metric] = totals.get(metric, 0.0) + s.duration_ms
+    parts = [f"{metric};dur={ms:.1f}" for metric, ms in totals.items()]
+    parts.append(f"total;dur={trace.root.duration_ms:.1f}")
+    return ", ".join(parts)
+
+
+def _otlp_value(value: Any) -> dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: dict[str, Any]) -> list[dict[str, Any]]:
+    return [{"key": k, "value": _otlp_value(v)} for k, v in attributes.items() if v is not None]
+
+
+class _TraceExporter:
+    """Background thread that serialises and ships finished traces."""
+
+    def __init__(self, capacity: int = 1000):
+        self._queue: queue.Queue = queue.Queue(maxsize=capacity)
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self.exported = 0
+        self.dropped = 0
+
+    def submit(self, spans: list[Span]) -> None:
+        if not (settings.trace_export_path or settings.trace_export_url):
+            return
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(spans)
+        except queue.Full:
+            self.dropped += 1
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="trace-exporter", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            spans = self._queue.get()
+            if spans is None:
+                return
+            try:
+                self._export(spans)
+                self.exported += 1
+            except Exception as e:
+                logger.warning(f"Trace export failed: {e}")
+
+    def _export(self, spans: list[Span]) -> None:
+        payload = json.dumps(
+            {
+                "resourceSpans": [
+                    {
+                        "resource": {
+                            "attributes": _otlp_attributes(
+                                {
+                                    "service.name": settings.app_name,
+                                    "service.version": settings.app_version,
+                                    "process.pid": os.getpid(),
+                                }
+                            )
+                        },
+                        "scopeSpans": [
+                            {
+                                "scope": {"name": "app.core.tracing"},
+                                "spans": [s.to_otlp() for s in spans],
+                            }
+                        ],
+                    }
+                ]
+            },
+            separators=(",", ":"),
+        )
+        if settings.trace_export_path:
+            with open(settings.trace_export_path, "a") as f:
+                f.write(payload + "\n")
+        if settings.trace_export_url:
+            request = urllib.request.Request(
+                settings.trace_export_url,
+                data=payload.encode(),
+                headers={"Content-Type": "application/json"},
+                method="POST",
+            )
+            with urllib.request.urlopen(request, timeout=2):
+                pass
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """Flush queued traces and stop the thread."""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+
+_exporter = _TraceExporter()
+
+
+def shutdown_tracing() -> None:
+    """Flush pending trace exports."""
+    _exporter.shutdown()
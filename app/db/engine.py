@@ -1,16 +1,17 @@
 """Database engine configuration."""
 
 import asyncio
-import os
+import re
+import time
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy import text
-from alembic import command
-from alembic.config import Config
-from tenacity import retry, stop_after_attempt, wait_fixed
+from tenacity import retry, stop_after_attempt, wait_exponential
 
 from app.core.config import settings
 from app.core.logging import get_logger
+from app.core.metrics import db_pool_checked_out, db_query_duration
+from app.db.query_stats import record_query
 
 logger = get_logger(__name__)
 
@@ -27,6 +28,42 @@ engine = create_async_engine(
     pool_recycle=3600,
 )
 
+# Leading keyword and first table of a statement, e.g. "SELECT messages"
+_STATEMENT_RE = re.compile(
+    r"^\s*(\w+)\b.*?\b(?:FROM|INTO|UPDATE|TABLE)\s+[\"`]?(\w+)",
+    re.IGNORECASE | re.DOTALL,
+)
+
+
+def _statement_label(statement: str) -> str:
+    """Low-cardinality label for a SQL statement."""
+    match = _STATEMENT_RE.match(statement)
+    if match:
+        return f"{match.group(1).upper()} {match.group(2)}"
+    return statement.split(None, 1)[0].upper() if statement.strip() else "UNKNOWN"
+
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(engine.sync_engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    db_query_duration.observe(elapsed, statement=_statement_label(statement))
+    record_query(statement, elapsed * 1000)
+
+
+@event.listens_for(engine.sync_engine, "handle_error")
+def _handle_error(context):
+    # after_cursor_execute doesn't fire for failed statements
+    if context.connection is not None and context.connection.info.get("query_start"):
+        context.connection.info["query_start"].pop()
+
+
+db_pool_checked_out.set_function(lambda: getattr(engine.pool, "checkedout", lambda: 0)())
+
 # Create async session factory
 async_session = sessionmaker(
     engine,
@@ -35,34 +72,51 @@ async_session = sessionmaker(
 )
 
 
-@retry(stop=stop_after_attempt(5), wait=wait_fixed(2))
-async def verify_connection() -> None:
-    """Attempt to connect to the database."""
-    async with engine.begin() as conn:
-        await conn.execute(text("SELECT 1"))
+# Short backoff first: the database is usually up, and slow retries delay
+# every worker's boot when it briefly isn't
+@retry(stop=stop_after_attempt(6), wait=wait_exponential(multiplier=0.1, max=2), reraise=True)
+async def verify_connection() -> set[str]:
+    """Connect to the database and read its schema revision."""
+    # Imported here so `python -m app.db.migrate` doesn't load itself twice
+    from app.db.migrate import current_revisions
+
+    async with engine.connect() as conn:
+        return await current_revisions(conn)
 
 
 async def init_db() -> None:
-    """Initialize database, run migrations, and verify connection."""
+    """
+    Verify the database connection and schema revision.
+
+    Migrations are normally applied once per deploy with
+    ``python -m app.db.migrate``; ``DB_STARTUP_MODE=migrate`` runs them here
+    instead (single-worker and development setups only).
+
+    Raises:
+        RuntimeError: If the database is unreachable or its schema is behind
+    """
+    from app.db.migrate import run_migrations, schema_problem
+
+    mode = settings.db_startup_mode
     try:
-        logger.info("Running database migrations...")
-        
-        alembic_cfg_path = "alembic.ini"
-        if not os.path.exists(alembic_cfg_path):
-             logger.warning(f"alembic.ini not found at {alembic_cfg_path}, migrations might fail")
-
-        # Run Alembic migrations in a separate thread to avoid asyncio loop conflicts
-        alembic_cfg = Config(alembic_cfg_path)
-        await asyncio.to_thread(command.upgrade, alembic_cfg, "head")
-        
-        logger.info("Database migrations applied successfully")
-
-        await verify_connection()
+        if mode == "migrate":
+            logger.info("Running database migrations...")
+            # In a thread to avoid asyncio loop conflicts
+            await asyncio.to_thread(run_migrations)
+            logger.info("Database migrations applied successfully")
+
+        revisions = await verify_connection()
         logger.info("Database connection verified successfully")
     except Exception as e:
         logger.critical(f"DATABASE STARTUP FAIL: {e}")
         raise RuntimeError(f"Database unavailable: {e}")
 
+    if mode != "skip":
+        problem = schema_problem(revisions)
+        if problem:
+            raise RuntimeError(f"Database schema out of date ({problem}); run `python -m app.db.migrate`")
+        logger.info(f"Database schema at revision {', '.join(sorted(revisions))}")
+
 
 async def close_db() -> None:
     """Safe cleanup of database resources."""
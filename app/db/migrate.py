@@ -0,0 +1,128 @@
+"""Schema migrations, run once per deploy rather than on every worker boot.
+
+    python -m app.db.migrate            # upgrade to head
+    python -m app.db.migrate --check    # exit 1 unless the schema is at head
+
+Workers only compare the database's revision with the migration scripts at
+startup (see ``DB_STARTUP_MODE``), which is one query and doesn't import
+Alembic.
+"""
+
+import argparse
+import ast
+import asyncio
+import re
+import sys
+from functools import lru_cache
+from pathlib import Path
+
+from sqlalchemy import inspect, text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.core.logging import get_logger, setup_logging
+
+logger = get_logger(__name__)
+
+ROOT = Path(__file__).resolve().parent.parent.parent
+ALEMBIC_INI = ROOT / "alembic.ini"
+VERSIONS_DIR = ROOT / "alembic" / "versions"
+
+# Module-level ``revision = ...`` / ``down_revision = ...`` in a migration script
+_REVISION_RE = re.compile(r"^(revision|down_revision)\b[^=\n]*=\s*(.+?)\s*$", re.MULTILINE)
+
+
+@lru_cache
+def script_revisions() -> tuple[frozenset[str], frozenset[str]]:
+    """
+    Revisions known to the migration scripts, read without importing Alembic.
+
+    Returns:
+        All known revisions, and the head revision(s)
+    """
+    revisions: set[str] = set()
+    parents: set[str] = set()
+    for path in VERSIONS_DIR.glob("*.py"):
+        fields = dict(_REVISION_RE.findall(path.read_text()))
+        if "revision" not in fields:
+            continue
+        revisions.add(ast.literal_eval(fields["revision"]))
+        down = ast.literal_eval(fields.get("down_revision", "None"))
+        if isinstance(down, str):
+            parents.add(down)
+        elif down:
+            parents.update(down)
+    return frozenset(revisions), frozenset(revisions - parents)
+
+
+async def current_revisions(conn: AsyncConnection) -> set[str]:
+    """Revision(s) the database is stamped with; empty if never migrated."""
+    has_table = await conn.run_sync(lambda sync_conn: inspect(sync_conn).has_table("alembic_version"))
+    if not has_table:
+        return set()
+    result = await conn.execute(text("SELECT version_num FROM alembic_version"))
+    return set(result.scalars())
+
+
+def schema_problem(current: set[str]) -> str | None:
+    """
+    Compare the database revision with the scripts.
+
+    A database *ahead* of the scripts (a revision they don't know) is
+    accepted: that's an older worker starting during a rolling deploy, after
+    the new release has migrated.
+
+    Returns:
+        Why the schema is unusable, or None if it's at head (or ahead)
+    """
+    known, heads = script_revisions()
+    if not current:
+        return "database has not been migrated"
+    if current <= heads or not current <= known:
+        return None
+    return f"database is at revision {', '.join(sorted(current))}, expected {', '.join(sorted(heads))}"
+
+
+def run_migrations(revision: str = "head") -> None:
+    """Upgrade the schema (blocking; Alembic is imported only here)."""
+    from alembic import command
+    from alembic.config import Config
+
+    alembic_cfg = Config(str(ALEMBIC_INI))
+    alembic_cfg.set_main_option("script_location", str(ROOT / "alembic"))
+    # Keep the app's log handlers instead of alembic.ini's
+    alembic_cfg.attributes["configure_logger"] = False
+    command.upgrade(alembic_cfg, revision)
+
+
+async def _check() -> str | None:
+    from app.db.engine import engine
+
+    try:
+        async with engine.connect() as conn:
+            return schema_problem(await current_revisions(conn))
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Apply or check database migrations")
+    parser.add_argument("--check", action="store_true", help="Only check that the schema is at head")
+    parser.add_argument("--revision", default="head", help="Target revision")
+    args = parser.parse_args()
+
+    setup_logging()
+    if args.check:
+        problem = asyncio.run(_check())
+        if problem:
+            logger.error(f"Schema check failed: {problem}")
+            sys.exit(1)
+        logger.info("Database schema is up to date")
+        return
+
+    logger.info(f"Running database migrations to {args.revision}...")
+    run_migrations(args.revision)
+    logger.info("Database migrations applied successfully")
+
+
+if __name__ == "__main__":
+    main()
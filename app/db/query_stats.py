@@ -0,0 +1,118 @@
+"""SQL statement statistics fed by engine events"""
+
+import re
+import threading
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from app.core.config import settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Cap on distinct normalized statements tracked; the rest are pooled
+MAX_TRACKED_STATEMENTS = 500
+OTHER_STATEMENTS = "<other>"
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_sql(statement: str) -> str:
+    """
+    Reduce a statement to its shape for grouping and logging.
+
+    Literals become ``?``, IN-lists collapse to ``(?...)`` and whitespace is
+    squeezed, so no parameter values end up in logs.
+    """
+    normalized = _STRING_RE.sub("?", statement)
+    normalized = _NUMBER_RE.sub("?", normalized)
+    normalized = _IN_LIST_RE.sub("(?...)", normalized)
+    return _WHITESPACE_RE.sub(" ", normalized).strip()
+
+
+@dataclass
+class RequestQueryStats:
+    """Statement count and DB time for one request."""
+
+    count: int = 0
+    total_ms: float = 0.0
+
+
+@dataclass
+class StatementStats:
+    """Aggregate timings for one normalized statement."""
+
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    slow_count: int = 0
+
+
+@dataclass
+class QueryStatsRegistry:
+    """Process-wide aggregates per normalized statement."""
+
+    statements: dict[str, StatementStats] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+    # Raw statement text -> normalized form (SQLAlchemy reuses statement strings)
+    _normalized: dict[str, str] = field(default_factory=dict)
+
+    def normalize(self, statement: str) -> str:
+        normalized = self._normalized.get(statement)
+        if normalized is None:
+            normalized = normalize_sql(statement)
+            if len(self._normalized) < MAX_TRACKED_STATEMENTS * 4:
+                self._normalized[statement] = normalized
+        return normalized
+
+    def record(self, normalized: str, elapsed_ms: float, slow: bool) -> None:
+        with self._lock:
+            stats = self.statements.get(normalized)
+            if stats is None:
+                if len(self.statements) >= MAX_TRACKED_STATEMENTS:
+                    normalized = OTHER_STATEMENTS
+                stats = self.statements.setdefault(normalized, StatementStats())
+            stats.count += 1
+            stats.total_ms += elapsed_ms
+            stats.max_ms = max(stats.max_ms, elapsed_ms)
+            if slow:
+                stats.slow_count += 1
+
+    def top(self, limit: int = 20) -> list[tuple[str, StatementStats]]:
+        """Statements with the highest total time."""
+        with self._lock:
+            items = list(self.statements.items())
+        items.sort(key=lambda item: item[1].total_ms, reverse=True)
+        return items[:limit]
+
+    def reset(self) -> None:
+        with self._lock:
+            self.statements.clear()
+
+
+query_stats = QueryStatsRegistry()
+
+# Stats of the request being served, set by the request middleware
+request_query_stats_var: ContextVar[RequestQueryStats | None] = ContextVar(
+    "request_query_stats", default=None
+)
+
+
+def record_query(statement: str, elapsed_ms: float) -> None:
+    """Account a finished statement to the current request and the aggregates."""
+    request_stats = request_query_stats_var.get()
+    if request_stats is not None:
+        request_stats.count += 1
+        request_stats.total_ms += elapsed_ms
+
+    normalized = query_stats.normalize(statement)
+    slow = settings.db_slow_query_ms > 0 and elapsed_ms >= settings.db_slow_query_ms
+    query_stats.record(normalized, elapsed_ms, slow)
+    if slow:
+        logger.warning(
+            f"Slow query ({elapsed_ms:.0f}ms): {normalized}",
+            extra={"duration_ms": elapsed_ms, "statement": normalized},
+        )
@@ -1,6 +1,39 @@
-"""LLM integration package"""
+"""LLM integration package
+
+The Groq SDK is slow to import, so ``groq_client`` is loaded on first use
+(or by ``warm_up_groq_client`` during startup) rather than with the package.
+"""
+
+import sys
+from typing import TYPE_CHECKING
 
-from app.llm.groq_client import GroqClient
 from app.llm.prompts import get_system_prompt
 
-__all__ = ["GroqClient", "get_system_prompt"]
+if TYPE_CHECKING:
+    from app.llm.groq_client import GroqClient
+
+__all__ = ["GroqClient", "close_groq_client", "get_system_prompt", "warm_up_groq_client"]
+
+
+def warm_up_groq_client() -> None:
+    """Import the Groq SDK and create the client (blocking; run it in a thread)."""
+    from app.llm.groq_client import get_groq_client
+
+    get_groq_client()
+
+
+async def close_groq_client() -> None:
+    """Close the Groq client, without importing the SDK if it was never used."""
+    # The warmup thread may still be importing it (a very short-lived
+    # worker): then no client exists yet
+    close = getattr(sys.modules.get("app.llm.groq_client"), "close_groq_client", None)
+    if close is not None:
+        await close()
+
+
+def __getattr__(name: str):
+    if name == "GroqClient":
+        from app.llm.groq_client import GroqClient
+
+        return GroqClient
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -15,6 +15,15 @@ from tenacity import (
 from app.core.config import settings
 from app.core.exceptions import GroqAPIException
 from app.core.logging import get_logger
+from app.core.tracing import span
+from app.core.metrics import (
+    llm_stream_duration,
+    llm_streams,
+    llm_time_to_first_token,
+    llm_tokens,
+    llm_tokens_per_second,
+    llm_tokens_saved,
+)
 
 logger = get_logger(__name__)
 
@@ -23,11 +32,45 @@ class GroqClient:
     """Async Groq API client with streaming support and automated retries."""
 
     def __init__(self):
-        self.client = AsyncGroq(api_key=settings.groq_api_key)
+        self.client = AsyncGroq(api_key=settings.groq_api_key, base_url=settings.groq_base_url)
         self.model = settings.groq_model
         self.max_tokens = settings.groq_max_tokens
         self.temperature = settings.groq_temperature
 
+        # Early-cancellation accounting
+        self.completed_streams = 0
+        self.completed_tokens = 0
+        self.cancelled_streams = 0
+        self.tokens_saved_estimate = 0
+
+    def _estimate_tokens_saved(self, streamed_tokens: int) -> int:
+        """
+        Estimate completion tokens avoided by cancelling a stream early.
+
+        Uses the average length of completed streams (capped at max_tokens),
+        or max_tokens if nothing has completed yet.
+        """
+        if self.completed_streams:
+            expected = min(self.completed_tokens / self.completed_streams, self.max_tokens)
+        else:
+            expected = self.max_tokens
+        return max(int(expected) - streamed_tokens, 0)
+
+    @staticmethod
+    def _record_stream(
+        outcome: str,
+        start_time: float,
+        end_time: float,
+        first_token_time: float | None,
+        total_tokens: int,
+    ) -> None:
+        """Record stream duration, token count and generation rate metrics."""
+        llm_streams.inc(outcome=outcome)
+        llm_tokens.inc(total_tokens)
+        llm_stream_duration.observe(end_time - start_time, outcome=outcome)
+        if first_token_time is not None and total_tokens > 1 and end_time > first_token_time:
+            llm_tokens_per_second.observe((total_tokens - 1) / (end_time - first_token_time))
+
     @retry(
         retry=retry_if_exception_type((RateLimitError, APIConnectionError, APIStatusError)),
         wait=wait_exponential(multiplier=1, min=2, max=10),
@@ -35,24 +78,35 @@ class GroqClient:
         before_sleep=before_sleep_log(logger, "INFO"),
         reraise=True,
     )
-    async def _create_chat_completion(self, messages: list[dict[str, str]], stream: bool = True):
+    async def _create_chat_completion(
+        self,
+        messages: list[dict[str, str]],
+        stream: bool = True,
+        model: str | None = None,
+        max_tokens: int | None = None,
+    ):
         """Internal helper to create chat completion with retries."""
         return await self.client.chat.completions.create(
-            model=self.model,
+            model=model or self.model,
             messages=messages,
-            max_tokens=self.max_tokens,
+            max_tokens=max_tokens or self.max_tokens,
             temperature=self.temperature,
             stream=stream,
         )
 
     async def stream_chat(
-        self, messages: list[dict[str, str]]
+        self,
+        messages: list[dict[str, str]],
+        model: str | None = None,
+        max_tokens: int | None = None,
     ) -> AsyncGenerator[str, None]:
         """
         Stream chat completion tokens from Groq API with resilience.
 
         Args:
             messages: List of message dicts with 'role' and 'content'
+            model: Model to use instead of the configured one
+            max_tokens: Completion limit to use instead of the configured one
 
         Yields:
             Token strings as they arrive
@@ -63,10 +117,15 @@ class GroqClient:
         start_time = time.perf_counter()
         first_token_time: float | None = None
         total_tokens = 0
+        stream = None
+        model = model or self.model
 
         try:
             # The retry decorator handles RateLimit and Connection errors
-            stream = await self._create_chat_completion(messages, stream=True)
+            with span("llm.connect", **{"llm.model": model}):
+                stream = await self._create_chat_completion(
+                    messages, stream=True, model=model, max_tokens=max_tokens
+                )
 
             async for chunk in stream:
                 if chunk.choices and chunk.choices[0].delta.content:
@@ -76,6 +135,7 @@ class GroqClient:
                     if first_token_time is None:
                         first_token_time = time.perf_counter()
                         latency = (first_token_time - start_time) * 1000
+                        llm_time_to_first_token.observe(latency / 1000)
                         logger.info(
                             f"First token latency: {latency:.0f}ms",
                             extra={"first_token_latency_ms": latency},
@@ -85,7 +145,11 @@ class GroqClient:
                     yield token
 
             # Log completion stats
-            total_time = (time.perf_counter() - start_time) * 1000
+            end_time = time.perf_counter()
+            total_time = (end_time - start_time) * 1000
+            self.completed_streams += 1
+            self.completed_tokens += total_tokens
+            self._record_stream("completed", start_time, end_time, first_token_time, total_tokens)
             logger.info(
                 f"Stream complete: {total_tokens} tokens in {total_time:.0f}ms",
                 extra={
@@ -94,18 +158,58 @@ class GroqClient:
                 },
             )
 
+        except (asyncio.CancelledError, GeneratorExit):
+            # Consumer went away; closing the response below aborts generation
+            saved = self._estimate_tokens_saved(total_tokens)
+            self.cancelled_streams += 1
+            self._record_stream(
+                "cancelled", start_time, time.perf_counter(), first_token_time, total_tokens
+            )
+            self.tokens_saved_estimate += saved
+            llm_tokens_saved.inc(saved)
+            logger.info(
+                f"Stream cancelled after {total_tokens} tokens, ~{saved} tokens saved",
+                extra={
+                    "total_tokens": total_tokens,
+                    "tokens_saved_estimate": saved,
+                    "tokens_saved_total": self.tokens_saved_estimate,
+                },
+            )
+            raise
         except (RateLimitError, APIStatusError, APIConnectionError) as e:
+            self._record_stream(
+                "error", start_time, time.perf_counter(), first_token_time, total_tokens
+            )
             logger.error(f"Groq API persistent error: {e}", exc_info=True)
             raise GroqAPIException(
                 message=f"Groq service is currently unavailable or overloaded: {str(e)}",
-                details={"model": self.model, "error_type": type(e).__name__},
+                details={"model": model, "error_type": type(e).__name__},
             )
         except Exception as e:
+            self._record_stream(
+                "error", start_time, time.perf_counter(), first_token_time, total_tokens
+            )
             logger.error(f"Unexpected Groq client error: {e}", exc_info=True)
             raise GroqAPIException(
                 message=f"An unexpected error occurred while communicating with Groq: {str(e)}",
-                details={"model": self.model},
+                details={"model": model},
             )
+        finally:
+            # Release the upstream connection promptly (a no-op once fully read)
+            if stream is not None:
+                await stream.close()
+
+    async def ping(self) -> None:
+        """
+        Check that the API is reachable and serves the configured model.
+
+        Fetches the model's metadata (no tokens used), without retries.
+        """
+        await self.client.with_options(max_retries=0).models.retrieve(self.model)
+
+    async def close(self) -> None:
+        """Close the underlying HTTP connection pool."""
+        await self.client.close()
 
     async def get_completion(self, messages: list[dict[str, str]]) -> str:
         """
@@ -141,5 +245,13 @@ def get_groq_client() -> GroqClient:
     return _groq_client
 
 
+async def close_groq_client() -> None:
+    """Close the Groq client if one was created."""
+    global _groq_client
+    if _groq_client is not None:
+        client, _groq_client = _groq_client, None
+        await client.close()
+
+
 # For backwards compatibility
 groq_client = get_groq_client
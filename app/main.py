@@ -1,32 +1,68 @@
 """CheziousBot - FastAPI Application Entry Point"""
 
+import asyncio
+import contextlib
 import logging
 import sys
+import time
 from contextlib import asynccontextmanager
 
 # 1. Initialize Logging FIRST (before any other app imports)
 # This ensures that even import errors in other modules are logged properly if possible.
 from app.core.config import settings
-from app.core.logging import setup_logging, get_logger
+from app.core.logging import setup_logging, shutdown_logging, get_logger
 
 setup_logging()
 logger = get_logger(__name__)
 
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from slowapi import _rate_limit_exceeded_handler
-from slowapi.errors import RateLimitExceeded
+from sse_starlette.sse import AppStatus
 
 from app import __version__
 from app.core.exceptions import ChatBotException
 from app.core.rate_limiter import limiter
+from app.core.serialization import FastJSONResponse
+from app.core.health import health_monitor
+from app.core.metrics import run_snapshot_writer
+from app.core.shutdown import on_shutdown_signal
+from app.core.tracing import shutdown_tracing
 from app.db.engine import init_db, close_db
+from app.llm import close_groq_client, warm_up_groq_client
+from app.services.cleanup_service import run_idempotency_key_cleanup
+from app.services.stream_service import turn_registry
+
+# By default sse-starlette ends every stream the moment shutdown starts; the
+# lifespan drains chat turns first and then lets the streams end
+AppStatus.disable_automatic_graceful_drain()
+
+
+async def _warm_up_groq() -> None:
+    start = time.perf_counter()
+    try:
+        await asyncio.to_thread(warm_up_groq_client)
+        logger.info(f"Groq client ready in {(time.perf_counter() - start) * 1000:.0f}ms")
+    except Exception as e:
+        # The first chat request retries (and reports) the failure
+        logger.warning(f"Groq client warmup failed: {e}")
+
+
+async def _drain_streams() -> None:
+    try:
+        await turn_registry.drain(settings.shutdown_drain_timeout_seconds)
+    finally:
+        # Ends the SSE responses whose turns are done (or were cancelled)
+        AppStatus.should_exit = True
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan events."""
     logger.info(f"Starting {settings.app_name} v{settings.app_version}")
+    # A previous lifespan in this process (tests, embedded servers) may have
+    # drained; accept turns and keep streams open again
+    turn_registry.draining = False
+    AppStatus.should_exit = False
     try:
         await init_db()
         logger.info("Database initialized successfully")
@@ -35,11 +71,58 @@ async def lifespan(app: FastAPI):
         # We don't raise here if we want the app to stay alive (e.g. to serve a health check)
         # but for a chatbot, DB is critical.
     
+    metrics_writer = None
+    if settings.metrics_enabled and settings.metrics_multiproc_dir:
+        metrics_writer = asyncio.create_task(run_snapshot_writer())
+
+    monitor = asyncio.create_task(health_monitor.run())
+
+    key_cleanup = None
+    if settings.idempotency_purge_interval_seconds > 0:
+        key_cleanup = asyncio.create_task(run_idempotency_key_cleanup())
+
+    # Off the critical path: the worker can serve (health checks, history)
+    # while the Groq SDK loads
+    groq_warmup = None
+    if settings.groq_warmup_on_startup:
+        groq_warmup = asyncio.create_task(_warm_up_groq())
+
+    # The server waits for open streams before running the shutdown below,
+    # so the drain has to start as soon as the stop signal arrives
+    drain: asyncio.Task | None = None
+
+    def start_drain() -> None:
+        nonlocal drain
+        if drain is None:
+            drain = asyncio.create_task(_drain_streams())
+
+    restore_signals = on_shutdown_signal(asyncio.get_running_loop(), start_drain)
+
     yield
 
     # Shutdown
+    restore_signals()
+    start_drain()
+    await drain
+    if groq_warmup is not None and not groq_warmup.done():
+        groq_warmup.cancel()
+    monitor.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await monitor
+    if key_cleanup is not None:
+        key_cleanup.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await key_cleanup
+    if metrics_writer is not None:
+        metrics_writer.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await metrics_writer
+    await close_groq_client()
+    await limiter.close()
     await close_db()
+    shutdown_tracing()
     logger.info("Application shutdown complete")
+    shutdown_logging()
 
 
 # Create FastAPI app
@@ -50,11 +133,8 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
-# Add rate limiter
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
-
 # 2. Add Safety Middleware
+from app.core.compression import CompressionMiddleware
 from app.core.middleware import RequestLoggingMiddleware, ResilienceMiddleware
 
 app.add_middleware(CORSMiddleware,
@@ -63,14 +143,24 @@ app.add_middleware(CORSMiddleware,
     allow_methods=["*"],
     allow_headers=["*"],
 )
+if settings.compression_enabled:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.compression_min_bytes,
+        gzip_level=settings.compression_gzip_level,
+        brotli_quality=settings.compression_brotli_quality,
+        compress_sse=settings.compression_sse_enabled,
+    )
 app.add_middleware(ResilienceMiddleware)
 app.add_middleware(RequestLoggingMiddleware)
 
 # 3. SAFE ROUTER LOADING
 # We wrap this to ensure that if a module has an import error, the server can still boot.
 try:
-    from app.api import v1_router
+    from app.api import v1_router, metrics_router
     app.include_router(v1_router)
+    if settings.metrics_enabled:
+        app.include_router(metrics_router)
     logger.info("API routers loaded successfully")
 except ImportError as e:
     logger.critical(f"CRITICAL IMPORT ERROR IN API LAYER: {e}", exc_info=True)
@@ -80,11 +170,13 @@ except Exception as e:
 
 # Exception handlers
 @app.exception_handler(ChatBotException)
-async def chatbot_exception_handler(request: Request, exc: ChatBotException) -> JSONResponse:
+async def chatbot_exception_handler(request: Request, exc: ChatBotException) -> FastJSONResponse:
     status_map = {
         "SESSION_NOT_FOUND": 404,
+        "SESSION_ACCESS_DENIED": 403,
         "USER_NOT_FOUND": 404,
         "USER_ALREADY_EXISTS": 409,
+        "IDEMPOTENCY_CONFLICT": 409,
         "VALIDATION_ERROR": 400,
         "RATE_LIMIT_EXCEEDED": 429,
         "DATABASE_ERROR": 503,
@@ -94,21 +186,26 @@ async def chatbot_exception_handler(request: Request, exc: ChatBotException) ->
     }
     status_code = status_map.get(exc.code, 400)
     logger.warning(f"ChatBotException: {exc.code} - {exc.message}")
-    return JSONResponse(status_code=status_code, content=exc.to_dict())
+    headers = None
+    if "retry_after" in exc.details:
+        headers = {"Retry-After": str(exc.details["retry_after"])}
+    return FastJSONResponse(status_code=status_code, content=exc.to_dict(), headers=headers)
 
 
 @app.exception_handler(HTTPException)
-async def http_exception_handler(request: Request, exc: HTTPException) -> JSONResponse:
-    return JSONResponse(
+async def http_exception_handler(request: Request, exc: HTTPException) -> FastJSONResponse:
+    return FastJSONResponse(
         status_code=exc.status_code,
-        content={"error": {"code": "HTTP_ERROR", "message": exc.detail}}
+        content={"error": {"code": "HTTP_ERROR", "message": exc.detail}},
+        # e.g. WWW-Authenticate on 401s
+        headers=exc.headers,
     )
 
 
 @app.exception_handler(Exception)
-async def general_exception_handler(request: Request, exc: Exception) -> JSONResponse:
+async def general_exception_handler(request: Request, exc: Exception) -> FastJSONResponse:
     logger.error(f"Unexpected error: {exc}", exc_info=True)
-    return JSONResponse(
+    return FastJSONResponse(
         status_code=500,
         content={"error": {"code": "INTERNAL_ERROR", "message": "An unexpected error occurred"}}
     )
@@ -3,5 +3,6 @@
 from app.models.user import User
 from app.models.session import ChatSession
 from app.models.message import Message
+from app.models.idempotency import IdempotencyKey
 
-__all__ = ["User", "ChatSession", "Message"]
+__all__ = ["User", "ChatSession", "Message", "IdempotencyKey"]
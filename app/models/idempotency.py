@@ -0,0 +1,69 @@
+"""Idempotency key model"""
+
+from datetime import datetime, timezone
+from uuid import UUID
+from enum import Enum
+from sqlmodel import SQLModel, Field
+
+from app.utils.time import utc_now
+
+# Use Enum for database compatibility and strict validation
+class IdempotencyStatus(str, Enum):
+    IN_FLIGHT = "in_flight"
+    COMPLETED = "completed"
+
+
+class IdempotencyKey(SQLModel, table=True):
+    """
+    Records the outcome of a chat request sent with an idempotency key.
+
+    A retry with the same (session_id, key) attaches to the in-flight turn
+    or replays the stored answer instead of calling the LLM again.
+    """
+
+    __tablename__ = "chat_idempotency_keys"
+
+    session_id: UUID = Field(
+        primary_key=True,
+        description="The session the keyed request was sent to"
+    )
+    
+    key: str = Field(
+        primary_key=True,
+        max_length=64,
+        description="Client-supplied idempotency key"
+    )
+    
+    turn_id: str = Field(
+        max_length=32,
+        description="ID of the chat turn that serves this request"
+    )
+    
+    status: IdempotencyStatus = Field(
+        default=IdempotencyStatus.IN_FLIGHT,
+        description="Whether the answer is still streaming or complete"
+    )
+    
+    response: str | None = Field(
+        default=None,
+        description="The full assistant answer once completed"
+    )
+    
+    created_at: datetime = Field(
+        default_factory=utc_now,
+        description="Timestamp when the key was first seen"
+    )
+    
+    expires_at: datetime = Field(
+        index=True,
+        description="Timestamp after which the key may be reused"
+    )
+
+    @property
+    def is_expired(self) -> bool:
+        """Returns True if the record's TTL has passed."""
+        expires_at = self.expires_at
+        if expires_at.tzinfo is None:
+            # SQLite hands back naive datetimes (stored as UTC)
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        return utc_now() > expires_at
@@ -47,6 +47,11 @@ class Message(SQLModel, table=True):
         description="The actual text content of the message"
     )
     
+    truncated: bool = Field(
+        default=False,
+        description="True if the response was cut off before the LLM finished"
+    )
+    
     created_at: datetime = Field(
         default_factory=utc_now,
         index=True,
@@ -62,9 +67,16 @@ class Message(SQLModel, table=True):
         return cls(session_id=session_id, role=MessageRole.USER, content=content)
 
     @classmethod
-    def create_assistant_message(cls, session_id: UUID, content: str) -> "Message":
+    def create_assistant_message(
+        cls, session_id: UUID, content: str, truncated: bool = False
+    ) -> "Message":
         """Factory method to create an assistant message."""
-        return cls(session_id=session_id, role=MessageRole.ASSISTANT, content=content)
+        return cls(
+            session_id=session_id,
+            role=MessageRole.ASSISTANT,
+            content=content,
+            truncated=truncated,
+        )
 
     @classmethod
     def create_system_message(cls, session_id: UUID, content: str) -> "Message":
@@ -0,0 +1,38 @@
+"""Schemas for admin diagnostics endpoints"""
+
+from pydantic import BaseModel
+
+
+class QueryStatsEntry(BaseModel):
+    """Aggregate timings for one normalized SQL statement."""
+
+    statement: str
+    count: int
+    total_ms: float
+    avg_ms: float
+    max_ms: float
+    slow_count: int
+
+
+class QueryStatsResponse(BaseModel):
+    """Top statements by total execution time."""
+
+    slow_query_threshold_ms: int
+    statements: list[QueryStatsEntry]
+
+
+class TaskInfo(BaseModel):
+    """State of one asyncio task."""
+
+    name: str
+    coro: str
+    state: str
+    current: bool
+    stack: list[str]
+
+
+class TaskDumpResponse(BaseModel):
+    """All asyncio tasks of a worker."""
+
+    count: int
+    tasks: list[TaskInfo]
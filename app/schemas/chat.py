@@ -1,6 +1,7 @@
 """Chat-related schemas"""
 
 from datetime import datetime
+from typing import Literal
 from uuid import UUID
 from pydantic import BaseModel, Field
 
@@ -17,6 +18,14 @@ class ChatRequest(BaseModel):
         min_length=1,
         max_length=settings.max_message_length,
     )
+    idempotency_key: str | None = Field(None, min_length=1, max_length=64)
+
+
+class ChatSocketRequest(ChatRequest):
+    """A chat turn sent over the WebSocket transport."""
+
+    type: Literal["chat"] = "chat"
+    id: str = Field(..., min_length=1, max_length=64)
 
 
 class ChatMessage(BaseModel):
@@ -26,6 +35,7 @@ class ChatMessage(BaseModel):
     role: str
     content: str
     created_at: datetime
+    truncated: bool = False
 
 
 class MessagesResponse(BaseModel):
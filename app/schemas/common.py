@@ -26,6 +26,19 @@ class HealthResponse(BaseModel):
     version: str | None = None
 
 
+class DependencyCheck(BaseModel):
+    """Latest background check of one dependency."""
+
+    status: str
+    checked_at: datetime | None = None
+    age_seconds: float | None = None
+    error: str | None = None
+    consecutive_failures: int = 0
+    latency_ms: float | None = None
+    latency_p50_ms: float | None = None
+    latency_max_ms: float | None = None
+
+
 class ReadyResponse(BaseModel):
     """Readiness check response schema."""
 
@@ -33,3 +46,4 @@ class ReadyResponse(BaseModel):
     timestamp: datetime
     database: str
     groq: str
+    checks: dict[str, DependencyCheck] = {}
@@ -0,0 +1,279 @@
+"""Pre-fork multi-process server.
+
+    python -m app.serve --workers 4 --port 8000
+
+The supervisor imports the app once (settings, models, routers, compiled
+regexes, prompt text, the OpenAPI schema and the Groq SDK) and then forks the
+workers, which share those pages copy-on-write; ``gc.freeze()`` keeps the
+collector from writing to them. Workers accept connections from a socket the
+supervisor binds, so a replacement worker can start accepting before the
+one it replaces stops.
+
+Signals to the supervisor:
+
+- SIGTERM / SIGINT: graceful stop; workers stop accepting and finish
+  in-flight requests, SSE streams included, for up to the graceful timeout
+- SIGHUP: rolling restart, one worker at a time (fresh processes, e.g. to
+  release memory; code isn't reloaded, since it was imported before forking)
+- SIGTTIN / SIGTTOU: one worker more / fewer
+
+Workers are also recycled after ``SERVE_MAX_REQUESTS`` requests (plus
+jitter) to bound memory growth.
+"""
+
+import argparse
+import contextlib
+import gc
+import importlib
+import os
+import random
+import signal
+import socket
+import sys
+import tempfile
+import time
+
+from app.core.config import settings
+from app.core.logging import get_logger, setup_logging, shutdown_logging
+from app.core.metrics import archive_worker_snapshot
+
+logger = get_logger(__name__)
+
+# A worker that exits sooner than this after starting counts as a crash
+MIN_WORKER_UPTIME = 5.0
+MAX_RESPAWN_DELAY = 10.0
+
+# Supervisor poll interval
+TICK = 0.2
+# Pause between replacements during a rolling restart
+RESTART_INTERVAL = 1.0
+
+
+def bind_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    """Bind the listening socket shared by all workers."""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def preload() -> object:
+    """Import and warm everything workers can share read-only."""
+    from app.main import app
+
+    # Route tables and response models are built at import; the OpenAPI
+    # schema is built lazily on first request, so build it once here
+    app.openapi()
+    # The SDK import is the expensive part; clients are created per worker
+    # because they hold connection pools
+    importlib.import_module("app.llm.groq_client")
+    return app
+
+
+def run_worker(app: object, sock: socket.socket, args: argparse.Namespace) -> None:
+    """Serve ``app`` on ``sock`` in a forked worker until told to stop."""
+    import uvicorn
+
+    from app.db.engine import engine
+
+    # The supervisor's signal handlers and logging setup don't apply here
+    # (uvicorn installs its own SIGTERM/SIGINT handlers once serving)
+    for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGTTIN, signal.SIGTTOU):
+        signal.signal(sig, signal.SIG_DFL)
+    setup_logging()
+    # Never share pooled connections with the parent (there shouldn't be any)
+    engine.sync_engine.dispose(close=False)
+
+    # Jitter per worker so that workers started together aren't all recycled
+    # at once (random is reseeded in each forked child)
+    max_requests = None
+    if args.max_requests:
+        max_requests = args.max_requests + random.randint(0, max(args.max_requests_jitter, 0))
+
+    config = uvicorn.Config(
+        app,
+        lifespan="on",
+        log_config=None,
+        access_log=False,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        limit_max_requests=max_requests,
+        timeout_keep_alive=args.keep_alive,
+    )
+    server = uvicorn.Server(config)
+    server.run(sockets=[sock])
+
+
+class Supervisor:
+    """Forks workers, replaces the ones that exit, and relays signals."""
+
+    def __init__(self, app: object, sock: socket.socket, args: argparse.Namespace):
+        self.app = app
+        self.sock = sock
+        self.args = args
+        self.target = args.workers
+        # pid -> start time
+        self.workers: dict[int, float] = {}
+        # pid -> time after which it is killed
+        self.retiring: dict[int, float] = {}
+        self.pending_restarts: list[int] = []
+        self.signals: list[int] = []
+        self.stopping = False
+        self.respawn_delay = 0.0
+        self.next_spawn_at = 0.0
+        self.next_restart_at = 0.0
+
+    def spawn(self) -> None:
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                run_worker(self.app, self.sock, self.args)
+            except BaseException:
+                logger.exception("Worker crashed")
+                code = 1
+            finally:
+                shutdown_logging()
+                os._exit(code)
+        self.workers[pid] = time.monotonic()
+        logger.info(f"Started worker {pid}")
+
+    def retire(self, pid: int) -> None:
+        """Ask a worker to finish its in-flight requests and exit."""
+        self.workers.pop(pid, None)
+        # Graceful timeout plus time for the lifespan shutdown
+        self.retiring[pid] = time.monotonic() + self.args.graceful_timeout + 10
+        with contextlib.suppress(ProcessLookupError):
+            os.kill(pid, signal.SIGTERM)
+
+    def reap(self) -> None:
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            code = os.waitstatus_to_exitcode(status)
+            self.archive_metrics(pid)
+            if pid in self.retiring:
+                self.retiring.pop(pid)
+                logger.info(f"Worker {pid} stopped")
+            elif pid in self.workers:
+                uptime = time.monotonic() - self.workers.pop(pid)
+                if code == 0:
+                    # Recycled itself after max requests
+                    logger.info(f"Worker {pid} exited after {uptime:.0f}s; replacing it")
+                    self.respawn_delay = 0.0
+                else:
+                    logger.error(f"Worker {pid} exited with code {code} after {uptime:.1f}s")
+                    if uptime < MIN_WORKER_UPTIME:
+                        # Crash loop (bad config, DB down): back off instead of spinning
+                        self.respawn_delay = min(max(self.respawn_delay * 2, 0.5), MAX_RESPAWN_DELAY)
+                        self.next_spawn_at = time.monotonic() + self.respawn_delay
+
+    @staticmethod
+    def archive_metrics(pid: int) -> None:
+        """Keep an exited worker's counters in /metrics without its snapshot file."""
+        if not (settings.metrics_enabled and settings.metrics_multiproc_dir):
+            return
+        try:
+            archive_worker_snapshot(pid)
+        except OSError as e:
+            logger.warning(f"Could not archive metrics of worker {pid}: {e}")
+
+    def handle_signal(self, signum: int, frame) -> None:
+        self.signals.append(signum)
+
+    def process_signals(self) -> None:
+        while self.signals:
+            signum = self.signals.pop(0)
+            if signum in (signal.SIGTERM, signal.SIGINT):
+                if not self.stopping:
+                    logger.info("Stopping workers gracefully")
+                    self.stopping = True
+                    for pid in list(self.workers):
+                        self.retire(pid)
+            elif signum == signal.SIGHUP:
+                logger.info("Rolling restart of all workers")
+                self.pending_restarts = list(self.workers)
+            elif signum == signal.SIGTTIN:
+                self.target += 1
+            elif signum == signal.SIGTTOU and self.target > 1:
+                self.target -= 1
+                self.retire(max(self.workers, key=self.workers.get))
+
+    def run(self) -> None:
+        for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGTTIN, signal.SIGTTOU):
+            signal.signal(signum, self.handle_signal)
+
+        while not (self.stopping and not self.workers and not self.retiring):
+            self.reap()
+            self.process_signals()
+            now = time.monotonic()
+
+            if not self.stopping:
+                while len(self.workers) < self.target and now >= self.next_spawn_at:
+                    self.spawn()
+                if self.pending_restarts and now >= self.next_restart_at:
+                    # Replacement first: it accepts while the old worker drains
+                    old = self.pending_restarts.pop(0)
+                    if old in self.workers:
+                        self.spawn()
+                        self.retire(old)
+                        self.next_restart_at = now + RESTART_INTERVAL
+
+            for pid, deadline in list(self.retiring.items()):
+                if now >= deadline:
+                    logger.warning(f"Worker {pid} didn't stop in time; killing it")
+                    with contextlib.suppress(ProcessLookupError):
+                        os.kill(pid, signal.SIGKILL)
+                    self.retiring[pid] = float("inf")
+            time.sleep(TICK)
+
+        logger.info("All workers stopped")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Pre-fork multi-process server")
+    parser.add_argument("--host", default=settings.serve_host)
+    parser.add_argument("--port", type=int, default=settings.serve_port)
+    parser.add_argument(
+        "--workers", type=int, default=settings.serve_workers or os.cpu_count() or 1,
+        help="Worker processes (default: SERVE_WORKERS, or one per CPU)",
+    )
+    parser.add_argument("--max-requests", type=int, default=settings.serve_max_requests)
+    parser.add_argument("--max-requests-jitter", type=int, default=settings.serve_max_requests_jitter)
+    parser.add_argument("--graceful-timeout", type=float, default=settings.serve_graceful_timeout_seconds)
+    parser.add_argument("--keep-alive", type=int, default=5)
+    args = parser.parse_args()
+
+    metrics_dir = None
+    if args.workers > 1 and settings.metrics_enabled and not settings.metrics_multiproc_dir:
+        # /metrics has to aggregate all workers; inherited by every fork
+        metrics_dir = tempfile.TemporaryDirectory(prefix="cheziousbot-metrics-")
+        settings.metrics_multiproc_dir = metrics_dir.name
+
+    app = preload()
+    # No background threads may be running when forking: log synchronously here
+    setup_logging(use_queue=False)
+    sock = bind_socket(args.host, args.port)
+    logger.info(f"Serving on {args.host}:{args.port} with {args.workers} workers (pid {os.getpid()})")
+
+    # Objects allocated so far are shared by every worker; keep the collector
+    # from touching (and so copying) their pages
+    gc.collect()
+    gc.freeze()
+    try:
+        Supervisor(app, sock, args).run()
+    finally:
+        sock.close()
+        if metrics_dir is not None:
+            metrics_dir.cleanup()
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 """Chat service for orchestrating chat interactions"""
 
+import asyncio
 from uuid import UUID
 from typing import AsyncGenerator
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -7,10 +8,12 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.config import settings
 from app.core.exceptions import ValidationException, SessionNotFoundException, UserNotFoundException
 from app.core.logging import get_logger
-from app.services.session_service import SessionService
+from app.core.rate_limiter import charge_tokens, check_token_budget
+from app.core.tracing import span, start_span
+from app.services.session_service import SessionService, check_session_owner
 from app.services.context_service import ContextService
 from app.services.user_service import UserService
-from app.llm.groq_client import get_groq_client
+from app.utils.tokens import estimate_tokens
 
 logger = get_logger(__name__)
 
@@ -65,7 +68,8 @@ class ChatService:
         Args:
             session_id: The session UUID
             user_message: The user's message
-            user_id: Optional user ID for lazy session creation
+            user_id: Optional user ID for lazy session creation; on an
+                existing session it must be the owner's
 
         Yields:
             Response tokens as they arrive
@@ -73,83 +77,159 @@ class ChatService:
         Raises:
             ValidationException: If message validation fails
             SessionNotFoundException: If session doesn't exist AND user_id not provided
+            SessionAccessDeniedException: If user_id isn't the session owner's
+            RateLimitException: If the user's LLM token budget is spent
         """
         # 1. Validate input
-        user_message = self.validate_message(user_message)
+        with span("chat.validate"):
+            user_message = self.validate_message(user_message)
         logger.info(f"Processing chat for session {session_id}")
 
         # 2. Verify or create session
-        try:
-            chat_session = await self.session_service.get_session(session_id)
-            logger.debug(f"Session verified: {chat_session.id}")
-        except SessionNotFoundException:
-            if user_id:
-                logger.info(
-                    f"Session {session_id} not found, creating new session for user {user_id}"
-                )
-                chat_session = await self.session_service.create_session_with_id(
-                    session_id, user_id
-                )
-            else:
-                raise
-
-        # 3. Save user message
-        await self.context_service.save_message(
-            session_id, "user", user_message
-        )
-        await self.session_service.increment_message_count(session_id)
+        with span("chat.session_load") as load_span:
+            try:
+                chat_session = await self.session_service.get_session(session_id)
+                check_session_owner(session_id, chat_session.user_id, user_id)
+                logger.debug(f"Session verified: {chat_session.id}")
+            except SessionNotFoundException:
+                if user_id:
+                    logger.info(
+                        f"Session {session_id} not found, creating new session for user {user_id}"
+                    )
+                    chat_session = await self.session_service.create_session_with_id(
+                        session_id, user_id
+                    )
+                    if load_span is not None:
+                        load_span.set_attribute("session.created", True)
+                else:
+                    raise
+
+        # 3. Check the owner's LLM token budget before anything is saved; past
+        # the soft limit the reply comes from the cheaper configuration
+        billed_user_id = chat_session.user_id
+        soft_limited = await check_token_budget(billed_user_id)
+
+        # 4. Save user message
+        with span("chat.save_user_message"):
+            await self.context_service.save_message(
+                session_id, "user", user_message
+            )
+            await self.session_service.increment_message_count(session_id)
         
-        # Get user context from session (preferred) or fetch from user profile
-        user_name = chat_session.user_name
-        location = chat_session.location
+            # Get user context from session (preferred) or fetch from user profile
+            user_name = chat_session.user_name
+            location = chat_session.location
         
-        # Fall back to user profile if session doesn't have context
-        if not user_name or not location:
-            current_user_id = user_id or chat_session.user_id
-            if current_user_id:
-                try:
-                    user = await self.user_service.get_user(current_user_id)
-                    user_name = user_name or user.name
-                    location = location or user.city
-                except UserNotFoundException:
-                    logger.debug(f"User {current_user_id} not found, proceeding without full context")
-                except Exception as e:
-                    logger.error(f"Unexpected error fetching user {current_user_id}: {e}")
+            # Fall back to user profile if session doesn't have context
+            if not user_name or not location:
+                current_user_id = chat_session.user_id
+                if current_user_id:
+                    try:
+                        user = await self.user_service.get_user(current_user_id)
+                        user_name = user_name or user.name
+                        location = location or user.city
+                    except UserNotFoundException:
+                        logger.debug(f"User {current_user_id} not found, proceeding without full context")
+                    except Exception as e:
+                        logger.error(f"Unexpected error fetching user {current_user_id}: {e}")
         
-        # 4. Commit the session NOW before streaming
-        await self.db.commit()
+            # 5. Commit the session NOW before streaming
+            await self.db.commit()
 
-        # 5. Get context messages
-        context_messages = await self.context_service.get_context_messages(
-            session_id
-        )
+        # 6. Get context messages
+        with span("chat.context_query") as query_span:
+            context_messages = await self.context_service.get_context_messages(
+                session_id
+            )
+            if query_span is not None:
+                query_span.set_attribute("context.messages", len(context_messages))
+
+        # 7. Build LLM messages (without current message since it's in context)
+        with span("chat.prompt_build"):
+            llm_messages = self.context_service.build_messages_for_llm(
+                context_messages[:-1],  # Exclude the just-saved message
+                user_message,
+                user_name=user_name,
+                location=location,
+            )
 
-        # 6. Build LLM messages (without current message since it's in context)
-        llm_messages = self.context_service.build_messages_for_llm(
-            context_messages[:-1],  # Exclude the just-saved message
-            user_message,
-            user_name=user_name,
-            location=location,
-        )
+        # 8. Stream response from Groq (the SDK is imported on first use)
+        from app.llm.groq_client import get_groq_client
+
+        await charge_tokens(billed_user_id, estimate_tokens(llm_messages))
+        model = max_tokens = None
+        if soft_limited:
+            model = settings.token_budget_soft_model or None
+            max_tokens = settings.token_budget_soft_max_tokens
+            logger.info(f"User {billed_user_id} is past the soft token budget; using the reduced reply settings")
 
-        # 7. Stream response from Groq
         full_response: list[str] = []
-        async for token in get_groq_client().stream_chat(llm_messages):
-            full_response.append(token)
-            yield token
-
-        # 8. Save assistant response (session will be committed by dependency)
-        assistant_content = "".join(full_response)
-        await self.context_service.save_message(
-            session_id, "assistant", assistant_content
-        )
-        await self.session_service.increment_message_count(session_id)
+        # Waiting for the first token, then streaming the rest
+        wait_span = start_span("llm.first_token")
+        stream_span = None
+        try:
+            async for token in get_groq_client().stream_chat(
+                llm_messages, model=model, max_tokens=max_tokens
+            ):
+                if wait_span is not None:
+                    wait_span.end()
+                    wait_span = None
+                    stream_span = start_span("llm.stream")
+                full_response.append(token)
+                yield token
+        except (asyncio.CancelledError, GeneratorExit):
+            # Stream was abandoned (client gone); keep what was generated
+            await charge_tokens(billed_user_id, len(full_response))
+            await self.save_partial_response(session_id, full_response)
+            raise
+        finally:
+            for open_span in (wait_span, stream_span):
+                if open_span is not None:
+                    open_span.set_attribute("llm.tokens", len(full_response))
+                    open_span.end()
+        await charge_tokens(billed_user_id, len(full_response))
+
+        # 9. Save assistant response (session will be committed by dependency)
+        with span("chat.finalize"):
+            assistant_content = "".join(full_response)
+            await self.context_service.save_message(
+                session_id, "assistant", assistant_content
+            )
+            await self.session_service.increment_message_count(session_id)
 
         logger.info(
             f"Chat completed for session {session_id}",
             extra={"response_length": len(assistant_content)},
         )
 
+    async def save_partial_response(
+        self, session_id: UUID, tokens: list[str]
+    ) -> None:
+        """
+        Persist a cut-off assistant response, marked as truncated.
+
+        Commits immediately since the caller is unwinding a cancellation.
+
+        Args:
+            session_id: The session UUID
+            tokens: Tokens streamed before the cut-off
+        """
+        if not tokens:
+            return
+        content = "".join(tokens)
+        try:
+            await self.context_service.save_message(
+                session_id, "assistant", content, truncated=True
+            )
+            await self.session_service.increment_message_count(session_id)
+            await self.db.commit()
+            logger.info(
+                f"Saved truncated response for session {session_id}",
+                extra={"response_length": len(content)},
+            )
+        except Exception as e:
+            logger.error(f"Failed to save truncated response: {e}")
+
     async def get_response(
         self,
         session_id: UUID,
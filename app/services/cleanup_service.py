@@ -1,11 +1,14 @@
-"""Background cleanup service for expired sessions."""
+"""Background cleanup service for expired sessions and idempotency keys."""
 
+import asyncio
 from datetime import timedelta
 from sqlalchemy import update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.session import ChatSession
 from app.db.engine import async_session
+from app.services.idempotency_service import IdempotencyService
+from app.core.config import settings
 from app.core.logging import get_logger
 from app.utils.time import utc_now
 
@@ -42,3 +45,33 @@ async def cleanup_expired_sessions() -> int:
             logger.error(f"Error cleaning up sessions: {e}")
             await db.rollback()
             return 0
+
+
+async def cleanup_expired_idempotency_keys() -> int:
+    """
+    Delete idempotency keys whose TTL has passed.
+    
+    Returns:
+        Number of keys deleted.
+    """
+    async with async_session() as db:
+        try:
+            deleted = await IdempotencyService(db).purge_expired()
+            await db.commit()
+            
+            if deleted > 0:
+                logger.info(f"Deleted {deleted} expired idempotency keys")
+            
+            return deleted
+            
+        except Exception as e:
+            logger.error(f"Error cleaning up idempotency keys: {e}")
+            await db.rollback()
+            return 0
+
+
+async def run_idempotency_key_cleanup() -> None:
+    """Delete expired idempotency keys every purge interval until cancelled."""
+    while True:
+        await cleanup_expired_idempotency_keys()
+        await asyncio.sleep(settings.idempotency_purge_interval_seconds)
@@ -103,6 +103,7 @@ class ContextService:
         session_id: UUID,
         role: str,
         content: str,
+        truncated: bool = False,
     ) -> Message:
         """
         Save a message to the database.
@@ -111,6 +112,7 @@ class ContextService:
             session_id: The session UUID
             role: 'user' or 'assistant'
             content: Message content
+            truncated: Whether an assistant response was cut off early
 
         Returns:
             Created Message instance
@@ -122,7 +124,7 @@ class ContextService:
             if role == "user":
                 message = Message.create_user_message(session_id, content)
             else:
-                message = Message.create_assistant_message(session_id, content)
+                message = Message.create_assistant_message(session_id, content, truncated)
 
             self.db.add(message)
             await self.db.flush()
@@ -0,0 +1,110 @@
+"""Idempotency service for deduplicating retried chat requests"""
+
+from datetime import timedelta, timezone
+from uuid import UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+
+from app.models.idempotency import IdempotencyKey, IdempotencyStatus
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.utils.time import utc_now
+
+logger = get_logger(__name__)
+
+class IdempotencyService:
+    """Service for idempotency key bookkeeping."""
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def claim(
+        self, session_id: UUID, key: str, turn_id: str
+    ) -> IdempotencyKey | None:
+        """
+        Claim a key for a new turn, committing immediately.
+
+        Args:
+            session_id: The session UUID
+            key: Client-supplied idempotency key
+            turn_id: ID of the turn that will serve the request
+
+        Returns:
+            None if the claim succeeded, otherwise the existing live record
+        """
+        existing = await self.get(session_id, key)
+        if existing is not None:
+            if not existing.is_expired and not self._is_abandoned(existing):
+                return existing
+            await self.db.delete(existing)
+            await self.db.flush()
+
+        self.db.add(
+            IdempotencyKey(
+                session_id=session_id,
+                key=key,
+                turn_id=turn_id,
+                expires_at=utc_now() + timedelta(seconds=settings.idempotency_ttl_seconds),
+            )
+        )
+        try:
+            await self.db.commit()
+        except IntegrityError:
+            # Lost a race with a concurrent retry
+            await self.db.rollback()
+            return await self.get(session_id, key)
+
+        logger.debug(f"Claimed idempotency key {key} for turn {turn_id}")
+        return None
+
+    @staticmethod
+    def _is_abandoned(record: IdempotencyKey) -> bool:
+        """True if an in-flight record outlived any real turn (e.g. its worker died)."""
+        if record.status != IdempotencyStatus.IN_FLIGHT:
+            return False
+        created_at = record.created_at
+        if created_at.tzinfo is None:
+            created_at = created_at.replace(tzinfo=timezone.utc)
+        age = (utc_now() - created_at).total_seconds()
+        return age > settings.idempotency_in_flight_timeout_seconds
+
+    async def get(self, session_id: UUID, key: str) -> IdempotencyKey | None:
+        """Get the record for a key, if any."""
+        result = await self.db.execute(
+            select(IdempotencyKey).where(
+                IdempotencyKey.session_id == session_id,
+                IdempotencyKey.key == key,
+            )
+        )
+        return result.scalar_one_or_none()
+
+    async def complete(self, session_id: UUID, key: str, response: str) -> None:
+        """Store the finished answer for replay (caller commits)."""
+        record = await self.get(session_id, key)
+        if record is not None:
+            record.status = IdempotencyStatus.COMPLETED
+            record.response = response
+            await self.db.flush()
+
+    async def release(self, session_id: UUID, key: str) -> None:
+        """Forget a key whose turn failed so a retry can run again."""
+        await self.db.execute(
+            delete(IdempotencyKey).where(
+                IdempotencyKey.session_id == session_id,
+                IdempotencyKey.key == key,
+            )
+        )
+        await self.db.commit()
+
+    async def purge_expired(self) -> int:
+        """
+        Delete all expired keys.
+
+        Returns:
+            Number of keys deleted
+        """
+        result = await self.db.execute(
+            delete(IdempotencyKey).where(IdempotencyKey.expires_at < utc_now())
+        )
+        return result.rowcount
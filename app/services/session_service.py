@@ -6,7 +6,7 @@ from sqlalchemy import select
 
 from app.models.session import ChatSession
 from app.models.user import User
-from app.core.exceptions import SessionNotFoundException
+from app.core.exceptions import SessionAccessDeniedException, SessionNotFoundException
 from app.core.logging import get_logger
 from app.services.user_service import UserService
 
@@ -129,6 +129,21 @@ class SessionService:
 
         return chat_session
 
+    async def get_session_owner(self, session_id: UUID) -> str | None:
+        """
+        Get the ID of the user who owns a session.
+
+        Args:
+            session_id: The session UUID
+
+        Returns:
+            The owner's user ID, or None if the session doesn't exist yet
+        """
+        result = await self.db.execute(
+            select(ChatSession.user_id).where(ChatSession.id == session_id)
+        )
+        return result.scalar_one_or_none()
+
     async def get_user_sessions(
         self, 
         user_id: str,
@@ -212,3 +227,18 @@ class SessionService:
         chat_session = await self.get_session(session_id)
         chat_session.increment_message_count()
         await self.db.flush()
+
+
+def check_session_owner(session_id: UUID, owner_id: str, user_id: str | None) -> None:
+    """
+    Reject a request that names a user other than the session's owner.
+
+    The request's ``user_id`` only decides who owns a session that is
+    created lazily; an existing session's turns are always the owner's.
+
+    Raises:
+        SessionAccessDeniedException: If ``user_id`` is set and isn't the owner
+    """
+    if user_id and user_id != owner_id:
+        logger.warning(f"User {user_id} named on session {session_id} owned by {owner_id}")
+        raise SessionAccessDeniedException(str(session_id))
@@ -0,0 +1,380 @@
+"""Stream service for running chat turns independently of their readers"""
+
+import asyncio
+import time
+from typing import AsyncGenerator
+from uuid import UUID
+
+from app.core.config import settings
+from app.core.exceptions import (
+    ChatBotException,
+    IdempotencyConflictException,
+    ServiceUnavailableException,
+)
+from app.core.logging import get_logger
+from app.core.metrics import chat_streams_in_flight
+from app.core.rate_limiter import check_token_budget, enforce_rate_limit
+from app.core.tracing import start_trace
+from app.db.engine import async_session
+from app.models.idempotency import IdempotencyStatus
+from app.services.chat_service import ChatService
+from app.services.idempotency_service import IdempotencyService
+from app.services.session_service import SessionService, check_session_owner
+from app.utils.ids import generate_request_id
+from app.utils.streaming import coalesce_tokens
+
+logger = get_logger(__name__)
+
+# How long cancelled turns get to save their partial answers during a drain
+DRAIN_CANCEL_TIMEOUT = 5.0
+
+
+class ChatTurn:
+    """
+    Replay buffer for a single chat turn.
+
+    The producer task appends coalesced token chunks; any number of readers
+    can follow along from any position, so a client that reconnects can
+    resume mid-stream without another LLM call. Once the last reader goes
+    away the producer is cancelled after a short grace period, so an
+    abandoned turn stops consuming upstream tokens.
+    """
+
+    def __init__(self, turn_id: str, session_id: UUID):
+        self.turn_id = turn_id
+        self.session_id = session_id
+        self.chunks: list[str] = []
+        self.finished = False
+        self.cancelled = False
+        self.error: Exception | None = None
+        self.finished_at: float | None = None
+        self.task: asyncio.Task | None = None
+        self.readers = 0
+        self._changed = asyncio.Event()
+        self._orphan_timer: asyncio.TimerHandle | None = None
+
+    @classmethod
+    def replay(cls, turn_id: str, session_id: UUID, response: str) -> "ChatTurn":
+        """Build an already-finished turn from a stored answer."""
+        turn = cls(turn_id, session_id)
+        if response:
+            turn.chunks.append(response)
+        turn.finish()
+        return turn
+
+    def append(self, chunk: str) -> None:
+        """Add a chunk and wake up readers."""
+        self.chunks.append(chunk)
+        self._notify()
+
+    def finish(self, error: Exception | None = None, cancelled: bool = False) -> None:
+        """Mark the turn as complete (successfully or not) and wake up readers."""
+        self.finished = True
+        self.cancelled = cancelled
+        self.error = error
+        self.finished_at = time.monotonic()
+        self._notify()
+
+    def cancel(self) -> None:
+        """Stop the producer; readers see the turn finish as cancelled."""
+        if self.task is not None and not self.task.done():
+            self.task.cancel()
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def _attach(self) -> None:
+        self.readers += 1
+        if self._orphan_timer is not None:
+            self._orphan_timer.cancel()
+            self._orphan_timer = None
+
+    def _detach(self) -> None:
+        self.readers -= 1
+        if self.readers > 0 or self.finished:
+            return
+        grace = settings.stream_resume_grace_seconds
+        if grace <= 0:
+            self._cancel_if_orphaned()
+        else:
+            self._orphan_timer = asyncio.get_running_loop().call_later(
+                grace, self._cancel_if_orphaned
+            )
+
+    def _cancel_if_orphaned(self) -> None:
+        self._orphan_timer = None
+        if self.readers == 0 and not self.finished:
+            logger.info(f"No readers left for turn {self.turn_id}, cancelling upstream")
+            self.cancel()
+
+    async def read(self, start: int = 0) -> AsyncGenerator[tuple[int, str], None]:
+        """
+        Follow the turn from chunk ``start`` until it finishes.
+
+        Returns normally when the turn completes or is cancelled; check
+        ``cancelled`` afterwards to tell the two apart.
+
+        Yields:
+            (sequence number, chunk) pairs
+
+        Raises:
+            Exception: The producer's error, if the turn failed
+        """
+        index = start
+        self._attach()
+        try:
+            while True:
+                changed = self._changed
+                while index < len(self.chunks):
+                    yield index, self.chunks[index]
+                    index += 1
+                if self.finished:
+                    if self.error is not None:
+                        raise self.error
+                    return
+                await changed.wait()
+        finally:
+            self._detach()
+
+
+class TurnRegistry:
+    """In-process registry of in-flight and recently finished chat turns."""
+
+    def __init__(self, replay_ttl_seconds: float | None = None):
+        self.replay_ttl_seconds = (
+            replay_ttl_seconds
+            if replay_ttl_seconds is not None
+            else settings.stream_replay_ttl_seconds
+        )
+        self._turns: dict[str, ChatTurn] = {}
+        self.draining = False
+
+    def start(
+        self,
+        session_id: UUID,
+        user_message: str,
+        user_id: str | None = None,
+        turn_id: str | None = None,
+        idempotency_key: str | None = None,
+    ) -> ChatTurn:
+        """
+        Start producing a chat turn in a background task.
+
+        Args:
+            session_id: The session UUID
+            user_message: The user's message
+            user_id: Optional user ID for lazy session creation
+            turn_id: Optional turn ID (generated if omitted)
+            idempotency_key: Already-claimed key to complete or release
+
+        Returns:
+            The new ChatTurn
+        """
+        self.evict_expired()
+        turn = ChatTurn(turn_id or generate_request_id(), session_id)
+        turn.task = asyncio.create_task(
+            self._produce(turn, user_message, user_id, idempotency_key),
+            name=f"chat-turn:{turn.turn_id}",
+        )
+        self._turns[turn.turn_id] = turn
+        return turn
+
+    async def start_idempotent(
+        self,
+        session_id: UUID,
+        user_message: str,
+        user_id: str | None = None,
+        turn_id: str | None = None,
+        idempotency_key: str | None = None,
+    ) -> ChatTurn:
+        """
+        Start a turn unless the idempotency key has already been seen.
+
+        A retry of an in-flight request attaches to the running turn; a
+        retry of a completed one replays the stored answer. Neither calls
+        the LLM or saves another user message.
+
+        Raises:
+            IdempotencyConflictException: If the key is in flight on
+                another worker
+            RateLimitException: If the session owner's per-user rate limit
+                or LLM token budget is spent
+            SessionAccessDeniedException: If ``user_id`` isn't the owner of
+                an existing session
+            ServiceUnavailableException: If the worker is shutting down
+        """
+        if self.draining:
+            raise ServiceUnavailableException("chat", details={"reason": "shutting_down"})
+        if not idempotency_key:
+            await self._check_limits(session_id, user_id)
+            return self.start(session_id, user_message, user_id, turn_id)
+
+        turn_id = turn_id or generate_request_id()
+        async with async_session() as db:
+            existing = await IdempotencyService(db).claim(
+                session_id, idempotency_key, turn_id
+            )
+        if existing is None:
+            try:
+                await self._check_limits(session_id, user_id)
+            except ChatBotException:
+                await self._release_key(session_id, idempotency_key)
+                raise
+            return self.start(
+                session_id, user_message, user_id, turn_id, idempotency_key
+            )
+
+        turn = self.get(existing.turn_id)
+        if turn is not None and turn.session_id == session_id:
+            logger.info(f"Idempotent retry attached to turn {turn.turn_id}")
+            return turn
+        if existing.status == IdempotencyStatus.COMPLETED:
+            logger.info(f"Idempotent retry replaying stored answer of turn {existing.turn_id}")
+            return ChatTurn.replay(existing.turn_id, session_id, existing.response or "")
+        raise IdempotencyConflictException(idempotency_key)
+
+    @staticmethod
+    async def _check_limits(session_id: UUID, user_id: str | None) -> None:
+        # Rejects before any response starts, so the client gets a 429 with
+        # Retry-After. The per-user limit and the budget are the session
+        # owner's; the request's user id only stands in for the owner of a
+        # session that doesn't exist yet
+        async with async_session() as db:
+            owner_id = await SessionService(db).get_session_owner(session_id)
+        if owner_id is not None:
+            check_session_owner(session_id, owner_id, user_id)
+            user_id = owner_id
+        if not user_id:
+            return
+        if settings.rate_limit_per_user_per_minute > 0:
+            await enforce_rate_limit(
+                "chat_user", f"user:{user_id}", settings.rate_limit_per_user_per_minute
+            )
+        await check_token_budget(user_id)
+
+    def get(self, turn_id: str) -> ChatTurn | None:
+        """Get a turn by ID if it is still in flight or replayable."""
+        self.evict_expired()
+        return self._turns.get(turn_id)
+
+    def in_flight(self) -> list[ChatTurn]:
+        """Get all turns whose producer is still running."""
+        return [t for t in self._turns.values() if not t.finished]
+
+    def begin_drain(self) -> None:
+        """Stop accepting new turns; in-flight ones keep running."""
+        if not self.draining:
+            self.draining = True
+            logger.info(f"Draining: {len(self.in_flight())} chat turn(s) in flight")
+
+    async def drain(self, timeout: float) -> int:
+        """
+        Stop accepting turns and wait for in-flight ones to finish.
+
+        Turns still running after ``timeout`` are cancelled, which saves
+        their partial answers as truncated messages.
+
+        Returns:
+            Number of turns that had to be cancelled
+        """
+        self.begin_drain()
+        tasks = [turn.task for turn in self.in_flight() if turn.task is not None]
+        if not tasks:
+            return 0
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+        if pending:
+            logger.warning(
+                f"Cancelling {len(pending)} chat turn(s) still running after {timeout:g}s"
+            )
+            for task in pending:
+                task.cancel()
+            await asyncio.wait(pending, timeout=DRAIN_CANCEL_TIMEOUT)
+        else:
+            logger.info(f"All {len(tasks)} chat turn(s) finished")
+        return len(pending)
+
+    def evict_expired(self) -> None:
+        """Drop finished turns whose replay window has passed."""
+        cutoff = time.monotonic() - self.replay_ttl_seconds
+        expired = [
+            turn_id
+            for turn_id, turn in self._turns.items()
+            if turn.finished_at is not None and turn.finished_at < cutoff
+        ]
+        for turn_id in expired:
+            del self._turns[turn_id]
+
+    async def _produce(
+        self,
+        turn: ChatTurn,
+        user_message: str,
+        user_id: str | None,
+        idempotency_key: str | None = None,
+    ) -> None:
+        """Run the chat on its own DB session and feed the replay buffer."""
+        with start_trace(
+            "chat.turn",
+            **{"chat.turn_id": turn.turn_id, "chat.session_id": str(turn.session_id)},
+        ) as trace:
+            await self._run_turn(turn, user_message, user_id, idempotency_key)
+            if trace is not None:
+                trace.root.set_attribute("chat.chunks", len(turn.chunks))
+                trace.root.set_attribute("chat.cancelled", turn.cancelled)
+                if turn.error is not None:
+                    trace.root.record_exception(turn.error)
+
+    async def _run_turn(
+        self,
+        turn: ChatTurn,
+        user_message: str,
+        user_id: str | None,
+        idempotency_key: str | None,
+    ) -> None:
+        try:
+            async with async_session() as db:
+                try:
+                    service = ChatService(db)
+                    async for chunk in coalesce_tokens(
+                        service.handle_chat(turn.session_id, user_message, user_id),
+                        max_tokens=settings.sse_flush_max_tokens,
+                        max_bytes=settings.sse_flush_max_bytes,
+                        max_delay_ms=settings.sse_flush_max_delay_ms,
+                    ):
+                        turn.append(chunk)
+                    if idempotency_key:
+                        # Same transaction as the assistant message
+                        await IdempotencyService(db).complete(
+                            turn.session_id, idempotency_key, "".join(turn.chunks)
+                        )
+                    await db.commit()
+                except BaseException:
+                    await db.rollback()
+                    raise
+            turn.finish()
+        except asyncio.CancelledError:
+            logger.info(f"Chat turn {turn.turn_id} cancelled")
+            await self._release_key(turn.session_id, idempotency_key)
+            turn.finish(cancelled=True)
+        except Exception as e:
+            logger.error(
+                f"Chat turn {turn.turn_id} failed: {e}",
+                exc_info=not isinstance(e, ChatBotException),
+            )
+            await self._release_key(turn.session_id, idempotency_key)
+            turn.finish(error=e)
+
+    async def _release_key(self, session_id: UUID, idempotency_key: str | None) -> None:
+        """Free the key of a turn that did not complete so it can be retried."""
+        if not idempotency_key:
+            return
+        try:
+            async with async_session() as db:
+                await IdempotencyService(db).release(session_id, idempotency_key)
+        except Exception as e:
+            logger.error(f"Failed to release idempotency key {idempotency_key}: {e}")
+
+
+# Process-wide registry
+turn_registry = TurnRegistry()
+chat_streams_in_flight.set_function(lambda: len(turn_registry.in_flight()))
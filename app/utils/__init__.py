@@ -2,10 +2,12 @@
 
 from app.utils.ids import generate_uuid, generate_request_id
 from app.utils.time import utc_now, format_timestamp
+from app.utils.tokens import estimate_tokens
 
 __all__ = [
     "generate_uuid",
     "generate_request_id",
     "utc_now",
     "format_timestamp",
+    "estimate_tokens",
 ]
@@ -1,7 +1,8 @@
 """SSE (Server-Sent Events) streaming utilities"""
 
 import asyncio
-from typing import AsyncGenerator, Any
+import contextlib
+from typing import AsyncGenerator, AsyncIterator, Any
 from sse_starlette.sse import EventSourceResponse
 
 
@@ -26,3 +27,101 @@ async def stream_tokens(
     for token in tokens:
         yield token
         await asyncio.sleep(delay)
+
+
+async def coalesce_tokens(
+    tokens: AsyncIterator[str],
+    max_tokens: int,
+    max_bytes: int = 0,
+    max_delay_ms: int = 0,
+) -> AsyncGenerator[str, None]:
+    """
+    Batch streamed tokens into fewer, larger chunks.
+
+    The first token is always passed through on its own so first-token
+    latency is unchanged. After that, buffered tokens are flushed as soon
+    as any limit is hit: ``max_tokens`` tokens, ``max_bytes`` UTF-8 bytes,
+    or ``max_delay_ms`` since the oldest buffered token arrived. A limit
+    of 0 disables that trigger; ``max_tokens <= 1`` disables coalescing.
+
+    Args:
+        tokens: Source token stream
+        max_tokens: Maximum tokens per chunk
+        max_bytes: Maximum bytes per chunk
+        max_delay_ms: Maximum time a token may wait in the buffer
+
+    Yields:
+        Token chunks
+    """
+    if max_tokens <= 1:
+        async for token in tokens:
+            yield token
+        return
+
+    iterator = tokens.__aiter__()
+    loop = asyncio.get_running_loop()
+    max_delay = max_delay_ms / 1000
+
+    try:
+        yield await iterator.__anext__()
+    except StopAsyncIteration:
+        return
+
+    buffer: list[str] = []
+    buffered_bytes = 0
+    finished = False
+    ready = asyncio.Event()
+    timer: asyncio.TimerHandle | None = None
+
+    async def pump() -> None:
+        """Read the source into the buffer and signal when a flush is due."""
+        nonlocal buffered_bytes, finished, timer
+        try:
+            async for token in iterator:
+                buffer.append(token)
+                if max_bytes:
+                    buffered_bytes += len(token.encode("utf-8"))
+                if len(buffer) == 1 and max_delay > 0:
+                    timer = loop.call_later(max_delay, ready.set)
+                if len(buffer) >= max_tokens or (max_bytes and buffered_bytes >= max_bytes):
+                    ready.set()
+        finally:
+            finished = True
+            ready.set()
+
+    # The source is read in its own task so a flush can be triggered by the
+    # delay timer while we are waiting on a slow upstream
+    parent = asyncio.current_task()
+    reader = asyncio.create_task(
+        pump(), name=f"{parent.get_name()}:pump" if parent is not None else None
+    )
+    try:
+        while True:
+            await ready.wait()
+            ready.clear()
+            if timer is not None:
+                timer.cancel()
+                timer = None
+
+            # Snapshot before yielding: tokens that arrive while the consumer
+            # is suspended re-arm the event and are picked up next round
+            done = finished
+            if buffer:
+                chunk = "".join(buffer)
+                buffer.clear()
+                buffered_bytes = 0
+                yield chunk
+            if done:
+                break
+
+        # Surface any error raised by the source
+        await reader
+    finally:
+        if timer is not None:
+            timer.cancel()
+        if not reader.done():
+            # Let the source run its cleanup (e.g. closing an upstream
+            # connection) before the caller tears down shared resources
+            reader.cancel()
+            with contextlib.suppress(BaseException):
+                await reader
@@ -0,0 +1,12 @@
+"""Token count estimates"""
+
+# Rough average for English text with Llama-family tokenizers
+CHARS_PER_TOKEN = 4
+# Role markers and separators the chat template adds per message
+TOKENS_PER_MESSAGE = 4
+
+
+def estimate_tokens(messages: list[dict[str, str]]) -> int:
+    """Estimate the prompt tokens of a chat completion request."""
+    chars = sum(len(message["content"]) for message in messages)
+    return chars // CHARS_PER_TOKEN + TOKENS_PER_MESSAGE * len(messages)
@@ -0,0 +1,4 @@
+"""Performance benchmarks for CheziousBot.
+
+Run from the repository root, e.g. ``python -m benchmarks.sse_coalescing``.
+"""
@@ -0,0 +1,124 @@
+"""Benchmark response compression: CPU cost vs bytes saved.
+
+Sends a long session transcript, a page of users with their sessions and a
+coalesced SSE token stream through ``CompressionMiddleware`` (in-process
+ASGI, no sockets) with each encoding and level, and reports the compressed
+size, CPU time per response and the break-even link speed: below it the
+transfer time saved outweighs the CPU spent, i.e. compression is a net win
+for a client on that link.
+
+    python -m benchmarks.compression
+    python -m benchmarks.compression --messages 2000 --frames 400
+"""
+
+import argparse
+import asyncio
+import time
+
+from benchmarks.serialization import _text, build_transcript, build_users
+
+from pydantic import TypeAdapter
+from sse_starlette.sse import EventSourceResponse
+from starlette.responses import Response
+
+from app.api.v1.chat import token_event
+from app.core.compression import CompressionMiddleware, brotli
+from app.schemas.user import UserWithSessions
+
+
+def json_app(body: bytes):
+    return Response(body, media_type="application/json")
+
+
+def sse_app(chunks: list[str]):
+    async def events():
+        for seq, chunk in enumerate(chunks):
+            yield token_event("bench", seq, chunk)
+
+    async def app(scope, receive, send):
+        await EventSourceResponse(events())(scope, receive, send)
+
+    return app
+
+
+async def run_once(app, accept_encoding: str) -> int:
+    """Send one response through ``app`` and return the body bytes sent."""
+    sent = 0
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "headers": [(b"accept-encoding", accept_encoding.encode())],
+    }
+
+    async def receive():
+        await asyncio.sleep(3600)
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal sent
+        if message["type"] == "http.response.body":
+            sent += len(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return sent
+
+
+async def measure(make_app, accept_encoding: str, config: dict, repeat: int) -> tuple[float, int]:
+    """CPU seconds per response and bytes sent, through the middleware."""
+    sent = await run_once(CompressionMiddleware(make_app(), minimum_size=0, **config), accept_encoding)
+    cpu_start = time.process_time()
+    for _ in range(repeat):
+        await run_once(CompressionMiddleware(make_app(), minimum_size=0, **config), accept_encoding)
+    return (time.process_time() - cpu_start) / repeat, sent
+
+
+def variants() -> list[tuple[str, str, dict]]:
+    configs = [(f"gzip -{level}", "gzip", {"gzip_level": level}) for level in (1, 6, 9)]
+    if brotli is not None:
+        configs += [(f"br q{quality}", "br", {"brotli_quality": quality}) for quality in (1, 4, 6, 11)]
+    return configs
+
+
+async def main_async(args) -> None:
+    transcript = build_transcript(args.messages).model_dump_json().encode()
+    users = TypeAdapter(list[UserWithSessions]).dump_json(build_users(args.users, args.sessions))
+    # One chunk per coalesced frame batch, like a chat turn with coalescing on
+    chunks = [_text(args.tokens_per_frame, i * args.tokens_per_frame) + " " for i in range(args.frames)]
+    payloads = {
+        f"transcript ({args.messages} messages)": lambda: json_app(transcript),
+        f"users ({args.users} x {args.sessions} sessions)": lambda: json_app(users),
+        f"SSE ({args.frames} frames)": lambda: sse_app(chunks),
+    }
+    if brotli is None:
+        print("brotli not installed: gzip only (pip install brotli)")
+
+    print(f"{'payload':<32}{'encoding':<10}{'KiB':>9}{'ratio':>8}{'cpu ms':>9}{'MB/s':>8}{'break-even':>14}")
+    for name, make_app in payloads.items():
+        identity_cpu, identity_bytes = await measure(make_app, "identity", {}, args.repeat)
+        print(f"{name:<32}{'identity':<10}{identity_bytes / 1024:>9.1f}{1:>7.1f}x{identity_cpu * 1000:>9.2f}")
+        for label, accept_encoding, config in variants():
+            cpu, sent = await measure(make_app, accept_encoding, config, args.repeat)
+            # CPU added by compression; throughput is of the uncompressed input
+            extra_cpu = max(cpu - identity_cpu, 1e-9)
+            saved_bits = (identity_bytes - sent) * 8
+            print(
+                f"{name:<32}{label:<10}{sent / 1024:>9.1f}{identity_bytes / sent:>7.1f}x"
+                f"{cpu * 1000:>9.2f}{identity_bytes / 1e6 / extra_cpu:>8.0f}"
+                f"{saved_bits / extra_cpu / 1e6:>9.0f} Mbit/s"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=1000, help="Messages in the transcript")
+    parser.add_argument("--users", type=int, default=200, help="Users in the listing")
+    parser.add_argument("--sessions", type=int, default=10, help="Sessions per listed user")
+    parser.add_argument("--frames", type=int, default=200, help="SSE frames per stream")
+    parser.add_argument("--tokens-per-frame", type=int, default=8, help="Words per coalesced frame")
+    parser.add_argument("--repeat", type=int, default=20, help="Responses timed per variant")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
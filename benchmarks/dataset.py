@@ -0,0 +1,443 @@
+"""Synthetic dataset generator for realistic-scale database benchmarks.
+
+Populates ``users``, ``chat_sessions`` and ``messages`` so indexes and
+queries can be evaluated at production size rather than against a few dozen
+rows:
+
+- sessions per user follow a power law (most users have one or two
+  sessions, a few have thousands)
+- turns per session are log-normal; each turn is a user message followed by
+  an assistant reply, with separate log-normal length distributions
+- a configurable share of sessions is archived or deleted, and only active
+  sessions have had activity in the last week (as the cleanup job leaves it)
+
+Generation is streamed (memory stays flat at any scale) and rows are
+inserted in large ``executemany`` batches through the model tables, so
+values are stored exactly as the app stores them. Output is deterministic
+for a given ``--seed`` and ``--end``.
+
+    python -m benchmarks.dataset --scale small
+    python -m benchmarks.dataset --users 1000000 --sessions 10000000 --messages 100000000 \\
+        --database-url sqlite+aiosqlite:///./large.db --defer-indexes
+
+Row counts are targets: sessions and messages land within a few percent.
+"""
+
+import argparse
+import asyncio
+import logging
+import math
+import os
+import random
+import sys
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable
+
+# users, sessions, messages
+SCALES = {
+    "small": (1_000, 10_000, 100_000),
+    "medium": (100_000, 1_000_000, 10_000_000),
+    "large": (1_000_000, 10_000_000, 100_000_000),
+}
+
+NAMES = (
+    "Ali", "Ayesha", "Bilal", "Fatima", "Hamza", "Hina", "Imran", "Maryam",
+    "Omar", "Sana", "Usman", "Zainab", "Ahmed", "Khadija", "Saad", "Noor",
+)
+# Weighted towards where most orders come from
+CITIES = ("Lahore",) * 6 + ("Islamabad",) * 2 + ("Rawalpindi", "Faisalabad", "Multan", "Karachi", None)
+
+USER_PROMPTS = (
+    "What pizzas do you have? How much is a large Chicken Tikka? Do you deliver "
+    "to my area? Which deals are available today? What sides go well with a Crown "
+    "Crust? Is the Behari Kebab pizza spicy? Can I get extra cheese? What are your "
+    "timings on Friday? Where is your nearest branch? Do you have any vegetarian options?"
+).split()
+ASSISTANT_WORDS = (
+    "Our Chicken Tikka pizza is Rs. 1,250 for a regular and Rs. 1,650 for a large, "
+    "and you can order it by calling 111-44-66-99 or through the app. The Crown Crust "
+    "comes with kebab-stuffed edges and pairs well with our garlic mayo fries. Local deals "
+    "include two medium pizzas with a drink, and delivery is free on orders "
+    "above Rs. 2,000 within the city. Branches are open from 11 AM to 3 AM every day."
+).split()
+
+# Corpus size per role; content is sliced from it at random word boundaries
+CORPUS_CHARS = 1 << 20
+
+BATCH_ROWS = 20_000
+
+# Active sessions were touched within this window; older ones were archived
+ACTIVE_WINDOW = timedelta(days=7)
+
+# Users, sessions and messages rows of one insert batch
+Batch = tuple[list[dict[str, Any]], list[dict[str, Any]], list[dict[str, Any]]]
+
+
+@dataclass
+class Distribution:
+    """Shape parameters for the generated data."""
+
+    users: int
+    sessions: int
+    messages: int
+    session_alpha: float = 1.6
+    turns_sigma: float = 1.0
+    user_chars_median: float = 45
+    assistant_chars_median: float = 380
+    max_chars: int = 4000
+    archived_ratio: float = 0.6
+    deleted_ratio: float = 0.02
+    truncated_ratio: float = 0.01
+    days: int = 365
+
+
+def _build_corpus(rng: random.Random, words: list[str]) -> str:
+    parts, size = [], 0
+    while size < CORPUS_CHARS:
+        word = rng.choice(words)
+        parts.append(word)
+        size += len(word) + 1
+    return " ".join(parts)
+
+
+def _round(rng: random.Random, value: float) -> int:
+    """Round up with probability equal to the fractional part (unbiased)."""
+    whole = int(value)
+    return whole + (rng.random() < value - whole)
+
+
+class Generator:
+    """Streams users, sessions and messages as insert-ready row dicts."""
+
+    def __init__(self, dist: Distribution, seed: int, end: datetime):
+        self.dist = dist
+        self.rng = random.Random(seed)
+        self.end = end
+        self.user_corpus = _build_corpus(self.rng, USER_PROMPTS)
+        self.assistant_corpus = _build_corpus(self.rng, ASSISTANT_WORDS)
+
+        mean_sessions = dist.sessions / dist.users
+        # Lomax (Pareto II) on top of a minimum of one session: mean is scale / (alpha - 1)
+        self.session_scale = max(mean_sessions - 1, 0.0) * (dist.session_alpha - 1)
+        mean_turns = max(dist.messages / max(dist.sessions, 1) / 2, 1.0)
+        # Log-normal with the requested mean: mu = ln(mean) - sigma^2 / 2
+        self.turns_mu = math.log(mean_turns) - dist.turns_sigma ** 2 / 2
+
+    def _uuid(self) -> uuid.UUID:
+        return uuid.UUID(int=self.rng.getrandbits(128), version=4)
+
+    def _sessions_for_user(self) -> int:
+        lomax = self.session_scale * (self.rng.random() ** (-1 / self.dist.session_alpha) - 1)
+        return 1 + min(_round(self.rng, lomax), 100_000)
+
+    def _turns_for_session(self) -> int:
+        return max(1, min(round(self.rng.lognormvariate(self.turns_mu, self.dist.turns_sigma)), 5_000))
+
+    def _content(self, corpus: str, median: float) -> str:
+        length = min(int(self.rng.lognormvariate(math.log(median), 0.6)) + 1, self.dist.max_chars)
+        start = corpus.find(" ", self.rng.randrange(len(corpus) - length - 1)) + 1
+        return corpus[start:start + length].rstrip()
+
+    def generate(self, chunks: "Chunks") -> None:
+        """Generate every row, handing them to ``chunks`` as it goes."""
+        from app.models.message import MessageRole
+        from app.models.session import SessionStatus
+
+        dist, rng = self.dist, self.rng
+        span = timedelta(days=dist.days).total_seconds()
+
+        for index in range(dist.users):
+            user_id = f"user_{index:08d}"
+            name = rng.choice(NAMES)
+            city = rng.choice(CITIES)
+            # Older users have had longer to accumulate sessions; good enough
+            user_created = self.end - timedelta(seconds=rng.random() * span)
+            n_sessions = self._sessions_for_user()
+            chunks.add_user(
+                {
+                    "user_id": user_id,
+                    "name": name,
+                    "city": city,
+                    "session_count": n_sessions,
+                    "created_at": user_created,
+                    "updated_at": user_created,
+                }
+            )
+
+            user_span = (self.end - user_created).total_seconds()
+            for _ in range(n_sessions):
+                roll = rng.random()
+                if roll < dist.deleted_ratio:
+                    status = SessionStatus.DELETED
+                elif roll < dist.deleted_ratio + dist.archived_ratio:
+                    status = SessionStatus.ARCHIVED
+                else:
+                    status = SessionStatus.ACTIVE
+
+                if status is SessionStatus.ACTIVE:
+                    window = min(user_span, ACTIVE_WINDOW.total_seconds())
+                    created = self.end - timedelta(seconds=rng.random() * window)
+                else:
+                    window = max(user_span - ACTIVE_WINDOW.total_seconds(), 0.0)
+                    created = user_created + timedelta(seconds=rng.random() * window)
+
+                session_id = self._uuid()
+                turns = self._turns_for_session()
+                at = created
+                for turn in range(turns):
+                    at += timedelta(seconds=rng.uniform(5, 120))
+                    chunks.add_message(
+                        {
+                            "id": self._uuid(),
+                            "session_id": session_id,
+                            "role": MessageRole.USER,
+                            "content": self._content(self.user_corpus, dist.user_chars_median),
+                            "truncated": False,
+                            "created_at": at,
+                        }
+                    )
+                    at += timedelta(seconds=rng.uniform(1, 15))
+                    chunks.add_message(
+                        {
+                            "id": self._uuid(),
+                            "session_id": session_id,
+                            "role": MessageRole.ASSISTANT,
+                            "content": self._content(self.assistant_corpus, dist.assistant_chars_median),
+                            "truncated": turn == turns - 1 and rng.random() < dist.truncated_ratio,
+                            "created_at": at,
+                        }
+                    )
+                chunks.add_session(
+                    {
+                        "id": session_id,
+                        "user_id": user_id,
+                        "status": status,
+                        "message_count": turns * 2,
+                        "user_name": name,
+                        "location": city,
+                        "created_at": created,
+                        "last_activity_at": at,
+                        "expires_at": None,
+                    }
+                )
+
+
+class Chunks:
+    """Buffers rows per table and hands full batches to ``flush``."""
+
+    def __init__(self, batch_rows: int, flush: Callable[[Batch], None]):
+        self.batch_rows = batch_rows
+        self._flush = flush
+        self.users: list[dict[str, Any]] = []
+        self.sessions: list[dict[str, Any]] = []
+        self.messages: list[dict[str, Any]] = []
+
+    def add_user(self, row: dict[str, Any]) -> None:
+        self.users.append(row)
+
+    def add_message(self, row: dict[str, Any]) -> None:
+        self.messages.append(row)
+
+    def add_session(self, row: dict[str, Any]) -> None:
+        # Sessions close last, so a batch never holds half a session's messages
+        self.sessions.append(row)
+        if len(self.users) + len(self.sessions) + len(self.messages) >= self.batch_rows:
+            self._flush(self.take())
+
+    def take(self) -> Batch:
+        taken = (self.users, self.sessions, self.messages)
+        self.users, self.sessions, self.messages = [], [], []
+        return taken
+
+
+async def _set_bulk_pragmas(engine) -> None:
+    """Trade durability for load speed on SQLite (the data is disposable)."""
+    from sqlalchemy import event
+
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=OFF")
+        cursor.execute("PRAGMA synchronous=OFF")
+        cursor.execute("PRAGMA cache_size=-262144")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
+
+
+def _secondary_indexes(sync_conn) -> list[tuple[str, dict]]:
+    from sqlalchemy import inspect
+
+    inspector = inspect(sync_conn)
+    return [
+        (table, index)
+        for table in ("users", "chat_sessions", "messages")
+        for index in inspector.get_indexes(table)
+    ]
+
+
+async def load(args: argparse.Namespace, dist: Distribution, end: datetime) -> dict[str, Any]:
+    """Migrate the target database and stream generated rows into it."""
+    from sqlalchemy import Index, delete, func, insert, select, text
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    from app.core.config import settings
+    from app.db.migrate import run_migrations
+    from app.models import ChatSession, IdempotencyKey, Message, User
+
+    await asyncio.to_thread(run_migrations)
+
+    engine = create_async_engine(settings.database_url)
+    await _set_bulk_pragmas(engine)
+    tables = (User.__table__, ChatSession.__table__, Message.__table__)
+
+    async with engine.begin() as conn:
+        existing = (await conn.execute(select(func.count()).select_from(User.__table__))).scalar_one()
+        if existing and not args.truncate:
+            await engine.dispose()
+            sys.exit(f"Database already has {existing} users; pass --truncate to replace them")
+        if args.truncate:
+            for table in (IdempotencyKey.__table__, *reversed(tables)):
+                await conn.execute(delete(table))
+
+        dropped: list[tuple[str, dict]] = []
+        if args.defer_indexes:
+            dropped = await conn.run_sync(_secondary_indexes)
+            for _, index in dropped:
+                await conn.execute(text(f'DROP INDEX "{index["name"]}"'))
+
+    # Generation runs in a thread and hands batches over through a bounded
+    # queue, so building rows overlaps with the database writing them
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=4)
+    generator = Generator(dist, args.seed, end)
+
+    def put(batch) -> None:
+        asyncio.run_coroutine_threadsafe(queue.put(batch), loop).result()
+
+    def produce() -> None:
+        chunks = Chunks(args.batch_rows, put)
+        try:
+            generator.generate(chunks)
+            put(chunks.take())
+        finally:
+            put(None)
+
+    producer = loop.run_in_executor(None, produce)
+    counts = {"users": 0, "chat_sessions": 0, "messages": 0}
+    start = last_report = time.perf_counter()
+    async with engine.connect() as conn:
+        while (batch := await queue.get()) is not None:
+            # Parents first so foreign keys are satisfied within the batch
+            users, sessions, messages = batch
+            for table, rows in zip(tables, (users, sessions, messages)):
+                if rows:
+                    await conn.execute(insert(table), rows)
+                    counts[table.name] += len(rows)
+            await conn.commit()
+            now = time.perf_counter()
+            if now - last_report >= 5:
+                last_report = now
+                total = sum(counts.values())
+                print(f"  {counts} ({total / (now - start):,.0f} rows/s)", flush=True)
+    await producer
+    load_seconds = time.perf_counter() - start
+
+    index_seconds = 0.0
+    async with engine.begin() as conn:
+        if dropped:
+            index_start = time.perf_counter()
+            by_name = {table.name: table for table in tables}
+            for table_name, index in dropped:
+                table = by_name[table_name]
+                new_index = Index(
+                    index["name"],
+                    *(table.c[column] for column in index["column_names"]),
+                    unique=bool(index["unique"]),
+                )
+                await conn.run_sync(new_index.create)
+            index_seconds = time.perf_counter() - index_start
+        if args.analyze:
+            await conn.execute(text("ANALYZE"))
+    await engine.dispose()
+
+    return {
+        "rows": counts,
+        "load_seconds": round(load_seconds, 1),
+        "rows_per_second": round(sum(counts.values()) / load_seconds) if load_seconds else 0,
+        "index_seconds": round(index_seconds, 1),
+    }
+
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", choices=SCALES, default="small", help="Preset row counts")
+    parser.add_argument("--users", type=int, help="Users (overrides --scale)")
+    parser.add_argument("--sessions", type=int, help="Target sessions (overrides --scale)")
+    parser.add_argument("--messages", type=int, help="Target messages (overrides --scale)")
+    parser.add_argument("--database-url", help="Target database (default: DATABASE_URL)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument(
+        "--end", type=datetime.fromisoformat, default=datetime(2026, 1, 1, tzinfo=timezone.utc),
+        help="Timestamp of the newest activity (ISO 8601)",
+    )
+    parser.add_argument("--days", type=int, default=365, help="History covered by the data")
+    parser.add_argument("--session-alpha", type=float, default=1.6, help="Power-law exponent of sessions per user")
+    parser.add_argument("--turns-sigma", type=float, default=1.0, help="Log-normal sigma of turns per session")
+    parser.add_argument("--archived-ratio", type=float, default=0.6)
+    parser.add_argument("--deleted-ratio", type=float, default=0.02)
+    parser.add_argument("--truncated-ratio", type=float, default=0.01)
+    parser.add_argument("--batch-rows", type=int, default=BATCH_ROWS)
+    parser.add_argument("--truncate", action="store_true", help="Delete existing rows first")
+    parser.add_argument(
+        "--defer-indexes", action="store_true",
+        help="Drop secondary indexes during the load and rebuild them after (faster at scale)",
+    )
+    parser.add_argument("--no-analyze", dest="analyze", action="store_false", help="Skip ANALYZE after loading")
+    args = parser.parse_args()
+
+    users, sessions, messages = SCALES[args.scale]
+    dist = Distribution(
+        users=args.users or users,
+        sessions=args.sessions or sessions,
+        messages=args.messages or messages,
+        session_alpha=args.session_alpha,
+        turns_sigma=args.turns_sigma,
+        archived_ratio=args.archived_ratio,
+        deleted_ratio=args.deleted_ratio,
+        truncated_ratio=args.truncated_ratio,
+        days=args.days,
+    )
+    if dist.session_alpha <= 1:
+        parser.error("--session-alpha must be greater than 1 (the mean is infinite otherwise)")
+    end = args.end if args.end.tzinfo else args.end.replace(tzinfo=timezone.utc)
+
+    # Must be set before app modules (settings, alembic env) are imported
+    os.environ.setdefault("GROQ_API_KEY", "dataset-dummy-key")
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    logging.getLogger().setLevel(logging.WARNING)
+
+    print(
+        f"Generating ~{dist.users:,} users, ~{dist.sessions:,} sessions, "
+        f"~{dist.messages:,} messages (seed {args.seed})"
+    )
+    summary = asyncio.run(load(args, dist, end))
+    rows = summary["rows"]
+    print(
+        f"Loaded {rows['users']:,} users, {rows['chat_sessions']:,} sessions, "
+        f"{rows['messages']:,} messages in {summary['load_seconds']}s "
+        f"({summary['rows_per_second']:,} rows/s)"
+    )
+    if summary["index_seconds"]:
+        print(f"Rebuilt secondary indexes in {summary['index_seconds']}s")
+
+
+if __name__ == "__main__":
+    main()
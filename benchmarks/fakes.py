@@ -0,0 +1,59 @@
+"""Fakes shared by the benchmarks (no network or API key required)."""
+
+import asyncio
+import os
+from typing import AsyncGenerator
+
+# Settings validation requires a key; benchmarks never talk to Groq.
+os.environ.setdefault("GROQ_API_KEY", "bench-dummy-key")
+
+WORDS = (
+    "Our Chicken Tikka pizza is Rs. 1,250 for a regular and Rs. 1,650 for a "
+    "large, and you can order it by calling 111-44-66-99 or through the app."
+).split()
+
+
+async def fake_token_stream(
+    n_tokens: int = 200, tokens_per_sec: float = 0
+) -> AsyncGenerator[str, None]:
+    """
+    Yield LLM-like tokens, optionally paced at a fixed rate.
+
+    Args:
+        n_tokens: Number of tokens to emit
+        tokens_per_sec: Emission rate; 0 emits as fast as possible
+    """
+    delay = 1 / tokens_per_sec if tokens_per_sec else 0
+    for i in range(n_tokens):
+        if delay:
+            await asyncio.sleep(delay)
+        else:
+            await asyncio.sleep(0)
+        yield " " + WORDS[i % len(WORDS)]
+
+
+class FakeGroqClient:
+    """Stand-in for ``GroqClient`` that streams fake tokens at a fixed rate."""
+
+    def __init__(self, n_tokens: int = 100, tokens_per_sec: float = 1000):
+        self.n_tokens = n_tokens
+        self.tokens_per_sec = tokens_per_sec
+        self.client = object()
+
+    async def stream_chat(self, messages: list[dict[str, str]], **kwargs) -> AsyncGenerator[str, None]:
+        async for token in fake_token_stream(self.n_tokens, self.tokens_per_sec):
+            yield token
+
+    async def ping(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+
+def install_fake_groq(n_tokens: int = 100, tokens_per_sec: float = 1000) -> FakeGroqClient:
+    """Replace the process-wide Groq client with a fake one."""
+    from app.llm import groq_client
+
+    groq_client._groq_client = FakeGroqClient(n_tokens, tokens_per_sec)
+    return groq_client._groq_client
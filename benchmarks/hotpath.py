@@ -0,0 +1,327 @@
+"""Microbenchmarks for per-request hot paths, with regression baselines.
+
+Times each case in rounds interleaved with a fixed pure-Python calibration
+workload and compares the case's cost relative to that workload with
+``benchmarks/baselines/hotpath.json``, so a machine that is temporarily or
+uniformly slower (CPU frequency scaling, noisy neighbours) doesn't read as a
+regression.
+Exits non-zero when any case is slower than its baseline by more than the
+tolerance (DB cases, which include I/O, get a wider one).
+
+    python -m benchmarks.hotpath                  # compare with baselines
+    python -m benchmarks.hotpath --update         # record new baselines
+    python -m benchmarks.hotpath --only prompt    # cases whose name contains "prompt"
+
+Baselines are machine-specific; record them on the machine (or CI runner)
+that runs the comparison.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+from uuid import uuid4
+
+# Throwaway database for the DB cases; must be set before app modules load
+_DB_DIR = tempfile.mkdtemp(prefix="hotpath-")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_DB_DIR}/hotpath.db"
+os.environ.setdefault("LOG_QUEUE_SIZE", "0")
+
+from benchmarks.fakes import WORDS  # noqa: E402  (also sets GROQ_API_KEY)
+
+BASELINE_PATH = Path(__file__).parent / "baselines" / "hotpath.json"
+
+# DB cases include filesystem I/O and vary more between runs
+DB_TOLERANCE_FACTOR = 2.0
+
+# Background rows from ``benchmarks.dataset``, so queries run against tables
+# big enough for missing indexes and bad plans to show
+SEED_DISTRIBUTION = dict(users=500, sessions=5_000, messages=50_000)
+SEED = 1
+SEED_END = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+# Fixtures the DB cases query, seeded on top of the background rows
+HISTORY_MESSAGES = 200
+USER_SESSIONS = 50
+
+
+def _text(n_words: int, offset: int = 0) -> str:
+    return " ".join(WORDS[(offset + i) % len(WORDS)] for i in range(n_words))
+
+
+def _calibration_workload() -> int:
+    """Fixed interpreter-bound work that results are normalised against."""
+    table = {}
+    for i in range(2000):
+        table[str(i)] = i * i
+    return sum(table.values())
+
+
+async def _time(fn: Callable[[], Any], number: int) -> float:
+    """Per-call time in ns of ``number`` calls (awaiting results if needed)."""
+    start = time.perf_counter_ns()
+    for _ in range(number):
+        result = fn()
+        if asyncio.iscoroutine(result):
+            await result
+    return (time.perf_counter_ns() - start) / number
+
+
+async def _calls_per_round(fn: Callable[[], Any], round_time: float) -> int:
+    """Double the call count until one round takes at least ``round_time`` seconds."""
+    number = 1
+    while await _time(fn, number) * number < round_time * 1e9:
+        number *= 2
+    return number
+
+
+async def bench(fn: Callable[[], Any], min_time: float, rounds: int) -> tuple[float, float]:
+    """
+    Time ``fn`` in rounds interleaved with the calibration workload.
+
+    Returns:
+        Best per-call time in ns, and the median ratio of per-call time to
+        the calibration time measured right before it in the same round
+    """
+    round_time = min_time / rounds
+    number = await _calls_per_round(fn, round_time)
+    calibration_number = await _calls_per_round(_calibration_workload, round_time / 4)
+    times, ratios = [], []
+    for _ in range(rounds):
+        calibration = await _time(_calibration_workload, calibration_number)
+        elapsed = await _time(fn, number)
+        times.append(elapsed)
+        ratios.append(elapsed / calibration)
+    return min(times), statistics.median(ratios)
+
+
+async def seed() -> dict[str, Any]:
+    """
+    Migrate the throwaway database, fill it with generated users, sessions
+    and messages, then add one long session and a busy user on top.
+    """
+    from benchmarks.dataset import BATCH_ROWS, Distribution, load
+
+    from app.db.engine import async_session, init_db
+    from app.models import ChatSession, Message, User
+
+    await load(
+        argparse.Namespace(
+            seed=SEED, batch_rows=BATCH_ROWS, truncate=False, defer_indexes=False, analyze=True
+        ),
+        Distribution(**SEED_DISTRIBUTION),
+        SEED_END,
+    )
+    await init_db()
+    user_id = "bench_user"
+    async with async_session() as db:
+        db.add(User(user_id=user_id, name="Bench User", city="Lahore", session_count=USER_SESSIONS))
+        sessions = [
+            ChatSession(user_id=user_id, user_name="Bench User", location="Lahore", message_count=2)
+            for _ in range(USER_SESSIONS)
+        ]
+        db.add_all(sessions)
+        long_session = sessions[0]
+        long_session.message_count = HISTORY_MESSAGES
+        db.add_all(
+            Message(
+                session_id=long_session.id,
+                role="user" if i % 2 == 0 else "assistant",
+                content=_text(12 if i % 2 == 0 else 60, i),
+            )
+            for i in range(HISTORY_MESSAGES)
+        )
+        await db.commit()
+    return {"user_id": user_id, "session_id": long_session.id}
+
+
+def sync_cases() -> dict[str, Callable[[], Any]]:
+    """CPU-bound cases that need no database."""
+    from sse_starlette.sse import ensure_bytes
+
+    from app.api.v1.chat import token_event
+    from app.core.logging import JSONFormatter, LogContext
+    from app.llm.prompts import get_system_prompt
+    from app.models import Message
+    from app.schemas.chat import ChatMessage, MessagesResponse
+    from app.services.context_service import ContextService
+
+    session_id = uuid4()
+    history = [
+        Message(
+            session_id=session_id,
+            role="user" if i % 2 == 0 else "assistant",
+            content=_text(12 if i % 2 == 0 else 60, i),
+        )
+        for i in range(HISTORY_MESSAGES)
+    ]
+    context_service = ContextService(db=None)
+    context = history[-context_service.max_messages:]
+
+    formatter = JSONFormatter()
+    record = logging.LogRecord(
+        "app.services.chat_service", logging.INFO, __file__, 1,
+        "Chat completed for session %s", (session_id,), None,
+    )
+    chunk = _text(8)
+
+    def format_record() -> str:
+        with LogContext(request_id="0123456789ab", session_id=str(session_id)):
+            return formatter.format(record)
+
+    def messages_response() -> MessagesResponse:
+        return MessagesResponse(
+            session_id=session_id,
+            user_id="bench_user",
+            messages=[
+                ChatMessage(
+                    id=m.id,
+                    role=m.role,
+                    content=m.content,
+                    created_at=m.created_at,
+                    truncated=m.truncated,
+                )
+                for m in history
+            ],
+        )
+
+    return {
+        "prompt.get_system_prompt": lambda: get_system_prompt("Bench User", "Lahore"),
+        "context.build_messages_for_llm": lambda: context_service.build_messages_for_llm(
+            context, "What deals do you have?", user_name="Bench User", location="Lahore"
+        ),
+        "sse.token_event_encode": lambda: ensure_bytes(token_event("0123456789ab", 42, chunk), "\r\n"),
+        "logging.json_format": format_record,
+        "schemas.messages_response_200": messages_response,
+        "schemas.messages_response_200_json": lambda: messages_response().model_dump_json(),
+    }
+
+
+def db_cases(seeded: dict[str, Any]) -> dict[str, Callable[[], Awaitable[Any]]]:
+    """Query cases against the seeded database (one session per call, like a request)."""
+    from app.db.engine import async_session
+    from app.services.context_service import ContextService
+    from app.services.session_service import SessionService
+
+    session_id = seeded["session_id"]
+    user_id = seeded["user_id"]
+
+    async def get_session():
+        async with async_session() as db:
+            return await SessionService(db).get_session(session_id)
+
+    async def user_sessions():
+        async with async_session() as db:
+            return await SessionService(db).get_user_sessions(user_id)
+
+    async def context_messages():
+        async with async_session() as db:
+            return await ContextService(db).get_context_messages(session_id)
+
+    async def session_messages():
+        async with async_session() as db:
+            return await ContextService(db).get_session_messages(session_id)
+
+    return {
+        "db.session_get": get_session,
+        "db.user_sessions_50": user_sessions,
+        "db.context_messages": context_messages,
+        "db.session_messages_200": session_messages,
+    }
+
+
+async def run(only: str | None, min_time: float, rounds: int) -> dict[str, tuple[float, float]]:
+    cases: dict[str, Callable[[], Any]] = dict(sync_cases())
+    cases.update(db_cases(await seed()))
+    results = {}
+    for name, fn in cases.items():
+        if only is None or only in name:
+            results[name] = await bench(fn, min_time, rounds)
+    from app.db.engine import close_db
+
+    await close_db()
+    return results
+
+
+def _format_ns(ns: float) -> str:
+    if ns >= 1e6:
+        return f"{ns / 1e6:.2f} ms"
+    if ns >= 1e3:
+        return f"{ns / 1e3:.2f} us"
+    return f"{ns:.0f} ns"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--update", action="store_true", help="Write results as the new baselines")
+    parser.add_argument("--only", help="Run only cases whose name contains this string")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown (0.25 = 25%%)")
+    parser.add_argument("--min-time", type=float, default=1.0, help="Seconds per case")
+    parser.add_argument("--rounds", type=int, default=7)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    results = asyncio.run(run(args.only, args.min_time, args.rounds))
+
+    baselines: dict[str, Any] = {}
+    if args.baseline.exists():
+        baselines = json.loads(args.baseline.read_text()).get("cases", {})
+
+    regressions = []
+    print(f"{'case':<36}{'time/op':>12}{'baseline':>12}{'change':>9}")
+    for name, (ns, relative) in results.items():
+        base = baselines.get(name)
+        if base:
+            # Compare cost relative to the calibration workload, not raw time
+            change = relative / base["relative"] - 1
+            tolerance = args.tolerance * (DB_TOLERANCE_FACTOR if name.startswith("db.") else 1)
+            flag = "  REGRESSION" if change > tolerance else ""
+            if flag:
+                regressions.append(name)
+            print(f"{name:<36}{_format_ns(ns):>12}{_format_ns(base['ns_per_op']):>12}{change:>+9.1%}{flag}")
+        else:
+            print(f"{name:<36}{_format_ns(ns):>12}{'-':>12}{'new':>9}")
+
+    if args.update:
+        baselines.update(
+            {name: {"ns_per_op": round(ns, 1), "relative": round(relative, 6)} for name, (ns, relative) in results.items()}
+        )
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(
+            json.dumps(
+                {
+                    "machine": {
+                        "python": platform.python_version(),
+                        "platform": platform.platform(),
+                        "processor": platform.processor() or platform.machine(),
+                    },
+                    "cases": dict(sorted(baselines.items())),
+                },
+                indent=2,
+            )
+            + "\n"
+        )
+        print(f"\nBaselines written to {args.baseline}")
+        return
+
+    if regressions:
+        print(
+            f"\n{len(regressions)} case(s) regressed beyond tolerance "
+            f"({args.tolerance:.0%}, DB x{DB_TOLERANCE_FACTOR:g}): " + ", ".join(regressions),
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
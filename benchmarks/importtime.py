@@ -0,0 +1,97 @@
+"""Import-time profile of the app.
+
+Imports ``app.main`` in a fresh interpreter under ``python -X importtime`` and
+reports the most expensive modules (self and cumulative time) and the total
+self time per top-level package:
+
+    python -m benchmarks.importtime
+    python -m benchmarks.importtime --top 40 --json imports.json
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# "import time:       self [us] |   cumulative |   imported package"
+_LINE_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+@dataclass
+class ModuleImport:
+    name: str
+    self_ms: float
+    cumulative_ms: float
+    depth: int
+
+
+def profile_imports(module: str) -> list[ModuleImport]:
+    """Import ``module`` in a child interpreter and parse its import-time log."""
+    env = {
+        **os.environ,
+        "GROQ_API_KEY": os.environ.get("GROQ_API_KEY", "bench-dummy-key"),
+        "LOG_LEVEL": "WARNING",
+    }
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    ).stderr
+    imports = []
+    for line in stderr.splitlines():
+        match = _LINE_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            imports.append(
+                ModuleImport(name, int(self_us) / 1000, int(cumulative_us) / 1000, len(indent) // 2)
+            )
+    return imports
+
+
+def by_package(imports: list[ModuleImport]) -> dict[str, float]:
+    """Self time (ms) summed per top-level package, most expensive first."""
+    totals: dict[str, float] = defaultdict(float)
+    for item in imports:
+        totals[item.name.split(".")[0]] += item.self_ms
+    return dict(sorted(totals.items(), key=lambda item: -item[1]))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="app.main", help="Module to import")
+    parser.add_argument("--top", type=int, default=25, help="Rows per table")
+    parser.add_argument("--json", dest="json_path", help="Also write the full profile to this file")
+    args = parser.parse_args()
+
+    imports = profile_imports(args.module)
+    root = next((item for item in imports if item.name == args.module), None)
+    total = root.cumulative_ms if root else sum(item.self_ms for item in imports)
+    print(f"Importing {args.module}: {total:.0f} ms across {len(imports)} modules\n")
+
+    print(f"{'package':<32}{'self ms':>10}{'share':>8}")
+    for name, ms in list(by_package(imports).items())[:args.top]:
+        print(f"{name:<32}{ms:>10.1f}{ms / total:>8.1%}")
+
+    # Indented under the module that first imported them
+    print(f"\n{'module (cumulative)':<48}{'cum ms':>10}{'self ms':>10}")
+    for item in sorted(imports, key=lambda item: -item.cumulative_ms)[:args.top]:
+        print(f"{'  ' * min(item.depth, 4) + item.name:<48}{item.cumulative_ms:>10.1f}{item.self_ms:>10.1f}")
+
+    if args.json_path:
+        Path(args.json_path).write_text(
+            json.dumps(
+                {"module": args.module, "total_ms": total, "packages": by_package(imports),
+                 "imports": [asdict(item) for item in imports]},
+                indent=2,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
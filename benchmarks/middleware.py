@@ -0,0 +1,185 @@
+"""Benchmark the ASGI middleware stack against the old BaseHTTPMiddleware one.
+
+For each variant a uvicorn server is started in a subprocess (fake LLM,
+throwaway SQLite database) and driven over real sockets:
+
+- req/s on ``GET /api/v1/health``
+- time to first token and mean inter-token gap on ``POST /api/v1/chat``
+
+    python -m benchmarks.middleware --requests 2000 --chats 50
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+import httpx
+
+VARIANTS = ("asgi", "base_http")
+
+
+def _legacy_middleware():
+    """The previous BaseHTTPMiddleware implementations, kept for comparison."""
+    from starlette.middleware.base import BaseHTTPMiddleware
+    from starlette.responses import JSONResponse
+
+    from app.core.middleware import logger
+
+    class LegacyRequestLoggingMiddleware(BaseHTTPMiddleware):
+        async def dispatch(self, request, call_next):
+            start_time = time.perf_counter()
+            try:
+                response = await call_next(request)
+                duration = (time.perf_counter() - start_time) * 1000
+                logger.info(
+                    f"{request.method} {request.url.path} -> {response.status_code} ({duration:.0f}ms)"
+                )
+                return response
+            except Exception as e:
+                duration = (time.perf_counter() - start_time) * 1000
+                logger.error(f"{request.method} {request.url.path} -> CRASHED ({duration:.0f}ms): {e}")
+                raise
+
+    class LegacyResilienceMiddleware(BaseHTTPMiddleware):
+        async def dispatch(self, request, call_next):
+            try:
+                return await call_next(request)
+            except Exception as e:
+                return JSONResponse(
+                    status_code=500,
+                    content={"error": {"code": "INTERNAL_SERVER_ERROR", "message": str(e)}},
+                )
+
+    return LegacyRequestLoggingMiddleware, LegacyResilienceMiddleware
+
+
+def serve(variant: str, port: int) -> None:
+    """Run the app with the given middleware variant (subprocess entry point)."""
+    import uvicorn
+    from starlette.middleware import Middleware
+
+    from benchmarks.fakes import install_fake_groq
+    from app.core.middleware import RequestLoggingMiddleware, ResilienceMiddleware
+    from app.main import app
+
+    install_fake_groq(n_tokens=100, tokens_per_sec=500)
+
+    if variant == "base_http":
+        legacy_logging, legacy_resilience = _legacy_middleware()
+        app.user_middleware = [
+            Middleware(legacy_logging) if m.cls is RequestLoggingMiddleware
+            else Middleware(legacy_resilience) if m.cls is ResilienceMiddleware
+            else m
+            for m in app.user_middleware
+        ]
+        app.middleware_stack = None
+
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def _bench_health(base_url: str, total: int, concurrency: int) -> float:
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        remaining = total
+
+        async def worker():
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                (await client.get("/api/v1/health")).raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return total / (time.perf_counter() - start)
+
+
+async def _bench_chat(base_url: str, chats: int, concurrency: int) -> tuple[float, float]:
+    ttfts: list[float] = []
+    gaps: list[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+
+        async def one():
+            async with semaphore:
+                body = {"session_id": str(uuid.uuid4()), "message": "hi", "user_id": "bench"}
+                start = time.perf_counter()
+                arrivals: list[float] = []
+                async with client.stream("POST", "/api/v1/chat", json=body) as response:
+                    async for line in response.aiter_lines():
+                        if line.startswith("data:") and "token" in json.loads(line[5:]):
+                            arrivals.append(time.perf_counter())
+                if arrivals:
+                    ttfts.append((arrivals[0] - start) * 1000)
+                    gaps.extend((b - a) * 1000 for a, b in zip(arrivals, arrivals[1:]))
+
+        await asyncio.gather(*(one() for _ in range(chats)))
+
+    return statistics.median(ttfts), statistics.mean(gaps) if gaps else 0.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--chats", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--serve", choices=VARIANTS, help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.port)
+        return
+
+    print(f"{'variant':<12}{'health req/s':>14}{'chat TTFT p50 ms':>18}{'token gap ms':>14}")
+    for variant in VARIANTS:
+        port = _free_port()
+        with tempfile.TemporaryDirectory() as tmp:
+            env = {
+                **os.environ,
+                "GROQ_API_KEY": "bench-dummy-key",
+                "DATABASE_URL": f"sqlite+aiosqlite:///{tmp}/bench.db",
+                "RATE_LIMIT_PER_MINUTE": "1000000",
+                "API_KEY_ENABLED": "false",
+                "LOG_LEVEL": "WARNING",
+            }
+            subprocess.run([sys.executable, "-m", "app.db.migrate"], env=env, check=True)
+            server = subprocess.Popen(
+                [sys.executable, "-m", "benchmarks.middleware", "--serve", variant, "--port", str(port)],
+                env=env,
+            )
+            try:
+                base_url = f"http://127.0.0.1:{port}"
+                deadline = time.time() + 30
+                while True:
+                    try:
+                        httpx.get(f"{base_url}/api/v1/health").raise_for_status()
+                        break
+                    except httpx.HTTPError:
+                        if time.time() > deadline:
+                            raise
+                        time.sleep(0.2)
+
+                rps = asyncio.run(_bench_health(base_url, args.requests, args.concurrency))
+                ttft, gap = asyncio.run(_bench_chat(base_url, args.chats, args.concurrency))
+                print(f"{variant:<12}{rps:>14.0f}{ttft:>18.1f}{gap:>14.2f}")
+            finally:
+                server.terminate()
+                server.wait()
+
+
+if __name__ == "__main__":
+    main()
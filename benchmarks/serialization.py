@@ -0,0 +1,198 @@
+"""Benchmark JSON serialization of large responses and SSE payloads.
+
+For a long session transcript and a page of users with their sessions,
+compares the ways a response model can become JSON:
+
+- ``encoder``: ``jsonable_encoder`` + ``json.dumps`` (what FastAPI did
+  before its Pydantic ``dump_json`` fast path)
+- ``fastapi``: what current FastAPI does with a returned model, i.e.
+  validate it against ``response_model`` and ``dump_json`` the result
+- ``direct``: ``model_dump_json`` into a ``Response``, skipping validation
+
+both in isolation and end to end through a FastAPI app (in-process ASGI, no
+sockets). Then times the dict payloads of SSE token events and error bodies
+with stdlib ``json`` and ``app.core.serialization`` (orjson if installed).
+
+    python -m benchmarks.serialization
+    python -m benchmarks.serialization --messages 2000 --users 500
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable
+from uuid import uuid4
+
+from benchmarks.fakes import WORDS  # also sets GROQ_API_KEY
+
+import httpx
+from fastapi import FastAPI, Response
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.core import serialization
+from app.core.serialization import FastJSONResponse, dumps
+from app.schemas.chat import ChatMessage, MessagesResponse
+from app.schemas.user import UserSessionSummary, UserWithSessions
+
+
+def _text(n_words: int, offset: int) -> str:
+    return " ".join(WORDS[(offset + i) % len(WORDS)] for i in range(n_words))
+
+
+def build_transcript(n_messages: int) -> MessagesResponse:
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    return MessagesResponse(
+        session_id=uuid4(),
+        user_id="bench_user",
+        messages=[
+            ChatMessage(
+                id=uuid4(),
+                role="user" if i % 2 == 0 else "assistant",
+                content=_text(12 if i % 2 == 0 else 60, i),
+                created_at=start + timedelta(seconds=i),
+                truncated=False,
+            )
+            for i in range(n_messages)
+        ],
+    )
+
+
+def build_users(n_users: int, sessions_per_user: int) -> list[UserWithSessions]:
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    return [
+        UserWithSessions(
+            user_id=f"user_{i}",
+            name=f"User {i}",
+            city="Lahore",
+            created_at=start,
+            session_count=sessions_per_user,
+            sessions=[
+                UserSessionSummary(id=uuid4(), created_at=start, status="active", message_count=j)
+                for j in range(sessions_per_user)
+            ],
+        )
+        for i in range(n_users)
+    ]
+
+
+def time_call(fn: Callable[[], Any], min_time: float = 0.3, repeat: int = 5) -> float:
+    """Best mean seconds per call over ``repeat`` runs of ``min_time / 5`` or more."""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time / 5:
+            break
+        number *= 2
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def model_variants(content: Any, response_model: Any) -> dict[str, Callable[[], bytes]]:
+    adapter = TypeAdapter(response_model)
+    return {
+        "encoder": lambda: json.dumps(jsonable_encoder(content)).encode(),
+        "fastapi": lambda: adapter.dump_json(adapter.validate_python(content)),
+        "direct": lambda: adapter.dump_json(content),
+    }
+
+
+def build_app(transcript: MessagesResponse, users: list[UserWithSessions]) -> FastAPI:
+    app = FastAPI()
+    users_adapter = TypeAdapter(list[UserWithSessions])
+
+    @app.get("/fastapi/messages", response_model=MessagesResponse)
+    async def messages():
+        return transcript
+
+    @app.get("/fastapi/users", response_model=list[UserWithSessions])
+    async def user_list():
+        return users
+
+    @app.get("/direct/messages", response_model=MessagesResponse)
+    async def messages_direct():
+        return Response(transcript.model_dump_json(), media_type="application/json")
+
+    @app.get("/direct/users", response_model=list[UserWithSessions])
+    async def user_list_direct():
+        return Response(users_adapter.dump_json(users), media_type="application/json")
+
+    return app
+
+
+async def end_to_end(app: FastAPI, requests: int, rounds: int = 3) -> dict[str, dict[str, float]]:
+    """Best mean seconds per request; variants interleave to even out drift."""
+    results: dict[str, dict[str, float]] = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(rounds):
+            for path in ("/messages", "/users"):
+                timings = results.setdefault(path, {})
+                for label in ("fastapi", "direct"):
+                    url = f"/{label}{path}"
+                    await client.get(url)
+                    start = time.perf_counter()
+                    for _ in range(requests):
+                        (await client.get(url)).raise_for_status()
+                    seconds = (time.perf_counter() - start) / requests
+                    timings[label] = min(timings.get(label, seconds), seconds)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=1000, help="Messages in the transcript")
+    parser.add_argument("--users", type=int, default=200, help="Users in the listing")
+    parser.add_argument("--sessions", type=int, default=10, help="Sessions per listed user")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per end-to-end round")
+    args = parser.parse_args()
+
+    transcript = build_transcript(args.messages)
+    users = build_users(args.users, args.sessions)
+    payloads = {
+        f"transcript ({args.messages} messages)": (transcript, MessagesResponse),
+        f"users ({args.users} x {args.sessions} sessions)": (users, list[UserWithSessions]),
+    }
+
+    print(f"{'response models':<36}{'variant':<10}{'ms/resp':>10}{'speedup':>9}{'KiB':>8}")
+    for name, (content, response_model) in payloads.items():
+        baseline = None
+        for label, fn in model_variants(content, response_model).items():
+            seconds = time_call(fn)
+            baseline = baseline or seconds
+            print(f"{name:<36}{label:<10}{seconds * 1000:>10.3f}{baseline / seconds:>8.1f}x{len(fn()) / 1024:>8.0f}")
+
+    print(f"\n{'end to end (ASGI)':<36}{'variant':<10}{'ms/req':>10}{'speedup':>9}")
+    results = asyncio.run(end_to_end(build_app(transcript, users), args.requests))
+    for path, timings in results.items():
+        for label, seconds in timings.items():
+            print(f"{path:<36}{label:<10}{seconds * 1000:>10.3f}{timings['fastapi'] / seconds:>8.1f}x")
+
+    backend = "orjson" if serialization.orjson is not None else "stdlib, orjson not installed"
+    print(f"\n{'dict payloads':<36}{'json':>10}{'dumps':>10}{'speedup':>9}   [{backend}]")
+    token = {"token": _text(3, 5)}
+    error = {"error": {"code": "RATE_LIMITED", "message": "Rate limit exceeded", "details": {"retry_after": 12}}}
+    cases = {
+        "SSE token data (us)": (lambda: json.dumps(token), lambda: dumps(token)),
+        "error body (us)": (
+            lambda: json.dumps(error).encode(),
+            lambda: FastJSONResponse(error).body,
+        ),
+    }
+    for name, (stdlib_fn, fast_fn) in cases.items():
+        stdlib, fast = time_call(stdlib_fn), time_call(fast_fn)
+        print(f"{name:<36}{stdlib * 1e6:>10.2f}{fast * 1e6:>10.2f}{stdlib / fast:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Benchmark SSE token coalescing on and off.
+
+Streams fake LLM tokens through the same coalescing and event framing used
+by ``/chat`` and ``EventSourceResponse`` into an in-memory ASGI ``send`` and
+reports CPU time per streamed response, frames per response and events/sec
+for one worker.
+
+    python -m benchmarks.sse_coalescing --streams 200 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import time
+
+from benchmarks.fakes import fake_token_stream
+
+from sse_starlette.sse import EventSourceResponse
+
+from app.api.v1.chat import token_event
+from app.core.config import settings
+from app.utils.streaming import coalesce_tokens
+
+
+async def _events(n_tokens: int, rate: float):
+    """Coalesce and frame a fake token stream exactly like a chat turn."""
+    seq = 0
+    async for chunk in coalesce_tokens(
+        fake_token_stream(n_tokens, rate),
+        max_tokens=settings.sse_flush_max_tokens,
+        max_bytes=settings.sse_flush_max_bytes,
+        max_delay_ms=settings.sse_flush_max_delay_ms,
+    ):
+        yield token_event("bench", seq, chunk)
+        seq += 1
+
+
+async def _run_stream(n_tokens: int, rate: float) -> tuple[int, int]:
+    """Stream one response and return (frames, bytes) sent."""
+    frames = 0
+    sent_bytes = 0
+    disconnect = asyncio.Event()
+
+    async def receive():
+        await disconnect.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal frames, sent_bytes
+        if message["type"] == "http.response.body" and message.get("body"):
+            frames += 1
+            sent_bytes += len(message["body"])
+
+    response = EventSourceResponse(_events(n_tokens, rate))
+    await response({"type": "http"}, receive, send)
+    return frames, sent_bytes
+
+
+async def _run(streams: int, concurrency: int, n_tokens: int, rate: float) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            return await _run_stream(n_tokens, rate)
+
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    results = await asyncio.gather(*(one() for _ in range(streams)))
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+
+    frames = sum(r[0] for r in results)
+    return {
+        "cpu_ms_per_response": cpu * 1000 / streams,
+        "frames_per_response": frames / streams,
+        "bytes_per_response": sum(r[1] for r in results) / streams,
+        "events_per_sec": frames / wall,
+        "tokens_per_sec": streams * n_tokens / wall,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--streams", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--tokens", type=int, default=300)
+    parser.add_argument(
+        "--rate", type=float, default=0, help="Tokens/sec per stream (0 = unpaced)"
+    )
+    args = parser.parse_args()
+
+    policies = {
+        "off": (1, 0, 0),
+        "on": (
+            settings.sse_flush_max_tokens,
+            settings.sse_flush_max_bytes,
+            settings.sse_flush_max_delay_ms,
+        ),
+    }
+    if policies["on"][0] <= 1:
+        policies["on"] = (8, 512, 40)
+
+    print(
+        f"{args.streams} streams x {args.tokens} tokens, "
+        f"concurrency={args.concurrency}, rate={args.rate or 'unpaced'}"
+    )
+    print(f"{'policy':<24}{'cpu ms/resp':>12}{'frames/resp':>13}{'events/s':>12}{'tokens/s':>12}")
+    for name, (max_tokens, max_bytes, max_delay_ms) in policies.items():
+        settings.sse_flush_max_tokens = max_tokens
+        settings.sse_flush_max_bytes = max_bytes
+        settings.sse_flush_max_delay_ms = max_delay_ms
+        stats = asyncio.run(_run(args.streams, args.concurrency, args.tokens, args.rate))
+        label = f"{name} ({max_tokens}/{max_bytes}B/{max_delay_ms}ms)"
+        print(
+            f"{label:<24}{stats['cpu_ms_per_response']:>12.2f}"
+            f"{stats['frames_per_response']:>13.1f}"
+            f"{stats['events_per_sec']:>12.0f}{stats['tokens_per_sec']:>12.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
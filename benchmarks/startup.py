@@ -0,0 +1,144 @@
+"""Worker cold-start benchmark, with regression baselines.
+
+Starts fresh interpreters that import ``app.main`` and run the lifespan
+startup against a throwaway, already-migrated SQLite database, and reports
+import and startup time per ``DB_STARTUP_MODE``. Exits non-zero when the
+time to ready is slower than ``benchmarks/baselines/startup.json`` by more
+than the tolerance:
+
+    python -m benchmarks.startup                 # check vs migrate, 5 runs each
+    python -m benchmarks.startup --update        # record new baselines
+    python -m benchmarks.startup --modes check --runs 10
+
+Use ``python -m benchmarks.importtime`` to see where import time goes.
+Baselines are machine-specific, like the hot-path ones.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+BASELINE_PATH = Path(__file__).parent / "baselines" / "startup.json"
+
+# Runs in the child; prints one JSON line with its timings
+_PROBE = """
+import asyncio, json, time
+start = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+
+async def startup():
+    async with app.router.lifespan_context(app):
+        return time.perf_counter()
+
+ready = asyncio.run(startup())
+print(json.dumps({"import_ms": (imported - start) * 1000, "startup_ms": (ready - imported) * 1000}))
+"""
+
+
+def _env(database_url: str, mode: str) -> dict[str, str]:
+    return {
+        **os.environ,
+        "GROQ_API_KEY": os.environ.get("GROQ_API_KEY", "bench-dummy-key"),
+        "DATABASE_URL": database_url,
+        "DB_STARTUP_MODE": mode,
+        "LOG_LEVEL": "WARNING",
+        "METRICS_MULTIPROC_DIR": "",
+    }
+
+
+def measure(database_url: str, mode: str, runs: int) -> dict[str, float]:
+    """Median import, startup and total time (ms) over ``runs`` cold starts."""
+    samples: dict[str, list[float]] = {"import_ms": [], "startup_ms": [], "ready_ms": []}
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", _PROBE],
+            cwd=ROOT,
+            env=_env(database_url, mode),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        timings = json.loads(output.strip().splitlines()[-1])
+        samples["import_ms"].append(timings["import_ms"])
+        samples["startup_ms"].append(timings["startup_ms"])
+        samples["ready_ms"].append(timings["import_ms"] + timings["startup_ms"])
+    return {name: round(statistics.median(values), 1) for name, values in samples.items()}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modes", nargs="+", default=["check", "migrate"], choices=["check", "migrate", "skip"])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--update", action="store_true", help="Write results as the new baselines")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="Allowed slowdown (0.3 = 30%%)")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--json", dest="json_path", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = f"sqlite+aiosqlite:///{tmp}/startup.db"
+        subprocess.run(
+            [sys.executable, "-m", "app.db.migrate"],
+            cwd=ROOT, env=_env(database_url, "check"), check=True, capture_output=True,
+        )
+        results = {mode: measure(database_url, mode, args.runs) for mode in args.modes}
+
+    baselines: dict = {}
+    if args.baseline.exists():
+        baselines = json.loads(args.baseline.read_text()).get("modes", {})
+
+    regressions = []
+    print(f"{'mode':<10}{'import ms':>12}{'startup ms':>12}{'ready ms':>12}{'baseline':>12}{'change':>9}")
+    for mode, row in results.items():
+        line = f"{mode:<10}{row['import_ms']:>12}{row['startup_ms']:>12}{row['ready_ms']:>12}"
+        base = baselines.get(mode)
+        if base:
+            change = row["ready_ms"] / base["ready_ms"] - 1
+            flag = "  REGRESSION" if change > args.tolerance else ""
+            if flag:
+                regressions.append(mode)
+            print(f"{line}{base['ready_ms']:>12}{change:>+9.1%}{flag}")
+        else:
+            print(f"{line}{'-':>12}{'new':>9}")
+
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps(results, indent=2))
+
+    if args.update:
+        baselines.update(results)
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(
+            json.dumps(
+                {
+                    "machine": {
+                        "python": platform.python_version(),
+                        "platform": platform.platform(),
+                        "processor": platform.processor() or platform.machine(),
+                    },
+                    "modes": dict(sorted(baselines.items())),
+                },
+                indent=2,
+            )
+            + "\n"
+        )
+        print(f"\nBaselines written to {args.baseline}")
+        return
+
+    if regressions:
+        print(
+            f"\nTime to ready regressed beyond {args.tolerance:.0%} for: " + ", ".join(regressions),
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
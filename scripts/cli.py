@@ -1,10 +1,14 @@
 #!/usr/bin/env python3
 """CheziousBot CLI - Interactive chat client with streaming"""
 
+import argparse
 import asyncio
+import json
+import os
 import signal
 import sys
 import httpx
+from typing import AsyncIterator
 from uuid import UUID, uuid4
 
 
@@ -21,6 +25,33 @@ async def create_user(client: httpx.AsyncClient, user_id: str, name: str, city:
     return response.json()
 
 
+async def iter_sse_events(response: httpx.Response) -> AsyncIterator[tuple[str, dict]]:
+    """
+    Parse an SSE response into (event type, JSON data) pairs.
+
+    Events without an ``event:`` field are reported as ``message``; data that
+    is not JSON is skipped.
+    """
+    event_type = "message"
+    data_lines: list[str] = []
+    async for line in response.aiter_lines():
+        if not line:
+            # Blank line terminates an event
+            if data_lines:
+                try:
+                    yield event_type, json.loads("\n".join(data_lines))
+                except json.JSONDecodeError:
+                    pass
+            event_type = "message"
+            data_lines = []
+            continue
+
+        if line.startswith("event:"):
+            event_type = line[6:].strip()
+        elif line.startswith("data:"):
+            data_lines.append(line[5:].strip())
+
+
 async def stream_chat(
     client: httpx.AsyncClient,
     session_id: UUID,
@@ -28,8 +59,6 @@ async def stream_chat(
     user_id: str,
 ) -> None:
     """Send a message and stream the response."""
-    import json
-    
     print("\n🤖 ", end="", flush=True)
 
     try:
@@ -41,28 +70,13 @@ async def stream_chat(
         ) as response:
             response.raise_for_status()
 
-            async for line in response.aiter_lines():
-                if not line:
-                    continue
-
-                # Parse SSE format
-                if line.startswith("event:"):
-                    event_type = line[6:].strip()
-                    if event_type == "done":
-                        break
-                    continue
-
-                if line.startswith("data:"):
-                    data = line[5:].strip()
-                    if data:
-                        try:
-                            parsed = json.loads(data)
-                            if "token" in parsed:
-                                print(parsed["token"], end="", flush=True)
-                            elif "error" in parsed:
-                                print(f"\n❌ Error: {parsed['error']}")
-                        except json.JSONDecodeError:
-                            pass
+            async for event_type, parsed in iter_sse_events(response):
+                if event_type == "done":
+                    break
+                if "token" in parsed:
+                    print(parsed["token"], end="", flush=True)
+                elif "error" in parsed:
+                    print(f"\n❌ Error: {parsed['error']}")
     except asyncio.CancelledError:
         print("\n[Cancelled]")
         raise
@@ -75,7 +89,7 @@ def generate_session_id() -> UUID:
     return uuid4()
 
 
-async def main():
+async def main(api_key: str | None = None):
     """Main CLI loop."""
     print("=" * 50)
     print("🍕 Welcome to CheziousBot CLI!")
@@ -102,7 +116,9 @@ async def main():
     
     print(f"\nHello, {name}! Setting up...\n")
 
-    async with httpx.AsyncClient() as client:
+    # Needed when the server runs with API_KEY_ENABLED=true
+    headers = {"X-API-Key": api_key} if api_key else {}
+    async with httpx.AsyncClient(headers=headers) as client:
         try:
             # Create/update user
             await create_user(client, user_id, name, city)
@@ -153,8 +169,15 @@ async def main():
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CheziousBot interactive chat client")
+    parser.add_argument(
+        "--api-key",
+        default=os.environ.get("CHEZIOUS_API_KEY"),
+        help="Sent as X-API-Key (default: $CHEZIOUS_API_KEY)",
+    )
+    args = parser.parse_args()
     try:
-        asyncio.run(main())
+        asyncio.run(main(args.api_key))
     except KeyboardInterrupt:
         print("\n👋 Goodbye!")
         sys.exit(0)
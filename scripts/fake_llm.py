@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""Fake OpenAI/Groq-compatible LLM server for offline load testing
+
+Serves ``POST /openai/v1/chat/completions`` (the path the Groq SDK uses) and
+``POST /v1/chat/completions`` with streaming and non-streaming responses.
+Latency, generation speed and failures are configurable:
+
+    python3 scripts/fake_llm.py --port 9100 --ttft-ms 300 --tokens-per-sec 80 --error-rate 0.02
+
+Point the app at it with ``GROQ_BASE_URL=http://127.0.0.1:9100``.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+WORDS = (
+    "Our Chicken Tikka pizza is Rs. 1,250 for a regular and Rs. 1,650 for a "
+    "large, and you can order it by calling 111-44-66-99 or through the app."
+).split()
+
+
+def build_app(
+    ttft_ms: float = 200,
+    tokens_per_sec: float = 100,
+    n_tokens: int = 120,
+    jitter: float = 0.2,
+    error_rate: float = 0.0,
+    error_status: int = 503,
+    seed: int | None = None,
+) -> Starlette:
+    """
+    Build the fake server.
+
+    Args:
+        ttft_ms: Mean delay before the first token
+        tokens_per_sec: Mean generation rate after the first token
+        n_tokens: Tokens per completion (capped by the request's max_tokens)
+        jitter: Relative random variation applied to delays
+        error_rate: Fraction of requests answered with ``error_status``
+        error_status: HTTP status used for injected errors (e.g. 429, 503)
+        seed: Seed for reproducible delays and failures
+    """
+    rng = random.Random(seed)
+    stats = {"requests": 0, "errors": 0, "tokens": 0}
+
+    def vary(value: float) -> float:
+        return max(0.0, value * (1 + rng.uniform(-jitter, jitter)))
+
+    def chunk(completion_id: str, model: str, delta: dict, finish_reason: str | None = None) -> bytes:
+        payload = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+        return f"data: {json.dumps(payload)}\n\n".encode()
+
+    async def completions(request: Request) -> Response:
+        body = await request.json()
+        stats["requests"] += 1
+        if rng.random() < error_rate:
+            stats["errors"] += 1
+            return JSONResponse(
+                {"error": {"message": "Injected failure", "type": "fake_error"}},
+                status_code=error_status,
+            )
+
+        model = body.get("model", "fake-model")
+        count = min(n_tokens, body.get("max_tokens") or n_tokens)
+        tokens = [(" " if i else "") + WORDS[i % len(WORDS)] for i in range(count)]
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+
+        if not body.get("stream"):
+            await asyncio.sleep(vary(ttft_ms / 1000) + count / tokens_per_sec)
+            stats["tokens"] += count
+            return JSONResponse(
+                {
+                    "id": completion_id,
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {"role": "assistant", "content": "".join(tokens)},
+                            "finish_reason": "stop",
+                        }
+                    ],
+                    "usage": {"prompt_tokens": 0, "completion_tokens": count, "total_tokens": count},
+                }
+            )
+
+        async def stream():
+            await asyncio.sleep(vary(ttft_ms / 1000))
+            yield chunk(completion_id, model, {"role": "assistant", "content": ""})
+            for i, token in enumerate(tokens):
+                if i:
+                    await asyncio.sleep(vary(1 / tokens_per_sec))
+                stats["tokens"] += 1
+                yield chunk(completion_id, model, {"content": token})
+            yield chunk(completion_id, model, {}, "stop")
+            yield b"data: [DONE]\n\n"
+
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    async def get_stats(request: Request) -> Response:
+        return JSONResponse(stats)
+
+    async def get_model(request: Request) -> Response:
+        # Used by readiness checks
+        model = request.path_params["model"]
+        return JSONResponse({"id": model, "object": "model", "created": 0, "owned_by": "fake-llm"})
+
+    return Starlette(
+        routes=[
+            Route("/openai/v1/chat/completions", completions, methods=["POST"]),
+            Route("/v1/chat/completions", completions, methods=["POST"]),
+            Route("/openai/v1/models/{model:path}", get_model),
+            Route("/stats", get_stats),
+        ]
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--ttft-ms", type=float, default=200)
+    parser.add_argument("--tokens-per-sec", type=float, default=100)
+    parser.add_argument("--tokens", type=int, default=120)
+    parser.add_argument("--jitter", type=float, default=0.2)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    app = build_app(
+        ttft_ms=args.ttft_ms,
+        tokens_per_sec=args.tokens_per_sec,
+        n_tokens=args.tokens,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        seed=args.seed,
+    )
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""CheziousBot load test - concurrent simulated users
+
+Each virtual user registers through ``/users``, then runs chat turns over
+``/chat`` (SSE) and reads its session back through ``/sessions``. Reports
+throughput plus time-to-first-token and end-to-end latency percentiles.
+
+Against a running server:
+
+    python3 scripts/loadtest.py --base-url http://localhost:8000 --users 50 --turns 5
+
+Fully offline (starts the fake LLM and the app on free ports, with a
+throwaway SQLite database):
+
+    python3 scripts/loadtest.py --spawn --users 50 --turns 5 --ttft-ms 300 --tokens-per-sec 80
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+from uuid import uuid4
+
+import httpx
+
+from cli import iter_sse_events
+
+ROOT = Path(__file__).resolve().parent.parent
+
+MESSAGES = (
+    "What pizzas do you have?",
+    "How much is a large Chicken Tikka?",
+    "Do you deliver to my area?",
+    "Which deals are available today?",
+    "What sides go well with a Crown Crust?",
+)
+
+
+class Results:
+    """Latency samples and counters collected during a run."""
+
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: Counter[str] = Counter()
+        self.chunks = 0
+
+    def record(self, name: str, seconds: float) -> None:
+        self.latencies[name].append(seconds * 1000)
+
+    def error(self, name: str, reason: str) -> None:
+        self.errors[f"{name}: {reason}"] += 1
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of values."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def chat_turn(
+    client: httpx.AsyncClient,
+    results: Results,
+    session_id: str,
+    user_id: str,
+    message: str,
+) -> None:
+    """Run one SSE chat turn, recording TTFT and end-to-end latency."""
+    start = time.perf_counter()
+    first_token: float | None = None
+    try:
+        async with client.stream(
+            "POST",
+            "/api/v1/chat",
+            json={"session_id": session_id, "message": message, "user_id": user_id},
+        ) as response:
+            if response.status_code != 200:
+                results.error("chat", f"HTTP {response.status_code}")
+                return
+            async for event_type, data in iter_sse_events(response):
+                if event_type == "token":
+                    if first_token is None:
+                        first_token = time.perf_counter()
+                    results.chunks += 1
+                elif event_type == "error":
+                    results.error("chat", str(data.get("error", "stream error"))[:60])
+                    return
+                elif event_type == "done":
+                    break
+    except httpx.HTTPError as e:
+        results.error("chat", type(e).__name__)
+        return
+
+    end = time.perf_counter()
+    results.record("chat_e2e", end - start)
+    if first_token is not None:
+        results.record("chat_ttft", first_token - start)
+
+
+async def timed_request(
+    client: httpx.AsyncClient, results: Results, name: str, method: str, url: str, **kwargs
+) -> httpx.Response | None:
+    """Issue a request, recording its latency or failure."""
+    start = time.perf_counter()
+    try:
+        response = await client.request(method, url, **kwargs)
+    except httpx.HTTPError as e:
+        results.error(name, type(e).__name__)
+        return None
+    results.record(name, time.perf_counter() - start)
+    if response.status_code >= 400:
+        results.error(name, f"HTTP {response.status_code}")
+    return response
+
+
+async def virtual_user(
+    client: httpx.AsyncClient, results: Results, index: int, turns: int, think_time: float
+) -> None:
+    """Register, chat for a number of turns, then read the session back."""
+    user_id = f"load_{index}_{uuid4().hex[:6]}"
+    session_id = str(uuid4())
+    rng = random.Random(index)
+
+    await timed_request(
+        client, results, "create_user", "POST", "/api/v1/users/",
+        json={"user_id": user_id, "name": f"Load User {index}", "city": "Lahore"},
+    )
+    for _ in range(turns):
+        await chat_turn(client, results, session_id, user_id, rng.choice(MESSAGES))
+        await timed_request(client, results, "get_session", "GET", f"/api/v1/sessions/{session_id}")
+        if think_time:
+            await asyncio.sleep(rng.uniform(0, think_time))
+    await timed_request(
+        client, results, "get_messages", "GET", f"/api/v1/sessions/{session_id}/messages"
+    )
+    await timed_request(
+        client, results, "user_sessions", "GET", f"/api/v1/users/{user_id}/sessions"
+    )
+
+
+async def run_load(
+    base_url: str, users: int, turns: int, ramp_up: float, think_time: float, api_key: str | None
+) -> tuple[Results, float]:
+    """Run all virtual users concurrently against ``base_url``."""
+    results = Results()
+    headers = {"X-API-Key": api_key} if api_key else {}
+    limits = httpx.Limits(max_connections=users + 10, max_keepalive_connections=users + 10)
+    async with httpx.AsyncClient(
+        base_url=base_url, headers=headers, timeout=120.0, limits=limits
+    ) as client:
+
+        async def start_user(index: int) -> None:
+            if ramp_up:
+                await asyncio.sleep(ramp_up * index / users)
+            await virtual_user(client, results, index, turns, think_time)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(start_user(i) for i in range(users)))
+        elapsed = time.perf_counter() - start
+    return results, elapsed
+
+
+def summarize(results: Results, elapsed: float) -> dict:
+    """Turn raw samples into the summary that is printed (or dumped as JSON)."""
+    endpoints = {}
+    for name, values in sorted(results.latencies.items()):
+        endpoints[name] = {
+            "count": len(values),
+            "p50_ms": round(percentile(values, 50), 1),
+            "p90_ms": round(percentile(values, 90), 1),
+            "p99_ms": round(percentile(values, 99), 1),
+            "max_ms": round(max(values), 1),
+        }
+    requests = sum(len(v) for k, v in results.latencies.items() if k != "chat_ttft")
+    return {
+        "elapsed_s": round(elapsed, 2),
+        "requests_per_s": round(requests / elapsed, 1) if elapsed else 0.0,
+        "chat_turns_per_s": round(len(results.latencies["chat_e2e"]) / elapsed, 2) if elapsed else 0.0,
+        "sse_chunks": results.chunks,
+        "errors": dict(results.errors),
+        "endpoints": endpoints,
+    }
+
+
+def print_summary(summary: dict) -> None:
+    print(f"\nElapsed: {summary['elapsed_s']}s")
+    print(f"Throughput: {summary['requests_per_s']} req/s, {summary['chat_turns_per_s']} chat turns/s")
+    print(f"SSE chunks received: {summary['sse_chunks']}\n")
+    print(f"{'endpoint':<16}{'count':>8}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, row in summary["endpoints"].items():
+        print(
+            f"{name:<16}{row['count']:>8}{row['p50_ms']:>10}{row['p90_ms']:>10}"
+            f"{row['p99_ms']:>10}{row['max_ms']:>10}"
+        )
+    if summary["errors"]:
+        print("\nErrors:")
+        for reason, count in sorted(summary["errors"].items(), key=lambda item: -item[1]):
+            print(f"  {count:>6}  {reason}")
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_for(url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(url, timeout=1.0)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Timed out waiting for {url}")
+
+
+@contextmanager
+def spawn_stack(args: argparse.Namespace) -> Iterator[str]:
+    """Start the fake LLM and the app in subprocesses; yields the app's base URL."""
+    llm_port, app_port = _free_port(), _free_port()
+    with tempfile.TemporaryDirectory() as tmp:
+        fake_llm = subprocess.Popen(
+            [
+                sys.executable, str(Path(__file__).parent / "fake_llm.py"),
+                "--port", str(llm_port),
+                "--ttft-ms", str(args.ttft_ms),
+                "--tokens-per-sec", str(args.tokens_per_sec),
+                "--tokens", str(args.tokens),
+                "--error-rate", str(args.error_rate),
+                "--error-status", str(args.error_status),
+                "--seed", "1",
+            ]
+        )
+        env = {
+            **os.environ,
+            "GROQ_API_KEY": os.environ.get("GROQ_API_KEY", "loadtest-dummy-key"),
+            "GROQ_BASE_URL": f"http://127.0.0.1:{llm_port}",
+            "DATABASE_URL": f"sqlite+aiosqlite:///{tmp}/loadtest.db",
+            "RATE_LIMIT_PER_MINUTE": "1000000",
+            "API_KEY_ENABLED": "false",
+            "LOG_LEVEL": "WARNING",
+        }
+        subprocess.run([sys.executable, "-m", "app.db.migrate"], cwd=ROOT, env=env, check=True)
+        server = subprocess.Popen(
+            [
+                sys.executable, "-m", "uvicorn", "app.main:app",
+                "--host", "127.0.0.1", "--port", str(app_port),
+                "--log-level", "warning", "--no-access-log",
+                "--workers", str(args.workers),
+            ],
+            cwd=ROOT,
+            env=env,
+        )
+        try:
+            _wait_for(f"http://127.0.0.1:{llm_port}/stats")
+            _wait_for(f"http://127.0.0.1:{app_port}/api/v1/health")
+            yield f"http://127.0.0.1:{app_port}"
+        finally:
+            for process in (server, fake_llm):
+                process.terminate()
+            for process in (server, fake_llm):
+                try:
+                    process.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="CheziousBot load test")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--api-key", default=os.environ.get("API_KEY"))
+    parser.add_argument("--users", type=int, default=20, help="Concurrent virtual users")
+    parser.add_argument("--turns", type=int, default=3, help="Chat turns per user")
+    parser.add_argument("--ramp-up", type=float, default=0.0, help="Seconds to start all users")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Max pause between turns")
+    parser.add_argument("--json", dest="json_path", help="Also write the summary to this file")
+
+    spawn = parser.add_argument_group("offline mode")
+    spawn.add_argument("--spawn", action="store_true", help="Start a fake LLM and the app locally")
+    spawn.add_argument("--workers", type=int, default=1)
+    spawn.add_argument("--ttft-ms", type=float, default=200)
+    spawn.add_argument("--tokens-per-sec", type=float, default=100)
+    spawn.add_argument("--tokens", type=int, default=120)
+    spawn.add_argument("--error-rate", type=float, default=0.0)
+    spawn.add_argument("--error-status", type=int, default=503)
+    args = parser.parse_args()
+
+    def run(base_url: str) -> dict:
+        print(f"Running {args.users} users x {args.turns} turns against {base_url}")
+        results, elapsed = asyncio.run(
+            run_load(base_url, args.users, args.turns, args.ramp_up, args.think_time, args.api_key)
+        )
+        return summarize(results, elapsed)
+
+    if args.spawn:
+        with spawn_stack(args) as base_url:
+            summary = run(base_url)
+    else:
+        summary = run(args.base_url.rstrip("/"))
+
+    print_summary(summary)
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,10 @@
+"""Test settings: no real Groq key, API keys off, a throwaway database"""
+
+import os
+import tempfile
+
+os.environ.setdefault("GROQ_API_KEY", "test-dummy-key")
+os.environ.setdefault("API_KEY_ENABLED", "false")
+os.environ.setdefault(
+    "DATABASE_URL", f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/test.db"
+)
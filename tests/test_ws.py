@@ -0,0 +1,18 @@
+"""WebSocket chat transport"""
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+
+def test_binary_frame_gets_error_frame_and_keeps_socket_open():
+    client = TestClient(app)
+    with client.websocket_connect("/api/v1/ws/chat") as ws:
+        ws.send_bytes(b'{"type": "chat"}')
+        frame = ws.receive_json()
+        assert frame["t"] == "error"
+        assert frame["code"] == "VALIDATION_ERROR"
+
+        # The connection survives and still answers text frames
+        ws.send_text("not json")
+        assert ws.receive_json()["code"] == "VALIDATION_ERROR"